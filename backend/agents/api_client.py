@@ -1,7 +1,12 @@
 import os
 import logging
 import httpx
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from agents.local_model import call_local_model, stream_local_model
+from agents.client_pool import client_pool
+from agents.model_router import model_router
+from utils.request_context import current_context
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -9,9 +14,11 @@ logger = logging.getLogger(__name__)
 
 # API configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_API_BASE = "https://api.openai.com"
+OPENAI_API_URL = f"{OPENAI_API_BASE}/v1/chat/completions"
 HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN", "")
-HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/"
+HUGGINGFACE_API_BASE = "https://api-inference.huggingface.co"
+HUGGINGFACE_API_URL = f"{HUGGINGFACE_API_BASE}/models/"
 
 async def call_openai_api(
     prompt: str,
@@ -22,18 +29,13 @@ async def call_openai_api(
     api_key: Optional[str] = None
 ) -> str:
     """Call OpenAI API with the given prompt"""
-    # Use provided API key or fall back to environment variable
-    api_key = api_key or OPENAI_API_KEY
+    # Use provided API key, then the request's key, then the environment variable
+    api_key = api_key or current_context().key_for("openai") or OPENAI_API_KEY
     
     if not api_key:
         logger.error("OpenAI API key is not provided")
         raise ValueError("OpenAI API key is not provided")
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
     messages = []
     if system_message:
         messages.append({"role": "system", "content": system_message})
@@ -47,11 +49,11 @@ async def call_openai_api(
     }
     
     try:
-        async with httpx.AsyncClient() as client:
+        # The pooled client for this key sends it as the Authorization header
+        async with client_pool.client(OPENAI_API_BASE, api_key) as client:
             logger.info(f"Sending request to OpenAI API with model: {model}")
             response = await client.post(
                 OPENAI_API_URL,
-                headers=headers,
                 json=data,
                 timeout=60.0
             )
@@ -77,18 +79,13 @@ async def call_huggingface_api(
     api_token: Optional[str] = None
 ) -> str:
     """Call Hugging Face API with the given prompt"""
-    # Use provided API token or fall back to environment variable
-    api_token = api_token or HUGGINGFACE_API_TOKEN
+    # Use provided API token, then the request's token, then the environment variable
+    api_token = api_token or current_context().key_for("huggingface") or HUGGINGFACE_API_TOKEN
     
     if not api_token:
         logger.error("Hugging Face API token is not provided")
         raise ValueError("Hugging Face API token is not provided")
     
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json"
-    }
-    
     # Different models might require different payload formats
     # This is a common format that works with many instruction-tuned models
     payload = {
@@ -104,11 +101,10 @@ async def call_huggingface_api(
     api_url = f"{HUGGINGFACE_API_URL}{model_id}"
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with client_pool.client(HUGGINGFACE_API_BASE, api_token) as client:
             logger.info(f"Sending request to Hugging Face API with model: {model_id}")
             response = await client.post(
                 api_url,
-                headers=headers,
                 json=payload,
                 timeout=120.0  # Longer timeout for HF models
             )
@@ -139,11 +135,12 @@ async def call_huggingface_api(
 async def generate_text(
     prompt: str,
     system_message: str = "",
-    api_provider: str = "openai",
+    api_provider: Optional[str] = None,
     model: str = None,
     temperature: float = 0.7,
     max_tokens: int = 2000,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    task: str = "default"
 ) -> str:
     """
     Generate text using the specified API provider
@@ -151,49 +148,110 @@ async def generate_text(
     Args:
         prompt: The prompt to send to the API
         system_message: System message for OpenAI (ignored for Hugging Face)
-        api_provider: "openai" or "huggingface"
-        model: Model name/ID (provider-specific)
+        api_provider: "openai", "huggingface" or "local", defaulting to the request's provider
+        model: Model name/ID (provider-specific, a model file path for "local")
         temperature: Sampling temperature
         max_tokens: Maximum tokens to generate
-        api_key: Optional API key/token to override environment variables
+        api_key: Optional API key/token to override the request's key and environment variables
+        task: What the text is for ("plan", "script", "social", ...), used to pick a model
         
     Returns:
         Generated text
     """
+    context = current_context()
+    api_provider = api_provider or context.api_provider or "openai"
+    model = model or context.model_for(api_provider.lower())
     logger.info(f"Generating text using {api_provider}")
     
     if api_provider.lower() == "openai":
-        # Default model for OpenAI
-        if not model:
-            model = "gpt-3.5-turbo"
+        # Without an explicit model the router picks one for the task
+        if not model and context.use_gpt4:
+            model = "gpt-4"
         
-        return await call_openai_api(
-            prompt=prompt,
-            system_message=system_message,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            api_key=api_key
+        return await model_router.run(
+            task,
+            "openai",
+            lambda routed_model: call_openai_api(
+                prompt=prompt,
+                system_message=system_message,
+                model=routed_model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                api_key=api_key
+            ),
+            prompt=system_message + prompt,
+            pinned=model
         )
     
     elif api_provider.lower() == "huggingface":
-        # Default model for Hugging Face
-        if not model:
-            model = "mistralai/Mistral-7B-Instruct-v0.2"
-        
         # For Hugging Face, we combine system message and prompt
         combined_prompt = prompt
         if system_message:
             combined_prompt = f"{system_message}\n\n{prompt}"
         
-        return await call_huggingface_api(
+        return await model_router.run(
+            task,
+            "huggingface",
+            lambda routed_model: call_huggingface_api(
+                prompt=combined_prompt,
+                model_id=routed_model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                api_token=api_key
+            ),
             prompt=combined_prompt,
-            model_id=model,
+            pinned=model
+        )
+    
+    elif api_provider.lower() == "local":
+        # Default model for the local provider comes from LOCAL_MODEL_PATH
+        return await call_local_model(
+            prompt=prompt,
+            system_message=system_message,
+            model_path=model,
             temperature=temperature,
-            max_tokens=max_tokens,
-            api_token=api_key
+            max_tokens=max_tokens
         )
     
     else:
         logger.error(f"Unsupported API provider: {api_provider}")
         raise ValueError(f"Unsupported API provider: {api_provider}")
+
+async def stream_text(
+    prompt: str,
+    system_message: str = "",
+    api_provider: Optional[str] = None,
+    model: str = None,
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    api_key: Optional[str] = None,
+    task: str = "default"
+) -> AsyncIterator[str]:
+    """
+    Stream generated text as it is produced
+    
+    The local provider streams tokens from the local model scheduler; remote
+    providers yield the whole completion once it arrives.
+    """
+    api_provider = api_provider or current_context().api_provider or "openai"
+    if api_provider.lower() == "local":
+        async for token in stream_local_model(
+            prompt=prompt,
+            system_message=system_message,
+            model_path=model,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ):
+            yield token
+        return
+    
+    yield await generate_text(
+        prompt=prompt,
+        system_message=system_message,
+        api_provider=api_provider,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        api_key=api_key,
+        task=task
+    )
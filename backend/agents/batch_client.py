@@ -0,0 +1,192 @@
+import os
+import json
+import asyncio
+import logging
+import httpx
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Batch API configuration
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BATCH_BASE_URL = os.getenv("OPENAI_BATCH_BASE_URL", "https://api.openai.com/v1")
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))
+BATCH_COMPLETION_WINDOW = "24h"
+
+# Batch states that will not change any more
+BATCH_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+def build_batch_request(
+    custom_id: str,
+    prompt: str,
+    system_message: str = "",
+    model: str = "gpt-3.5-turbo",
+    temperature: float = 0.7,
+    max_tokens: int = 2000
+) -> Dict[str, Any]:
+    """Build one line of a chat-completions batch input file"""
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+    }
+
+def build_batch_file(requests: List[Dict[str, Any]]) -> bytes:
+    """Serialize batch requests as JSONL"""
+    return "\n".join(json.dumps(request) for request in requests).encode("utf-8")
+
+def parse_batch_output(output: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse a batch output (or error) file into a mapping of custom_id -> result
+
+    Each result has a "content" key with the generated text on success, or an
+    "error" key describing what went wrong. A line that cannot be read only
+    fails its own request; one without a custom_id is logged and skipped, and
+    run_batch reports its request as having no result.
+    """
+    results = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping unreadable batch output line: {e}")
+            continue
+        custom_id = record.get("custom_id") if isinstance(record, dict) else None
+        if custom_id is None:
+            logger.warning("Skipping batch output line without a custom_id")
+            continue
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+
+        if record.get("error") or response.get("status_code", 200) != 200:
+            error = record.get("error") or body.get("error") or f"HTTP {response.get('status_code')}"
+            results[custom_id] = {"error": error}
+            continue
+        try:
+            content = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            results[custom_id] = {"error": "Malformed response body"}
+            continue
+        results[custom_id] = {"content": content}
+    return results
+
+async def submit_batch(
+    client: httpx.AsyncClient,
+    requests: List[Dict[str, Any]],
+    metadata: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Upload the batch input file and create the batch"""
+    upload = await client.post(
+        "/files",
+        data={"purpose": "batch"},
+        files={"file": ("batch_input.jsonl", build_batch_file(requests), "application/jsonl")}
+    )
+    upload.raise_for_status()
+    input_file_id = upload.json()["id"]
+    logger.info(f"Uploaded batch input file {input_file_id} with {len(requests)} requests")
+
+    response = await client.post(
+        "/batches",
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": BATCH_COMPLETION_WINDOW,
+            "metadata": metadata or {}
+        }
+    )
+    response.raise_for_status()
+    batch = response.json()
+    logger.info(f"Created batch {batch['id']}")
+    return batch
+
+async def wait_for_batch(
+    client: httpx.AsyncClient,
+    batch_id: str,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    on_progress=None
+) -> Dict[str, Any]:
+    """Poll a batch until it reaches a final state"""
+    while True:
+        response = await client.get(f"/batches/{batch_id}")
+        response.raise_for_status()
+        batch = response.json()
+
+        if on_progress:
+            counts = batch.get("request_counts") or {}
+            on_progress(counts.get("completed", 0) + counts.get("failed", 0), counts.get("total", 0))
+
+        if batch["status"] in BATCH_FINAL_STATES:
+            logger.info(f"Batch {batch_id} finished with status {batch['status']}")
+            return batch
+
+        await asyncio.sleep(poll_interval)
+
+async def download_batch_results(client: httpx.AsyncClient, batch: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Download and parse the output and error files of a finished batch"""
+    results = {}
+    for file_key in ("output_file_id", "error_file_id"):
+        file_id = batch.get(file_key)
+        if not file_id:
+            continue
+        response = await client.get(f"/files/{file_id}/content")
+        response.raise_for_status()
+        results.update(parse_batch_output(response.text))
+    return results
+
+async def run_batch(
+    requests: List[Dict[str, Any]],
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    metadata: Optional[Dict[str, str]] = None,
+    on_progress=None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Submit requests as a single batch, wait for it and return results by custom_id
+
+    Args:
+        requests: Lines built with build_batch_request
+        api_key: Optional API key to override the environment variable
+        base_url: Optional API base URL (e.g. the local fake batch endpoint)
+        poll_interval: Seconds between status checks
+        metadata: Optional metadata attached to the batch
+        on_progress: Optional callback receiving (finished, total) counts
+
+    Returns:
+        Mapping of custom_id to {"content": ...} or {"error": ...}
+    """
+    api_key = api_key or OPENAI_API_KEY
+
+    if not api_key:
+        logger.error("OpenAI API key is not provided")
+        raise ValueError("OpenAI API key is not provided")
+
+    headers = {"Authorization": f"Bearer {api_key}"}
+
+    async with httpx.AsyncClient(base_url=base_url or OPENAI_BATCH_BASE_URL, headers=headers, timeout=120.0) as client:
+        batch = await submit_batch(client, requests, metadata)
+        batch = await wait_for_batch(client, batch["id"], poll_interval, on_progress)
+
+        if batch["status"] != "completed":
+            raise ValueError(f"Batch {batch['id']} ended with status {batch['status']}")
+
+        results = await download_batch_results(client, batch)
+
+    # Requests that never made it into an output file are reported as errors
+    for request in requests:
+        results.setdefault(request["custom_id"], {"error": "No result returned for request"})
+
+    return results
@@ -0,0 +1,143 @@
+import os
+import logging
+from typing import Dict, Any, List, Optional
+
+from agents.batch_client import build_batch_request, run_batch
+from agents.content_plan_agent.content_agent import build_content_plan_prompts, parse_content_plan
+from agents.script_generator.generat_script_ import build_script_prompts
+from utils.artifact_store import artifact_key, artifact_store
+from utils.helpers import update_job_progress, update_job_status
+
+logger = logging.getLogger(__name__)
+
+BATCH_OUTPUT_DIR = "./outputs/batch"
+
+def _job_output_dir(job_id: str) -> str:
+    return os.path.join(BATCH_OUTPUT_DIR, job_id)
+
+def _progress_callback(job_id: str):
+    # Reserve the last 10% for writing results to disk
+    def on_progress(finished: int, total: int):
+        if total:
+            update_job_progress(job_id, int(finished / total * 90))
+    return on_progress
+
+async def _write_manifest(output_dir: str, manifest: Dict[str, Any]) -> str:
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    await artifact_store.write_json(artifact_key(manifest_path), manifest)
+    return manifest_path
+
+async def run_bulk_content_plans(
+    job_id: str,
+    configs: List[Dict[str, Any]],
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """Generate many content plans through a single provider batch"""
+    logger.info(f"Submitting bulk content plan job {job_id} with {len(configs)} plans")
+    update_job_status(job_id, "processing")
+
+    requests = []
+    for index, config in enumerate(configs):
+        system_prompt, user_prompt = build_content_plan_prompts(config)
+        requests.append(build_batch_request(
+            custom_id=f"plan-{index}",
+            prompt=user_prompt,
+            system_message=system_prompt,
+            model="gpt-4" if config.get("use_gpt4", False) else "gpt-3.5-turbo",
+            temperature=0.7
+        ))
+
+    try:
+        results = await run_batch(
+            requests,
+            api_key=api_key,
+            base_url=base_url,
+            metadata={"job_id": job_id, "type": "content_plans"},
+            on_progress=_progress_callback(job_id)
+        )
+    except Exception as e:
+        logger.error(f"Bulk content plan job {job_id} failed: {str(e)}")
+        update_job_status(job_id, "failed")
+        raise
+
+    output_dir = _job_output_dir(job_id)
+    manifest = {"job_id": job_id, "type": "content_plans", "items": []}
+
+    for index, config in enumerate(configs):
+        result = results[f"plan-{index}"]
+        item = {"index": index, "series_title": config.get("series_title")}
+        try:
+            if "error" in result:
+                raise ValueError(str(result["error"]))
+            content_plan = parse_content_plan(result["content"])
+            plan_path = os.path.join(output_dir, f"content_plan_{index}.json")
+            await artifact_store.write_json(artifact_key(plan_path), content_plan)
+            item["path"] = plan_path
+        except ValueError as e:
+            logger.warning(f"Plan {index} in job {job_id} failed: {str(e)}")
+            item["error"] = str(e)
+        manifest["items"].append(item)
+
+    manifest_path = await _write_manifest(output_dir, manifest)
+    update_job_progress(job_id, 100)
+    update_job_status(job_id, "completed", manifest_path)
+    return manifest
+
+async def run_bulk_scripts(
+    job_id: str,
+    episodes: List[Dict[str, Any]],
+    cat_name: str = "Whiskers",
+    content_style: str = "",
+    use_gpt4: bool = False,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """Generate scripts for many episodes through a single provider batch"""
+    logger.info(f"Submitting bulk script job {job_id} with {len(episodes)} episodes")
+    update_job_status(job_id, "processing")
+
+    requests = []
+    for index, episode in enumerate(episodes):
+        system_message, prompt = build_script_prompts(episode, cat_name, content_style)
+        requests.append(build_batch_request(
+            custom_id=f"script-{index}",
+            prompt=prompt,
+            system_message=system_message,
+            model="gpt-4" if use_gpt4 else "gpt-3.5-turbo",
+            temperature=0.7,
+            max_tokens=2000
+        ))
+
+    try:
+        results = await run_batch(
+            requests,
+            api_key=api_key,
+            base_url=base_url,
+            metadata={"job_id": job_id, "type": "scripts"},
+            on_progress=_progress_callback(job_id)
+        )
+    except Exception as e:
+        logger.error(f"Bulk script job {job_id} failed: {str(e)}")
+        update_job_status(job_id, "failed")
+        raise
+
+    output_dir = _job_output_dir(job_id)
+    manifest = {"job_id": job_id, "type": "scripts", "items": []}
+
+    for index, episode in enumerate(episodes):
+        result = results[f"script-{index}"]
+        item = {"index": index, "title": episode.get("title")}
+        if "error" in result:
+            logger.warning(f"Script {index} in job {job_id} failed: {result['error']}")
+            item["error"] = str(result["error"])
+        else:
+            script_path = os.path.join(output_dir, f"episode{index + 1}_script.txt")
+            await artifact_store.write_text(artifact_key(script_path), result["content"])
+            item["path"] = script_path
+        manifest["items"].append(item)
+
+    manifest_path = await _write_manifest(output_dir, manifest)
+    update_job_progress(job_id, 100)
+    update_job_status(job_id, "completed", manifest_path)
+    return manifest
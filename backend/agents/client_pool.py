@@ -0,0 +1,82 @@
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple, AsyncIterator
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Client pool configuration
+CLIENT_POOL_SIZE = int(os.getenv("CLIENT_POOL_SIZE", "64"))
+CLIENT_MAX_CONNECTIONS = int(os.getenv("CLIENT_MAX_CONNECTIONS", "20"))
+
+def _key_id(api_key: Optional[str]) -> str:
+    # Keys are only held by their clients, the pool is indexed by a hash
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+class ClientPool:
+    """
+    Long-lived HTTP clients, one per (base URL, API key)
+
+    Requests with the same credentials reuse one client and its open
+    connections, and the key is set once as the client's Authorization header
+    instead of in shared process state. The least recently used clients are
+    closed beyond max_clients, once no request is using them.
+    """
+
+    def __init__(self, max_clients: int = CLIENT_POOL_SIZE):
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[Tuple[str, str], httpx.AsyncClient]" = OrderedDict()
+        self._in_use: Dict[httpx.AsyncClient, int] = {}
+        self._retired = set()
+
+    def _create(self, base_url: str, api_key: Optional[str]) -> httpx.AsyncClient:
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            limits=httpx.Limits(max_connections=CLIENT_MAX_CONNECTIONS, max_keepalive_connections=CLIENT_MAX_CONNECTIONS)
+        )
+
+    @asynccontextmanager
+    async def client(self, base_url: str, api_key: Optional[str] = None) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the client for these credentials, creating it on first use"""
+        key = (base_url, _key_id(api_key))
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = self._create(base_url, api_key)
+            while len(self._clients) > self.max_clients:
+                _, evicted = self._clients.popitem(last=False)
+                if self._in_use.get(evicted):
+                    self._retired.add(evicted)
+                else:
+                    await evicted.aclose()
+        self._clients.move_to_end(key)
+
+        self._in_use[client] = self._in_use.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            self._in_use[client] -= 1
+            if not self._in_use[client]:
+                del self._in_use[client]
+                if client in self._retired:
+                    self._retired.discard(client)
+                    await client.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def close(self):
+        """Close every client, called on shutdown"""
+        clients = list(self._clients.values()) + list(self._retired)
+        self._clients.clear()
+        self._retired.clear()
+        for client in clients:
+            await client.aclose()
+
+# Shared pool for all provider calls
+client_pool = ClientPool()
@@ -1,152 +1,265 @@
 import os
 import json
-import aiohttp
-from typing import Dict, Any, Optional
-import openai
+import httpx
+import orjson
+from typing import Dict, Any, Optional, Tuple
+from pydantic import ValidationError
 from .huggingface_agent import generate_content_ideas_hf
+from agents.api_client import OPENAI_API_BASE, OPENAI_API_URL, generate_text
+from agents.client_pool import client_pool
+from agents.model_router import ProviderError, model_router
+from utils.semantic_cache import SEMANTIC_CACHE_ENABLED, plan_cache, plan_cache_fields
+from utils.episode_index import EPISODE_DEDUP_ENABLED, EPISODE_DEDUP_MAX_RETRIES, episode_index
+from utils.plan_store import ANALYTICS_EXPORT_ENABLED, export_content_plan
+from utils.request_context import current_context
+from utils.profiler import profiled
+from models.records import ContentPlanRecord, content_plan_record, decode_content_plan
 
-async def generate_content_ideas(config: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate content ideas using either OpenAI or Hugging Face"""
+# Cap on how many earlier titles are listed in a regeneration prompt
+MAX_AVOID_TITLES = 50
+
+@profiled("plan.build_prompts")
+def build_content_plan_prompts(config: Dict[str, Any]) -> Tuple[str, str]:
+    """Build the system and user prompts for a content plan request"""
+    # Extract configuration
+    series_title = config.get('series_title', 'Mischievous Cat Shopper')
+    num_episodes = config.get('num_episodes', 5)
+    cat_name = config.get('cat_name', 'Whiskers')
+    content_style = config.get('content_style', 'humorous, family-friendly')
+    theme = config.get('theme', content_style)
+    setting = config.get('setting', '')
+    target_audience = config.get('target_audience', '')
+    additional_characters = config.get('additional_characters', '')
+    avoid_episodes = config.get('avoid_episodes') or []
+    
+    # Prepare the prompt for OpenAI
+    system_prompt = """You are a creative content planner for short-form video series.
+    Create a detailed content plan for a series about a mischievous cat who goes shopping."""
+    
+    user_prompt = f"""Create a content plan for a short-form video series titled "{series_title}" with {num_episodes} episodes.
+    
+    The main character is a cat named {cat_name} who loves to go shopping.
+    
+    The content style should be: {content_style}
+    
+    Additional details:
+    - Setting: {setting}
+    - Target audience: {target_audience}
+    - Additional characters: {additional_characters}
+    - Theme/mood: {theme}
+    
+    For each episode, include:
+    1. A catchy title
+    2. A brief premise
+    3. The specific setting (what store or shopping location)
+    4. List of 2-3 items the cat is shopping for
+    5. A conflict that arises
+    6. How the conflict is resolved
+    
+    Also include a section about the cat's personality with:
+    1. 3-5 personality traits
+    2. 2-3 quirky behaviors
+    3. 2-3 catchphrases or sounds the cat makes
+    
+    Format the response as a JSON object with the following structure:
+    {{
+      "series_concept": "Brief overall concept",
+      "cat_personality": {{
+        "traits": ["trait1", "trait2", "etc"],
+        "quirks": ["quirk1", "quirk2", "etc"],
+        "catchphrases": ["phrase1", "phrase2", "etc"]
+      }},
+      "episodes": [
+        {{
+          "title": "Episode title",
+          "premise": "Brief premise",
+          "setting": "Specific store or location",
+          "items": ["item1", "item2", "etc"],
+          "conflict": "Description of conflict",
+          "resolution": "How conflict is resolved"
+        }}
+      ]
+    }}
+    
+    Ensure all content is family-friendly and appropriate for all audiences."""
+    
+    if avoid_episodes:
+        user_prompt += f"""
+    
+    Do not repeat or closely resemble these existing episodes: {'; '.join(avoid_episodes)}"""
+    
+    return system_prompt, user_prompt
+
+@profiled("plan.parse_json")
+def parse_content_plan(content_plan_text: str) -> Dict[str, Any]:
+    """Parse a content plan from model output that may wrap the JSON in extra text"""
+    # Sometimes OpenAI returns text before or after the JSON, so we need to extract just the JSON part
+    try:
+        # Try to parse the entire response as JSON
+        content_plan = json.loads(content_plan_text)
+        print("Successfully parsed JSON response")
+    except json.JSONDecodeError:
+        # If that fails, decode the JSON value starting at the first brace,
+        # which skips the surrounding text without copying the JSON out
+        print("Failed to parse entire response as JSON, trying to extract JSON part")
+        start = content_plan_text.find("{")
+        if start >= 0:
+            try:
+                content_plan, _ = json.JSONDecoder().raw_decode(content_plan_text, start)
+                print("Successfully extracted and parsed JSON part")
+            except json.JSONDecodeError:
+                print("Failed to parse extracted JSON part")
+                raise ValueError("Failed to parse OpenAI response as JSON")
+        else:
+            print("Failed to extract JSON part from response")
+            raise ValueError("Failed to extract JSON from OpenAI response")
+    
+    return content_plan
+
+async def generate_content_ideas(config: Dict[str, Any], use_cache: bool = True) -> ContentPlanRecord:
+    """
+    Generate content ideas, reusing cached plans and replacing repeated episodes
+
+    The plan comes back as a compact, already validated ContentPlanRecord,
+    which can also be read like a plan dict.
+    """
+    if SEMANTIC_CACHE_ENABLED:
+        exact_fields, fuzzy_fields = plan_cache_fields(config)
+    if SEMANTIC_CACHE_ENABLED and use_cache:
+        cached_plan = plan_cache.lookup(exact_fields, fuzzy_fields)
+        if cached_plan is not None:
+            return cached_plan
+    
+    content_plan = await _generate_content_ideas(config)
+    
+    if EPISODE_DEDUP_ENABLED:
+        await replace_duplicate_episodes(content_plan, config)
+    
+    if SEMANTIC_CACHE_ENABLED:
+        plan_cache.store(exact_fields, fuzzy_fields, content_plan)
+    
+    if ANALYTICS_EXPORT_ENABLED:
+        try:
+            export_content_plan(content_plan, config)
+        except Exception as e:
+            print(f"Failed to export content plan for analytics: {str(e)}")
+    return content_plan
+
+async def replace_duplicate_episodes(content_plan: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Regenerate episodes that repeat previously generated ones, then index the novel ones"""
+    episodes = content_plan.get("episodes", [])
+    
+    for attempt in range(EPISODE_DEDUP_MAX_RETRIES + 1):
+        # Replacements are checked again too, so the last round's are never indexed unchecked
+        matches = await episode_index.find_duplicates(episodes)
+        duplicates = [i for i, match in enumerate(matches) if match]
+        if not duplicates or attempt == EPISODE_DEDUP_MAX_RETRIES:
+            break
+        
+        print(f"Regenerating {len(duplicates)} duplicate episodes (attempt {attempt + 1})")
+        
+        # Ask for replacements in one request, steering away from both the
+        # earlier episodes they matched and the rest of this plan
+        avoid_titles = [matches[i]["title"] for i in duplicates]
+        avoid_titles += [episode.get("title", "") for episode in episodes]
+        retry_config = dict(
+            config,
+            num_episodes=len(duplicates),
+            avoid_episodes=list(dict.fromkeys(avoid_titles))[:MAX_AVOID_TITLES]
+        )
+        
+        try:
+            replacement_plan = await _generate_content_ideas(retry_config)
+        except Exception as e:
+            print(f"Failed to regenerate duplicate episodes: {str(e)}")
+            break
+        
+        for index, replacement in zip(duplicates, replacement_plan.get("episodes", [])):
+            episodes[index] = replacement
+    
+    if duplicates:
+        print(f"Keeping {len(duplicates)} episodes that still repeat earlier ones")
+    # Repeats are already represented in the index by the episodes they matched
+    await episode_index.add([episode for episode, match in zip(episodes, matches) if not match])
+    return content_plan
+
+async def _generate_content_ideas(config: Dict[str, Any]) -> ContentPlanRecord:
+    """Generate content ideas using OpenAI, Hugging Face or a local model"""
     
     # Determine which API to use
     api_provider = config.get("api_provider", "openai")
     
     if api_provider == "huggingface":
-        return await generate_content_ideas_hf(config)
+        return content_plan_record(await generate_content_ideas_hf(config))
+    elif api_provider == "local":
+        # Local models are served in-process through the shared text interface
+        system_prompt, user_prompt = build_content_plan_prompts(config)
+        content_plan_text = await generate_text(
+            prompt=user_prompt,
+            system_message=system_prompt,
+            api_provider="local",
+            temperature=0.7,
+            task="plan"
+        )
+        return decode_content_plan(content_plan_text)
     else:
         # Original OpenAI implementation
-        api_key = config.get("api_key") or os.environ.get("OPENAI_API_KEY")
+        context = current_context()
+        api_key = config.get("api_key") or context.key_for("openai") or os.environ.get("OPENAI_API_KEY")
         
         if not api_key:
             raise ValueError("OpenAI API key is required")
         
-        # Set the API key for this request
-        openai.api_key = api_key
-        
-        # Extract configuration
-        series_title = config.get('series_title', 'Mischievous Cat Shopper')
-        num_episodes = config.get('num_episodes', 5)
-        cat_name = config.get('cat_name', 'Whiskers')
-        content_style = config.get('content_style', 'humorous, family-friendly')
-        theme = config.get('theme', content_style)
-        setting = config.get('setting', '')
-        target_audience = config.get('target_audience', '')
-        additional_characters = config.get('additional_characters', '')
-        
-        print(f"Generating content ideas for '{series_title}' with {num_episodes} episodes")
-        
-        # Prepare the prompt for OpenAI
-        system_prompt = """You are a creative content planner for short-form video series.
-        Create a detailed content plan for a series about a mischievous cat who goes shopping."""
-        
-        user_prompt = f"""Create a content plan for a short-form video series titled "{series_title}" with {num_episodes} episodes.
-        
-        The main character is a cat named {cat_name} who loves to go shopping.
-        
-        The content style should be: {content_style}
-        
-        Additional details:
-        - Setting: {setting}
-        - Target audience: {target_audience}
-        - Additional characters: {additional_characters}
-        - Theme/mood: {theme}
+        print(f"Generating content ideas for '{config.get('series_title', 'Mischievous Cat Shopper')}' with {config.get('num_episodes', 5)} episodes")
         
-        For each episode, include:
-        1. A catchy title
-        2. A brief premise
-        3. The specific setting (what store or shopping location)
-        4. List of 2-3 items the cat is shopping for
-        5. A conflict that arises
-        6. How the conflict is resolved
+        system_prompt, user_prompt = build_content_plan_prompts(config)
         
-        Also include a section about the cat's personality with:
-        1. 3-5 personality traits
-        2. 2-3 quirky behaviors
-        3. 2-3 catchphrases or sounds the cat makes
+        # An explicit model or the GPT-4 flag pins the model, otherwise the router picks one
+        use_gpt4 = config.get("use_gpt4") or context.use_gpt4
+        pinned_model = context.model_for("openai") or ("gpt-4" if use_gpt4 else None)
         
-        Format the response as a JSON object with the following structure:
-        {{
-          "series_concept": "Brief overall concept",
-          "cat_personality": {{
-            "traits": ["trait1", "trait2", "etc"],
-            "quirks": ["quirk1", "quirk2", "etc"],
-            "catchphrases": ["phrase1", "phrase2", "etc"]
-          }},
-          "episodes": [
-            {{
-              "title": "Episode title",
-              "premise": "Brief premise",
-              "setting": "Specific store or location",
-              "items": ["item1", "item2", "etc"],
-              "conflict": "Description of conflict",
-              "resolution": "How conflict is resolved"
-            }}
-          ]
-        }}
-        
-        Ensure all content is family-friendly and appropriate for all audiences."""
-        
-        # Prepare the API request
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        payload = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.7
-        }
-        
-        print("Sending request to OpenAI API")
-        
-        try:
-            # Make the API request
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers=headers,
-                    json=payload
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"OpenAI API error: {response.status} - {error_text}")
-                        raise ValueError(f"OpenAI API returned error {response.status}: {error_text}")
-                    
-                    result = await response.json()
+        async def request_plan(model: str) -> str:
+            # Prepare the API request; the key goes out as the pooled client's Authorization header
+            payload = {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                "temperature": 0.7
+            }
             
-            print("Received response from OpenAI API")
+            print(f"Sending request to OpenAI API with model {model}")
             
-            # Extract and parse the content plan
-            content_plan_text = result["choices"][0]["message"]["content"]
+            async with client_pool.client(OPENAI_API_BASE, api_key) as client:
+                response = await client.post(OPENAI_API_URL, json=payload, timeout=120.0)
+                if response.status_code != 200:
+                    error_text = response.text
+                    print(f"OpenAI API error: {response.status_code} - {error_text}")
+                    raise ProviderError(f"OpenAI API returned error {response.status_code}: {error_text}", response.status_code)
+                
+                # Keep only the message text, not the whole response envelope
+                content = orjson.loads(response.content)["choices"][0]["message"]["content"]
             
-            # Sometimes OpenAI returns text before or after the JSON, so we need to extract just the JSON part
-            try:
-                # Try to parse the entire response as JSON
-                content_plan = json.loads(content_plan_text)
-                print("Successfully parsed JSON response")
-            except json.JSONDecodeError:
-                # If that fails, try to extract just the JSON part
-                import re
-                print("Failed to parse entire response as JSON, trying to extract JSON part")
-                json_match = re.search(r'({[\s\S]*})', content_plan_text)
-                if json_match:
-                    try:
-                        content_plan = json.loads(json_match.group(1))
-                        print("Successfully extracted and parsed JSON part")
-                    except json.JSONDecodeError:
-                        print("Failed to parse extracted JSON part")
-                        raise ValueError("Failed to parse OpenAI response as JSON")
-                else:
-                    print("Failed to extract JSON part from response")
-                    raise ValueError("Failed to extract JSON from OpenAI response")
+            print("Received response from OpenAI API")
+            return content
+        
+        try:
+            # Make the API request, falling back to other models on errors
+            content_plan_text = await model_router.run(
+                "plan",
+                "openai",
+                request_plan,
+                prompt=system_prompt + user_prompt,
+                pinned=pinned_model
+            )
             
-            return content_plan
+            # Decode the plan straight into records; the raw text is dropped on return
+            return decode_content_plan(content_plan_text)
         
-        except aiohttp.ClientError as e:
+        except ValidationError:
+            raise
+        except httpx.HTTPError as e:
             print(f"Network error when calling OpenAI API: {str(e)}")
             raise ValueError(f"Network error when calling OpenAI API: {str(e)}")
         except json.JSONDecodeError as e:
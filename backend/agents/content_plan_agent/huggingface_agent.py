@@ -4,6 +4,8 @@ import requests
 import asyncio
 from typing import Dict, Any, List
 
+from agents.model_router import ProviderError, model_router
+
 async def generate_with_huggingface(
     prompt: str, 
     api_key: str, 
@@ -26,17 +28,20 @@ async def generate_with_huggingface(
     
     # Convert to async request using asyncio
     loop = asyncio.get_event_loop()
-    response = await loop.run_in_executor(
-        None,
-        lambda: requests.post(url, headers=headers, json=payload)
-    )
+    try:
+        response = await loop.run_in_executor(
+            None,
+            lambda: requests.post(url, headers=headers, json=payload)
+        )
+    except requests.RequestException as e:
+        raise ProviderError(f"Hugging Face API request failed: {str(e)}")
     
     if response.status_code != 200:
         try:
             error_msg = response.json().get("error", "Unknown error")
         except:
             error_msg = f"HTTP error {response.status_code}"
-        raise ValueError(f"Hugging Face API error: {error_msg}")
+        raise ProviderError(f"Hugging Face API error: {error_msg}", response.status_code)
     
     return response.json()[0]["generated_text"]
 
@@ -52,6 +57,7 @@ async def generate_content_ideas_hf(config: Dict[str, Any]) -> Dict[str, Any]:
     target_audience = config.get("target_audience", "")
     additional_characters = config.get("additional_characters", "")
     api_key = config.get("api_key")
+    avoid_episodes = config.get("avoid_episodes") or []
     
     if not api_key:
         raise ValueError("Hugging Face API key is required")
@@ -108,15 +114,27 @@ async def generate_content_ideas_hf(config: Dict[str, Any]) -> Dict[str, Any]:
     
     Only return the JSON object, nothing else."""
     
+    if avoid_episodes:
+        prompt += f"""
+    
+    Do not repeat or closely resemble these existing episodes: {'; '.join(avoid_episodes)}"""
+    
     try:
         print("Sending request to Hugging Face API")
         
-        # Generate the content plan
-        response_text = await generate_with_huggingface(
+        # Generate the content plan with the model the router picks
+        response_text = await model_router.run(
+            "plan",
+            "huggingface",
+            lambda model: generate_with_huggingface(
+                prompt=prompt,
+                api_key=api_key,
+                model=model,
+                max_new_tokens=2048,
+                temperature=0.7
+            ),
             prompt=prompt,
-            api_key=api_key,
-            max_new_tokens=2048,
-            temperature=0.7
+            pinned=os.getenv("HUGGINGFACE_MODEL") or None
         )
         
         print("Received response from Hugging Face API")
@@ -0,0 +1,232 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import asyncio
+import logging
+import textwrap
+import httpx
+from functools import partial
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+from PIL import Image, ImageDraw
+
+from models.schemas import VisualPrompt
+from utils.helpers import update_job_progress, update_job_status
+from utils.artifact_store import run_io
+from utils.checkpoints import Checkpoint, inputs_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Image generation configuration
+HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN", "")
+HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/"
+HUGGINGFACE_IMAGE_MODEL = os.getenv("HUGGINGFACE_IMAGE_MODEL", "stabilityai/stable-diffusion-xl-base-1.0")
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "3"))
+IMAGE_SIZE = (1024, 576)
+THUMBNAIL_SIZE = (320, 180)
+
+IMAGE_OUTPUT_DIR = "./outputs/images"
+IMAGE_CACHE_DIR = os.path.join(IMAGE_OUTPUT_DIR, "cache")
+
+SUPPORTED_PROVIDERS = ("huggingface", "local")
+
+# Shared process pool for thumbnailing, created on first use
+_thumbnail_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_thumbnail_executor() -> ProcessPoolExecutor:
+    global _thumbnail_executor
+    if _thumbnail_executor is None:
+        _thumbnail_executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+    return _thumbnail_executor
+
+def image_model(provider: str) -> str:
+    """The model a provider renders with"""
+    return HUGGINGFACE_IMAGE_MODEL if provider == "huggingface" else provider
+
+def render_cache_key(prompt: VisualPrompt, seed: int, provider: str) -> str:
+    """Hash of everything that affects a render: the prompt text sent, the seed and the model"""
+    payload = json.dumps(
+        {"prompt": build_image_prompt(prompt), "seed": seed, "provider": provider, "model": image_model(provider)},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_image_prompt(prompt: VisualPrompt) -> str:
+    return f"{prompt.stable_diffusion_prompt}, {prompt.style}, {prompt.shot_type}"
+
+async def render_huggingface(
+    client: httpx.AsyncClient,
+    prompt: VisualPrompt,
+    seed: int,
+    api_token: Optional[str] = None
+) -> bytes:
+    """Render one scene with a Hugging Face text-to-image model and return image bytes"""
+    api_token = api_token or HUGGINGFACE_API_TOKEN
+
+    if not api_token:
+        logger.error("Hugging Face API token is not provided")
+        raise ValueError("Hugging Face API token is not provided")
+
+    response = await client.post(
+        f"{HUGGINGFACE_API_URL}{HUGGINGFACE_IMAGE_MODEL}",
+        headers={"Authorization": f"Bearer {api_token}"},
+        json={
+            "inputs": build_image_prompt(prompt),
+            "parameters": {"seed": seed, "width": IMAGE_SIZE[0], "height": IMAGE_SIZE[1]}
+        },
+        timeout=120.0
+    )
+    response.raise_for_status()
+    return response.content
+
+def render_local(prompt: VisualPrompt, seed: int, output_path: str):
+    """
+    Local stand-in renderer, used for tests and offline runs
+
+    Draws a deterministic gradient (colored from the prompt, style and seed)
+    with the prompt text on it.
+    """
+    digest = hashlib.sha256(f"{prompt.stable_diffusion_prompt}|{prompt.style}|{seed}".encode("utf-8")).digest()
+    top, bottom = digest[:3], digest[3:6]
+
+    image = Image.new("RGB", IMAGE_SIZE)
+    draw = ImageDraw.Draw(image)
+    for y in range(IMAGE_SIZE[1]):
+        ratio = y / IMAGE_SIZE[1]
+        color = tuple(int(top[i] * (1 - ratio) + bottom[i] * ratio) for i in range(3))
+        draw.line([(0, y), (IMAGE_SIZE[0], y)], fill=color)
+
+    text = "\n".join(textwrap.wrap(build_image_prompt(prompt), width=80))
+    draw.multiline_text((24, 24), text, fill=(255, 255, 255))
+    image.save(output_path, "PNG")
+
+def make_thumbnail(source_path: str, thumbnail_path: str, size=THUMBNAIL_SIZE):
+    """Write a downscaled copy of an image (runs in the thumbnail process pool)"""
+    with Image.open(source_path) as image:
+        image.thumbnail(size)
+        image.save(thumbnail_path, "PNG")
+
+async def generate_images(
+    scenes: List[VisualPrompt],
+    episode_id: str,
+    provider: str = "huggingface",
+    seed: int = 42,
+    api_key: Optional[str] = None,
+    job_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Render every scene of an episode from its visual prompt
+
+    Scenes render concurrently, at most IMAGE_CONCURRENCY at a time against the
+    provider. Renders are cached by the full prompt, seed and model, so scenes shared
+    between episodes or re-runs are only rendered once, and identical scenes in
+    one episode share a single render. Thumbnails are made in a
+    process pool, and images, thumbnails and a manifest.json are written to
+    outputs/images/<episode_id>/. The manifest is checkpointed after every
+    scene, so a re-run with the same scenes skips the ones already written.
+    """
+    if provider not in SUPPORTED_PROVIDERS:
+        raise ValueError(f"Unsupported image provider: {provider}")
+    if not scenes:
+        raise ValueError("No scenes to render")
+
+    logger.info(f"Generating {len(scenes)} images for {episode_id} with {provider}")
+    if job_id:
+        update_job_status(job_id, "processing")
+
+    episode_dir = os.path.join(IMAGE_OUTPUT_DIR, episode_id)
+    thumbnail_dir = os.path.join(episode_dir, "thumbnails")
+    await run_io(partial(os.makedirs, IMAGE_CACHE_DIR, exist_ok=True))
+    await run_io(partial(os.makedirs, thumbnail_dir, exist_ok=True))
+
+    checkpoint = Checkpoint(
+        os.path.join(episode_dir, "manifest.json"),
+        "scenes",
+        "scene",
+        inputs_fingerprint(provider, image_model(provider), seed, [scene.model_dump() for scene in scenes]),
+        len(scenes),
+        header={"episode_id": episode_id, "provider": provider},
+        job_id=job_id
+    )
+    await checkpoint.load()
+    await checkpoint.save()
+
+    semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    executor = _get_thumbnail_executor()
+    finished = 0
+    # Renders in flight by cache key, so identical scenes wait on the same one
+    renders: Dict[str, asyncio.Task] = {}
+
+    async with httpx.AsyncClient() as client:
+        async def render_to_cache(prompt: VisualPrompt, cache_path: str):
+            # Render to a temporary file, then rename so the cache never holds partial images
+            tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+            async with semaphore:
+                if provider == "huggingface":
+                    image_bytes = await render_huggingface(client, prompt, seed, api_key)
+                    await run_io(Path(tmp_path).write_bytes, image_bytes)
+                else:
+                    await loop.run_in_executor(None, render_local, prompt, seed, tmp_path)
+            await run_io(os.replace, tmp_path, cache_path)
+
+        async def render_scene(index: int, prompt: VisualPrompt) -> Dict[str, Any]:
+            nonlocal finished
+            key = render_cache_key(prompt, seed, provider)
+            done = checkpoint.completed(index)
+            if (
+                done is not None and done["cache_key"] == key
+                and await run_io(os.path.exists, done["path"]) and await run_io(os.path.exists, done["thumbnail_path"])
+            ):
+                finished += 1
+                return done
+
+            cache_path = os.path.join(IMAGE_CACHE_DIR, f"{key}.png")
+            cached = await run_io(os.path.exists, cache_path)
+
+            if not cached:
+                # A scene that joins another's render counts as served from the cache
+                cached = key in renders
+                if not cached:
+                    renders[key] = asyncio.create_task(render_to_cache(prompt, cache_path))
+                await renders[key]
+
+            image_path = os.path.join(episode_dir, f"scene_{index}.png")
+            thumbnail_path = os.path.join(thumbnail_dir, f"scene_{index}.png")
+            await run_io(shutil.copyfile, cache_path, image_path)
+            await loop.run_in_executor(executor, make_thumbnail, image_path, thumbnail_path)
+
+            finished += 1
+            if job_id:
+                update_job_progress(job_id, int(finished / len(scenes) * 95))
+
+            result = {
+                "scene": index,
+                "description": prompt.description,
+                "prompt": prompt.stable_diffusion_prompt,
+                "style": prompt.style,
+                "shot_type": prompt.shot_type,
+                "seed": seed,
+                "cache_key": key,
+                "cached": cached,
+                "path": image_path,
+                "thumbnail_path": thumbnail_path
+            }
+            await checkpoint.record(index, result)
+            return result
+
+        results = await asyncio.gather(*[
+            render_scene(index, prompt) for index, prompt in enumerate(scenes, start=1)
+        ])
+
+    manifest = await checkpoint.finish(cached_scenes=sum(1 for result in results if result["cached"]))
+    manifest_path = checkpoint.path
+
+    logger.info(f"Images for {episode_id} done ({manifest['cached_scenes']}/{len(scenes)} from cache)")
+    if job_id:
+        update_job_progress(job_id, 100)
+        update_job_status(job_id, "completed", manifest_path)
+    return manifest
@@ -0,0 +1,166 @@
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional, AsyncIterator
+
+try:
+    from llama_cpp import Llama
+except ImportError:  # llama-cpp-python is optional
+    Llama = None
+
+from agents.local_scheduler import LocalScheduler
+
+logger = logging.getLogger(__name__)
+
+# Local model configuration
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "")
+LOCAL_MODEL_POOL_SIZE = int(os.getenv("LOCAL_MODEL_POOL_SIZE", "1"))
+LOCAL_MODEL_THREADS = int(os.getenv("LOCAL_MODEL_THREADS", str(os.cpu_count() or 1)))
+LOCAL_MODEL_CONTEXT = int(os.getenv("LOCAL_MODEL_CONTEXT", "4096"))
+
+# Loaded pools, keyed by model path, kept for the lifetime of the process
+_pools: Dict[str, "LocalModelPool"] = {}
+_pools_lock = asyncio.Lock()
+
+def _build_messages(prompt: str, system_message: str = "") -> List[Dict[str, str]]:
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+class LocalModelPool:
+    """A fixed set of loaded model instances shared by all concurrent callers"""
+
+    def __init__(self, model_path: str, size: int = 1, n_threads: int = 1, n_ctx: int = 4096):
+        self.model_path = model_path
+        self.size = max(1, size)
+        # Split the available threads between the instances
+        self.n_threads = max(1, n_threads // self.size)
+        self.n_ctx = n_ctx
+        self._instances = []
+        self._scheduler: Optional[LocalScheduler] = None
+
+    def _load_instance(self):
+        return Llama(
+            model_path=self.model_path,
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            verbose=False
+        )
+
+    async def start(self):
+        """Load all model instances and start the scheduler"""
+        if Llama is None:
+            raise ValueError("Local provider requires llama-cpp-python to be installed")
+        if not os.path.exists(self.model_path):
+            raise ValueError(f"Local model not found: {self.model_path}")
+
+        logger.info(f"Loading {self.size} instance(s) of local model {self.model_path}")
+        loop = asyncio.get_running_loop()
+        self._instances = await asyncio.gather(*[
+            loop.run_in_executor(None, self._load_instance) for _ in range(self.size)
+        ])
+
+        self._scheduler = LocalScheduler(self._instances)
+        self._scheduler.start()
+
+    def stop(self):
+        """Stop the scheduler, waiting for its workers, and release the model instances"""
+        if self._scheduler:
+            self._scheduler.stop()
+            self._scheduler = None
+        self._instances = []
+
+    def stream(
+        self,
+        prompt: str,
+        system_message: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ) -> AsyncIterator[str]:
+        """Queue a chat completion and stream its tokens back"""
+        request = {
+            "messages": _build_messages(prompt, system_message),
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        return self._scheduler.stream(request)
+
+    async def generate(
+        self,
+        prompt: str,
+        system_message: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ) -> str:
+        """Queue a chat completion and wait for its full result"""
+        tokens = []
+        async for token in self.stream(prompt, system_message, temperature, max_tokens):
+            tokens.append(token)
+        return "".join(tokens)
+
+async def get_model_pool(model_path: Optional[str] = None) -> LocalModelPool:
+    """Return the loaded pool for a model, loading it on first use"""
+    model_path = model_path or LOCAL_MODEL_PATH
+
+    if not model_path:
+        logger.error("Local model path is not configured")
+        raise ValueError("Local model path is not configured (set LOCAL_MODEL_PATH)")
+
+    async with _pools_lock:
+        if model_path not in _pools:
+            pool = LocalModelPool(
+                model_path,
+                size=LOCAL_MODEL_POOL_SIZE,
+                n_threads=LOCAL_MODEL_THREADS,
+                n_ctx=LOCAL_MODEL_CONTEXT
+            )
+            await pool.start()
+            _pools[model_path] = pool
+    return _pools[model_path]
+
+async def call_local_model(
+    prompt: str,
+    system_message: str = "",
+    model_path: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 2000
+) -> str:
+    """Generate text with a locally loaded model"""
+    pool = await get_model_pool(model_path)
+    logger.info(f"Generating with local model: {pool.model_path}")
+    return await pool.generate(prompt, system_message, temperature, max_tokens)
+
+async def stream_local_model(
+    prompt: str,
+    system_message: str = "",
+    model_path: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 2000
+) -> AsyncIterator[str]:
+    """Stream tokens from a locally loaded model as they are generated"""
+    pool = await get_model_pool(model_path)
+    logger.info(f"Streaming from local model: {pool.model_path}")
+    async for token in pool.stream(prompt, system_message, temperature, max_tokens):
+        yield token
+
+async def close_local_models():
+    """Stop the schedulers of all loaded models"""
+    async with _pools_lock:
+        for pool in _pools.values():
+            # Waits for generations in progress, so it runs off the event loop
+            await asyncio.to_thread(pool.stop)
+        _pools.clear()
+
+async def warm_up_local_model():
+    """Load the default local model and run a tiny generation so the first request is fast"""
+    if not LOCAL_MODEL_PATH:
+        return
+
+    try:
+        pool = await get_model_pool()
+        await pool.generate("Say hello.", max_tokens=1)
+        logger.info("Local model warmed up")
+    except Exception as e:
+        logger.error(f"Failed to warm up local model: {str(e)}")
@@ -0,0 +1,148 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import itertools
+import threading
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# Scheduler configuration
+LOCAL_PIN_THREADS = os.getenv("LOCAL_PIN_THREADS", "true").lower() == "true"
+# Generation speed assumed when ordering waiting requests by expected finish time
+LOCAL_TOKENS_PER_SECOND = float(os.getenv("LOCAL_TOKENS_PER_SECOND", "20"))
+
+# Marks the end of a token stream
+_END_OF_STREAM = object()
+
+class GenerationRequest:
+    """A single queued generation and the channel its tokens are streamed back on"""
+
+    def __init__(self, request: Dict[str, Any], loop: asyncio.AbstractEventLoop):
+        self.request = request
+        self.loop = loop
+        self.tokens: asyncio.Queue = asyncio.Queue()
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+    def push(self, item):
+        # Called from worker threads
+        self.loop.call_soon_threadsafe(self.tokens.put_nowait, item)
+
+def assign_cores(num_workers: int) -> List[Optional[List[int]]]:
+    """Split the cores this process may run on evenly between workers"""
+    if not LOCAL_PIN_THREADS or not hasattr(os, "sched_getaffinity"):
+        return [None] * num_workers
+
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) < num_workers:
+        return [None] * num_workers
+
+    per_worker = len(cores) // num_workers
+    return [cores[i * per_worker:(i + 1) * per_worker] for i in range(num_workers)]
+
+class LocalScheduler:
+    """
+    Runs queued generation requests on a set of model instances, one pinned
+    worker thread per instance
+
+    Each instance decodes one request at a time (llama.cpp's high-level API
+    has no batched decode), so concurrency comes from the number of instances.
+    A request starts as soon as a worker is free. While requests wait, the one
+    expected to finish first goes next: its arrival time plus max_tokens at
+    tokens_per_second. Short generations (titles, hashtags) are not stuck
+    behind full scripts, and long ones still move up as they wait.
+    """
+
+    def __init__(self, instances: List[Any], tokens_per_second: float = LOCAL_TOKENS_PER_SECOND):
+        self.instances = instances
+        self.tokens_per_second = tokens_per_second
+        self._ready: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._stopped = False
+
+    def start(self):
+        """Start one worker thread per model instance"""
+        for index, (instance, cores) in enumerate(zip(self.instances, assign_cores(len(self.instances)))):
+            worker = threading.Thread(
+                target=self._worker,
+                args=(instance, cores),
+                name=f"local-model-{index}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        logger.info(f"Started local model scheduler with {len(self._workers)} workers")
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Fail requests still waiting, then stop the workers once their current
+        generation ends and wait for them to exit
+        """
+        self._stopped = True
+        # Drained before the stop markers go in, so every worker receives one
+        while True:
+            try:
+                _, _, item = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.push(RuntimeError("Local model scheduler stopped"))
+
+        for _ in self._workers:
+            # Sorts ahead of every waiting request
+            self._ready.put((float("-inf"), next(self._seq), None))
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                logger.warning(f"Local model worker {worker.name} did not stop within {timeout}s")
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+
+    def _priority(self, item: GenerationRequest) -> float:
+        return item.enqueued_at + item.request.get("max_tokens", 0) / self.tokens_per_second
+
+    def _worker(self, instance, cores: Optional[List[int]]):
+        if cores:
+            # On Linux a pid of 0 applies to the calling thread only
+            os.sched_setaffinity(0, cores)
+
+        while True:
+            _, _, item = self._ready.get()
+            if item is None:
+                return
+            if item.cancelled:
+                continue
+
+            try:
+                for chunk in instance.create_chat_completion(stream=True, **item.request):
+                    if item.cancelled:
+                        break
+                    token = chunk["choices"][0]["delta"].get("content")
+                    if token:
+                        item.push(token)
+                item.push(_END_OF_STREAM)
+            except Exception as e:
+                item.push(e)
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[str]:
+        """Queue a chat completion and yield its tokens as they are generated"""
+        if self._stopped:
+            raise RuntimeError("Local model scheduler stopped")
+        item = GenerationRequest(request, asyncio.get_running_loop())
+        self._ready.put((self._priority(item), next(self._seq), item))
+
+        try:
+            while True:
+                token = await item.tokens.get()
+                if token is _END_OF_STREAM:
+                    return
+                if isinstance(token, Exception):
+                    raise token
+                yield token
+        finally:
+            # Lets the worker skip or abandon requests whose caller went away
+            item.cancelled = True
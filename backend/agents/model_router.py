@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Model router configuration
+MODEL_ROUTER_ENABLED = os.getenv("MODEL_ROUTER_ENABLED", "true").lower() == "true"
+MODEL_CATALOG_PATH = os.getenv("MODEL_CATALOG_PATH", "")
+ROUTER_MAX_ATTEMPTS = int(os.getenv("ROUTER_MAX_ATTEMPTS", "3"))
+ROUTER_DECISION_LOG_SIZE = int(os.getenv("ROUTER_DECISION_LOG_SIZE", "500"))
+
+# Weight of each new observation in the moving averages
+STATS_ALPHA = 0.2
+# A model whose error rate is above this is skipped for BREAKER_COOLDOWN seconds
+BREAKER_ERROR_RATE = 0.5
+BREAKER_MIN_CALLS = 3
+BREAKER_COOLDOWN = 60
+# Seconds for a model's error rate to halve without new calls, so models that
+# failed once are tried again later
+ERROR_HALF_LIFE = 300
+
+@dataclass
+class ModelSpec:
+    """A model the router may pick, with its price and expected speed"""
+    provider: str
+    model: str
+    input_cost: float = 0.0  # USD per 1k prompt tokens
+    output_cost: float = 0.0  # USD per 1k completion tokens
+    tier: int = 1  # 1 basic, 2 good, 3 best
+    latency: float = 5.0  # Expected seconds per call until measured
+
+DEFAULT_CATALOG = [
+    ModelSpec("openai", "gpt-4o-mini", 0.00015, 0.0006, tier=2, latency=4.0),
+    ModelSpec("openai", "gpt-3.5-turbo", 0.0005, 0.0015, tier=1, latency=4.0),
+    ModelSpec("openai", "gpt-4o", 0.0025, 0.01, tier=3, latency=8.0),
+    ModelSpec("openai", "gpt-4", 0.03, 0.06, tier=3, latency=15.0),
+    ModelSpec("huggingface", "mistralai/Mistral-7B-Instruct-v0.2", tier=1, latency=10.0),
+    ModelSpec("huggingface", "HuggingFaceH4/zephyr-7b-beta", tier=1, latency=10.0),
+]
+
+# How each task trades cost against speed, the lowest acceptable tier and an
+# optional A/B split: {"model": "<name>", "share": 0.1}
+DEFAULT_TASK_POLICIES = {
+    "plan": {"min_tier": 1, "cost_weight": 1.0, "latency_weight": 0.1, "expected_tokens": 2500},
+    "script": {"min_tier": 1, "cost_weight": 1.0, "latency_weight": 0.1, "expected_tokens": 1200},
+    # Speculative scripts: a cheap, fast draft, then a strong model only for drafts that fail validation
+    "script_draft": {"min_tier": 1, "cost_weight": 3.0, "latency_weight": 1.0, "expected_tokens": 1200},
+    "script_upgrade": {"min_tier": 3, "cost_weight": 0.2, "latency_weight": 0.1, "expected_tokens": 1200},
+    "social": {"min_tier": 1, "cost_weight": 2.0, "latency_weight": 0.5, "expected_tokens": 600},
+    "visual_prompts": {"min_tier": 1, "cost_weight": 2.0, "latency_weight": 0.5, "expected_tokens": 600},
+    "default": {"min_tier": 1, "cost_weight": 1.0, "latency_weight": 0.2, "expected_tokens": 1000},
+}
+
+# Models used when routing is turned off, as before the router existed
+DEFAULT_MODELS = {
+    "openai": "gpt-3.5-turbo",
+    "huggingface": "mistralai/Mistral-7B-Instruct-v0.2",
+}
+
+# Score added per unit of error rate, so failing models lose to slower ones
+ERROR_WEIGHT = 10.0
+
+class ProviderError(ValueError):
+    """A provider call that failed; status_code is None when no response arrived"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether another model could succeed where this call failed
+
+    Rate limits, server errors, timeouts and network errors are about the
+    model or provider at that moment. Other 4xx responses and missing or bad
+    credentials would fail the same way on every model.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    elif isinstance(error, ProviderError):
+        status = error.status_code
+        if status is None:
+            return True
+    else:
+        return isinstance(error, (httpx.RequestError, asyncio.TimeoutError))
+    return status in (408, 429) or status >= 500
+
+class ModelStats:
+    """Moving averages of one model's latency, error rate and cost"""
+
+    def __init__(self, spec: ModelSpec):
+        self.latency = spec.latency
+        self.error_rate = 0.0
+        self.cost = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.last_error_at = 0.0
+        self.updated_at = time.monotonic()
+
+    def observe(self, latency: float, ok: bool, cost: float = 0.0):
+        self.calls += 1
+        error_rate = self.current_error_rate()
+        self.error_rate = error_rate + STATS_ALPHA * ((0.0 if ok else 1.0) - error_rate)
+        self.updated_at = time.monotonic()
+        if ok:
+            # Failed calls often end early, so only successes count towards latency
+            self.latency += STATS_ALPHA * (latency - self.latency)
+            self.cost = cost if self.calls == 1 else self.cost + STATS_ALPHA * (cost - self.cost)
+        else:
+            self.errors += 1
+            self.last_error_at = time.monotonic()
+
+    def current_error_rate(self) -> float:
+        return self.error_rate * 0.5 ** ((time.monotonic() - self.updated_at) / ERROR_HALF_LIFE)
+
+    def tripped(self) -> bool:
+        return (
+            self.calls >= BREAKER_MIN_CALLS
+            and self.current_error_rate() > BREAKER_ERROR_RATE
+            and time.monotonic() - self.last_error_at < BREAKER_COOLDOWN
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": round(self.latency, 3),
+            "error_rate": round(self.current_error_rate(), 3),
+            "cost": round(self.cost, 6),
+            "calls": self.calls,
+            "errors": self.errors,
+            "tripped": self.tripped()
+        }
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return len(text) // 4
+
+class ModelRouter:
+    """
+    Picks the model for each call from a catalog
+
+    Candidates for a task are the provider's models at or above the task's
+    tier, ranked by expected cost, measured latency and error rate. Calls fall
+    back down the ranking when a model is overloaded or unreachable, and every
+    decision is kept in a bounded log.
+    """
+
+    def __init__(self, catalog: List[ModelSpec], policies: Dict[str, Dict[str, Any]]):
+        self.catalog = catalog
+        self.policies = policies
+        self.stats: Dict[str, ModelStats] = {}
+        self.decisions = deque(maxlen=ROUTER_DECISION_LOG_SIZE)
+
+    def _key(self, spec: ModelSpec) -> str:
+        return f"{spec.provider}:{spec.model}"
+
+    def _stats(self, spec: ModelSpec) -> ModelStats:
+        key = self._key(spec)
+        if key not in self.stats:
+            self.stats[key] = ModelStats(spec)
+        return self.stats[key]
+
+    def _spec(self, provider: str, model: str) -> ModelSpec:
+        for spec in self.catalog:
+            if spec.provider == provider and spec.model == model:
+                return spec
+        return ModelSpec(provider, model)
+
+    def policy(self, task: str) -> Dict[str, Any]:
+        return {**self.policies["default"], **self.policies.get(task, {})}
+
+    def score(self, spec: ModelSpec, task: str) -> float:
+        """Lower is better: expected cents per call, seconds and error rate, weighted per task"""
+        policy = self.policy(task)
+        stats = self._stats(spec)
+        tokens = policy["expected_tokens"]
+        cents = (spec.input_cost * tokens + spec.output_cost * tokens) / 1000 * 100
+        return (
+            policy["cost_weight"] * cents
+            + policy["latency_weight"] * stats.latency
+            + ERROR_WEIGHT * stats.current_error_rate()
+        )
+
+    def rank(self, task: str, provider: str) -> Tuple[List[ModelSpec], bool]:
+        """
+        Candidate models for a task, best first, with the A/B split applied
+
+        Also returns whether the experiment model was moved to the front.
+        """
+        policy = self.policy(task)
+        candidates = [
+            spec for spec in self.catalog
+            if spec.provider == provider and spec.tier >= policy["min_tier"]
+        ]
+        candidates.sort(key=lambda spec: self.score(spec, task))
+
+        # Models with an open breaker go last rather than disappearing
+        candidates.sort(key=lambda spec: self._stats(spec).tripped())
+
+        experiment = policy.get("experiment")
+        if experiment and random.random() < experiment.get("share", 0.0):
+            for index, spec in enumerate(candidates):
+                if spec.model == experiment["model"] and not self._stats(spec).tripped():
+                    candidates.insert(0, candidates.pop(index))
+                    return candidates, True
+        return candidates, False
+
+    def expected_latency(self, task: str, provider: str) -> float:
+        """Measured seconds per call of the model the router would try first for a task"""
+        ranked, _ = self.rank(task, provider)
+        return self._stats(ranked[0]).latency if ranked else 0.0
+
+    async def run(
+        self,
+        task: str,
+        provider: str,
+        call: Callable[[str], Awaitable[str]],
+        prompt: str = "",
+        pinned: Optional[str] = None
+    ) -> str:
+        """
+        Await call(model) with the best model for the task, falling back on errors
+
+        Only retryable errors (see is_retryable) move on to the next model and
+        count towards its error rate; anything else is raised straight away. A
+        pinned model is used on its own without fallback, but its latency,
+        errors and cost are still recorded.
+        """
+        if not pinned and not MODEL_ROUTER_ENABLED:
+            pinned = DEFAULT_MODELS.get(provider)
+        if pinned:
+            specs, reason = [self._spec(provider, pinned)], "pinned"
+        else:
+            ranked, in_experiment = self.rank(task, provider)
+            specs = ranked[:ROUTER_MAX_ATTEMPTS]
+            reason = "experiment" if in_experiment else "ranked"
+        if not specs:
+            raise ValueError(f"No {provider} models configured for task {task}")
+
+        decision = {
+            "time": time.time(),
+            "task": task,
+            "provider": provider,
+            "reason": reason,
+            "candidates": [spec.model for spec in specs],
+            "attempts": []
+        }
+        self.decisions.append(decision)
+
+        last_error = None
+        for spec in specs:
+            stats = self._stats(spec)
+            started = time.monotonic()
+            try:
+                text = await call(spec.model)
+            except Exception as e:
+                latency = time.monotonic() - started
+                decision["attempts"].append({"model": spec.model, "ok": False, "latency": round(latency, 3), "error": str(e)[:200]})
+                if not is_retryable(e):
+                    # Not the model's fault, so it neither counts against it nor moves on
+                    raise
+                stats.observe(latency, ok=False)
+                logger.warning(f"{provider} model {spec.model} failed for {task}: {str(e)}")
+                last_error = e
+                continue
+
+            latency = time.monotonic() - started
+            cost = (spec.input_cost * estimate_tokens(prompt) + spec.output_cost * estimate_tokens(text or "")) / 1000
+            stats.observe(latency, ok=True, cost=cost)
+            decision["attempts"].append({"model": spec.model, "ok": True, "latency": round(latency, 3), "cost": round(cost, 6)})
+            decision["model"] = spec.model
+            return text
+
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Catalog, policies and live statistics, for the routing API"""
+        return {
+            "enabled": MODEL_ROUTER_ENABLED,
+            "models": [
+                dict(asdict(spec), stats=self._stats(spec).to_dict())
+                for spec in self.catalog
+            ],
+            "tasks": {task: self.policy(task) for task in self.policies}
+        }
+
+def load_router(path: str = MODEL_CATALOG_PATH) -> ModelRouter:
+    """
+    Build the router from the defaults, overridden by a JSON catalog file
+
+    The file may contain "models" (a list of ModelSpec fields, replacing the
+    default catalog) and "tasks" (policies merged over the defaults).
+    """
+    catalog = list(DEFAULT_CATALOG)
+    policies = {task: dict(policy) for task, policy in DEFAULT_TASK_POLICIES.items()}
+    if path:
+        with open(path, "r") as f:
+            config = json.load(f)
+        if "models" in config:
+            catalog = [ModelSpec(**model) for model in config["models"]]
+        for task, policy in config.get("tasks", {}).items():
+            policies[task] = {**policies.get(task, {}), **policy}
+        logger.info(f"Loaded model catalog from {path}: {len(catalog)} models")
+    return ModelRouter(catalog, policies)
+
+# Shared router for all text generation
+model_router = load_router()
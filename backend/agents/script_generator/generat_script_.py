@@ -1,20 +1,111 @@
 import os
+import time
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from agents.api_client import generate_text
+from agents.model_router import model_router
+from utils.request_context import current_context
+from utils.profiler import profiled
+from utils.script_parser import parse_script
+from utils.semantic_cache import SEMANTIC_CACHE_ENABLED, script_cache, script_cache_fields
 
 logger = logging.getLogger(__name__)
 
-async def generate_script(
+# Speculative script configuration
+SCRIPT_SPECULATIVE_ENABLED = os.getenv("SCRIPT_SPECULATIVE_ENABLED", "false").lower() == "true"
+SCRIPT_MIN_SCENES = 6
+SCRIPT_MAX_SCENES = 8
+SCRIPT_TARGET_SECONDS = 60
+SCRIPT_DURATION_TOLERANCE = int(os.getenv("SCRIPT_DURATION_TOLERANCE", "2"))
+
+@profiled("script.validate")
+def validate_script(script: str, cat_name: str = "Whiskers", catchphrases: Optional[List[str]] = None) -> List[str]:
+    """
+    Check a script against the brief and return what is wrong with it
+
+    Uses the parsed structure: 6-8 numbered scenes, timestamps adding up to
+    60 seconds, and the cat saying a catchphrase (any line of the cat's when no
+    catchphrases are given). An empty list means the script passes.
+    """
+    parsed = parse_script(script or "")
+    scenes = [scene for scene in parsed.scenes if scene.number > 0]
+    problems = []
+
+    if not SCRIPT_MIN_SCENES <= len(scenes) <= SCRIPT_MAX_SCENES:
+        problems.append(f"{len(scenes)} scenes instead of {SCRIPT_MIN_SCENES}-{SCRIPT_MAX_SCENES}")
+
+    durations = [scene.duration for scene in scenes]
+    if not scenes or any(duration is None for duration in durations):
+        problems.append("scene timestamps missing")
+    elif abs(sum(durations) - SCRIPT_TARGET_SECONDS) > SCRIPT_DURATION_TOLERANCE:
+        problems.append(f"runtime {sum(durations)}s instead of {SCRIPT_TARGET_SECONDS}s")
+
+    cat_lines = parsed.dialogue_by_speaker.get(cat_name.upper(), [])
+    if catchphrases:
+        spoken = " ".join(cat_lines).lower()
+        if not any(phrase.lower().strip(" \"'!.") in spoken for phrase in catchphrases):
+            problems.append("no catchphrase from the cat")
+    elif not cat_lines:
+        problems.append(f"{cat_name} has no lines")
+
+    return problems
+
+def plan_catchphrases(plan: Dict[str, Any]) -> Optional[List[str]]:
+    """The cat's catchphrases from a content plan's cat_personality, if it has any"""
+    phrases = (plan.get("cat_personality") or {}).get("catchphrases")
+    if not isinstance(phrases, list):
+        return None
+    return [phrase for phrase in phrases if isinstance(phrase, str) and phrase.strip()] or None
+
+class SpeculativeStats:
+    """Counts of speculative drafts kept and upgraded, with their latencies"""
+
+    def __init__(self):
+        self.drafts = 0
+        self.upgrades = 0
+        self.draft_seconds = 0.0
+        self.upgrade_seconds = 0.0
+        self.failures: Dict[str, int] = {}
+
+    def record(self, draft_seconds: float, problems: List[str], upgrade_seconds: Optional[float] = None):
+        self.drafts += 1
+        self.draft_seconds += draft_seconds
+        if upgrade_seconds is not None:
+            self.upgrades += 1
+            self.upgrade_seconds += upgrade_seconds
+        for problem in problems:
+            # Group "5 scenes instead of 6-8" and "7 scenes ..." under one reason
+            reason = problem.split(" ", 1)[1] if problem[:1].isdigit() else problem
+            self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        average_draft = self.draft_seconds / self.drafts if self.drafts else 0.0
+        if self.upgrades:
+            average_upgrade = self.upgrade_seconds / self.upgrades
+        else:
+            # Nothing upgraded yet, so use the router's latency estimate for the strong model
+            average_upgrade = model_router.expected_latency("script_upgrade", "openai")
+        kept = self.drafts - self.upgrades
+        return {
+            "drafts": self.drafts,
+            "upgraded": self.upgrades,
+            "upgrade_fraction": round(self.upgrades / self.drafts, 3) if self.drafts else 0.0,
+            "average_draft_seconds": round(average_draft, 3),
+            "average_upgrade_seconds": round(average_upgrade, 3),
+            # Kept drafts skipped the strong model; upgraded ones paid for the draft on top
+            "estimated_seconds_saved": round(kept * (average_upgrade - average_draft) - self.upgrades * average_draft, 3),
+            "failures": dict(self.failures)
+        }
+
+speculative_stats = SpeculativeStats()
+
+@profiled("script.build_prompts")
+def build_script_prompts(
     episode_idea: Dict[str, Any],
     cat_name: str = "Whiskers",
-    content_style: str = "",
-    api_provider: str = "openai",
-    api_key: str = None
-) -> str:
-    """Generate a script for an episode using specified API provider or fallback method"""
-    logger.info(f"Generating script for episode: {episode_idea.get('title', 'Unknown')}")
-    
+    content_style: str = ""
+) -> Tuple[str, str]:
+    """Build the system and user prompts for an episode script"""
     # Create prompt for script generation
     system_message = """You are a professional script writer for short-form video content.
     Your task is to write a 60-second script for an episode about a mischievous cat who goes shopping.
@@ -42,15 +133,104 @@ async def generate_script(
     Ensure the script has a clear beginning, middle, and end structure.
     Include at least one memorable catchphrase for the cat character."""
     
+    return system_message, prompt
+
+def _has_model_tiers(api_provider: str) -> bool:
+    """Whether drafting and upgrading would use different models"""
+    context = current_context()
+    if context.use_gpt4 or context.model_for(api_provider):
+        return False
+    draft, _ = model_router.rank("script_draft", api_provider)
+    upgrade, _ = model_router.rank("script_upgrade", api_provider)
+    return bool(draft and upgrade) and draft[0].model != upgrade[0].model
+
+async def _generate_speculative_script(
+    system_message: str,
+    prompt: str,
+    api_provider: str,
+    api_key: Optional[str],
+    cat_name: str,
+    catchphrases: Optional[List[str]]
+) -> str:
+    started = time.monotonic()
+    draft = await generate_text(
+        prompt=prompt,
+        system_message=system_message,
+        api_provider=api_provider,
+        temperature=0.7,
+        max_tokens=2000,
+        api_key=api_key,
+        task="script_draft"
+    )
+    draft_seconds = time.monotonic() - started
+    
+    problems = validate_script(draft, cat_name, catchphrases)
+    if not problems:
+        speculative_stats.record(draft_seconds, problems)
+        logger.info(f"Draft script passed validation in {draft_seconds:.1f}s")
+        return draft
+    
+    logger.info(f"Draft script failed validation ({'; '.join(problems)}), regenerating with a stronger model")
+    started = time.monotonic()
+    script = await generate_text(
+        prompt=prompt,
+        system_message=system_message,
+        api_provider=api_provider,
+        temperature=0.7,
+        max_tokens=2000,
+        api_key=api_key,
+        task="script_upgrade"
+    )
+    speculative_stats.record(draft_seconds, problems, time.monotonic() - started)
+    return script
+
+async def generate_script(
+    episode_idea: Dict[str, Any],
+    cat_name: str = "Whiskers",
+    content_style: str = "",
+    api_provider: str = "openai",
+    api_key: str = None,
+    speculative: Optional[bool] = None,
+    catchphrases: Optional[List[str]] = None,
+    fallback: bool = True
+) -> str:
+    """
+    Generate a script for an episode using specified API provider or fallback method
+
+    With speculative set (default SCRIPT_SPECULATIVE_ENABLED), a cheap model
+    drafts the script and only drafts failing validate_script are written
+    again by a stronger model. With fallback=False, provider errors are
+    raised instead of being answered with a simulated script.
+    """
+    logger.info(f"Generating script for episode: {episode_idea.get('title', 'Unknown')}")
+    
+    if SEMANTIC_CACHE_ENABLED:
+        exact_fields, fuzzy_fields = script_cache_fields(episode_idea, cat_name, content_style, api_provider)
+        cached_script = script_cache.lookup(exact_fields, fuzzy_fields)
+        if cached_script is not None:
+            return cached_script
+    
+    system_message, prompt = build_script_prompts(episode_idea, cat_name, content_style)
+    
     try:
-        # Get model based on provider
+        # Remote models are picked by the model router unless pinned here
         model = None
-        if api_provider == "openai":
-            model = "gpt-4" if os.getenv("USE_GPT4", "").lower() == "true" else "gpt-3.5-turbo"
-        elif api_provider == "huggingface":
-            model = os.getenv("HUGGINGFACE_MODEL", "mistralai/Mistral-7B-Instruct-v0.2")
+        if api_provider == "huggingface":
+            model = os.getenv("HUGGINGFACE_MODEL") or None
+        elif api_provider == "local":
+            model = os.getenv("LOCAL_MODEL_PATH") or None
+        
+        if speculative is None:
+            speculative = SCRIPT_SPECULATIVE_ENABLED
+        if speculative and model is None and _has_model_tiers(api_provider):
+            script = await _generate_speculative_script(
+                system_message, prompt, api_provider, api_key, cat_name, catchphrases
+            )
+            if SEMANTIC_CACHE_ENABLED and script:
+                script_cache.store(exact_fields, fuzzy_fields, script)
+            return script
         
-        logger.info(f"Using {api_provider} with model {model}")
+        logger.info(f"Using {api_provider} with model {model or 'chosen by the router'}")
         
         # Generate script using the unified generate_text function
         script = await generate_text(
@@ -60,12 +240,17 @@ async def generate_script(
             model=model,
             temperature=0.7,
             max_tokens=2000,
-            api_key=api_key
+            api_key=api_key,
+            task="script"
         )
         
         logger.info("Successfully generated script")
+        if SEMANTIC_CACHE_ENABLED and script:
+            script_cache.store(exact_fields, fuzzy_fields, script)
         return script
     except Exception as e:
         logger.error(f"Error generating script: {str(e)}")
+        if not fallback:
+            raise
         # Fallback to simulated script generation
         logger.info("Falling back to simulated script generation")
@@ -0,0 +1,235 @@
+import re
+import heapq
+import logging
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Posting rules per platform: daily cap, minimum gap between posts and the
+# local time window posts may go out in
+PLATFORM_POSTING_RULES = {
+    "TikTok": {"max_per_day": 3, "min_gap_minutes": 180, "window": ("07:00", "23:00"), "default_time": "18:00"},
+    "Instagram": {"max_per_day": 2, "min_gap_minutes": 240, "window": ("07:00", "22:00"), "default_time": "12:00"},
+    "YouTube Shorts": {"max_per_day": 3, "min_gap_minutes": 180, "window": ("08:00", "23:00"), "default_time": "15:00"},
+    "Twitter": {"max_per_day": 6, "min_gap_minutes": 60, "window": ("06:00", "23:59"), "default_time": "17:00"},
+}
+DEFAULT_POSTING_RULES = {"max_per_day": 2, "min_gap_minutes": 180, "window": ("08:00", "22:00"), "default_time": "12:00"}
+
+# Rough clock times for vague best_time_to_post answers
+TIME_OF_DAY_WORDS = {
+    "morning": "09:00",
+    "noon": "12:00",
+    "lunch": "12:00",
+    "afternoon": "15:00",
+    "evening": "18:00",
+    "night": "21:00",
+}
+
+EVENT_MINUTES = 15
+
+_TIME_PATTERN = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?m?\b", re.IGNORECASE)
+# Two clock times joined by a dash, "to", "and" or "until", e.g. "6-9pm" or "between 7 and 9 PM"
+_CLOCK = r"(\d{1,2})(?::(\d{2}))?\s*(?:([ap])\.?m?\.?(?![a-z]))?"
+_RANGE_PATTERN = re.compile(rf"(?<![\d:]){_CLOCK}\s*(?:-|–|to|and|until)\s*{_CLOCK}", re.IGNORECASE)
+
+def _clock(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+def posting_rules(platform: str) -> Dict[str, Any]:
+    return PLATFORM_POSTING_RULES.get(platform, DEFAULT_POSTING_RULES)
+
+def _hours_24(hours: int, meridiem: str) -> int:
+    if meridiem == "p" and hours < 12:
+        return hours + 12
+    if meridiem == "a" and hours == 12:
+        return 0
+    return hours
+
+def _range_start(match: "re.Match") -> Optional[time]:
+    """Start of a time range, with the end's am/pm carried back to a bare start"""
+    start_hours, start_minutes, start_meridiem, _, end_minutes, end_meridiem = match.groups()
+    hours, minutes = int(start_hours), int(start_minutes or 0)
+    # A bare "6-9" could be anything, so like single times it needs am/pm, minutes or a 24-hour clock
+    if not (start_meridiem or end_meridiem or start_minutes or end_minutes or hours > 12):
+        return None
+
+    if start_meridiem:
+        hours = _hours_24(hours, start_meridiem.lower())
+    elif end_meridiem:
+        hours = _hours_24(hours, end_meridiem.lower())
+        end_hours = _hours_24(int(match.group(4)), end_meridiem.lower())
+        # "11-1pm" starts before noon
+        if hours > end_hours and hours >= 12:
+            hours -= 12
+    if hours < 24 and minutes < 60:
+        return time(hours, minutes)
+    return None
+
+def parse_best_time(text: Optional[str], platform: str) -> time:
+    """
+    Turn a free-text best_time_to_post into a clock time
+
+    Understands "18:00", "6pm", "6:30 PM", ranges such as "Weekdays 6-9pm" or
+    "Between 7 and 9 PM EST" (the start of the range) and words such as
+    "evening". Anything else falls back to the platform's default time.
+    """
+    text = (text or "").strip()
+    for match in _RANGE_PATTERN.finditer(text):
+        start = _range_start(match)
+        if start is not None:
+            return start
+
+    for match in _TIME_PATTERN.finditer(text):
+        hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+        meridiem = (match.group(3) or "").lower()
+        hours = _hours_24(hours, meridiem)
+        if hours < 24 and minutes < 60 and (match.group(2) or meridiem):
+            return time(hours, minutes)
+
+    lowered = text.lower()
+    for word, clock in TIME_OF_DAY_WORDS.items():
+        if word in lowered:
+            return _clock(clock)
+    return _clock(posting_rules(platform)["default_time"])
+
+class _PlatformState:
+    """Slots already taken on one platform"""
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.max_per_day = rules["max_per_day"]
+        self.min_gap = timedelta(minutes=rules["min_gap_minutes"])
+        self.window_start = _clock(rules["window"][0])
+        self.window_end = _clock(rules["window"][1])
+        self.last: Optional[datetime] = None
+        self.per_day: Dict[date, int] = {}
+
+    def place(self, wanted: datetime) -> datetime:
+        """Earliest slot at or after wanted that honors spacing, window and daily cap"""
+        slot = wanted if self.last is None else max(wanted, self.last + self.min_gap)
+        while True:
+            day_start = datetime.combine(slot.date(), self.window_start)
+            if slot < day_start:
+                slot = day_start
+            if slot.time() > self.window_end or self.per_day.get(slot.date(), 0) >= self.max_per_day:
+                slot = datetime.combine(slot.date() + timedelta(days=1), self.window_start)
+                continue
+            break
+        self.last = slot
+        self.per_day[slot.date()] = self.per_day.get(slot.date(), 0) + 1
+        return slot
+
+def build_posting_calendar(
+    plans: List[Dict[str, Any]],
+    start_date: date,
+    episode_interval_days: int = 1,
+    timezone_name: str = "UTC",
+    titles: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Schedule every post of a season of SocialMediaPlans
+
+    Episode n is released start_date + (n - 1) * episode_interval_days, and each
+    post asks for its best_time_to_post on that day. Posts are taken from a heap
+    in order of their wanted time and given the earliest slot their platform
+    allows, so scheduling is O(n log n) in the number of posts.
+    """
+    zone = ZoneInfo(timezone_name)
+    queue = []
+    for index, plan in enumerate(plans):
+        release_day = start_date + timedelta(days=index * episode_interval_days)
+        for post in plan.get("platforms", []):
+            wanted = datetime.combine(release_day, parse_best_time(post.get("best_time_to_post"), post["name"]))
+            # The sequence number keeps the heap stable and never compares dicts
+            heapq.heappush(queue, (wanted, len(queue), index, post))
+
+    states: Dict[str, _PlatformState] = {}
+    calendar = []
+    while queue:
+        wanted, _, index, post = heapq.heappop(queue)
+        platform = post["name"]
+        state = states.get(platform)
+        if state is None:
+            state = states[platform] = _PlatformState(posting_rules(platform))
+        slot = state.place(wanted)
+
+        calendar.append({
+            "episode": index + 1,
+            "title": titles[index] if titles and index < len(titles) else None,
+            "platform": platform,
+            "scheduled_at": slot.replace(tzinfo=zone).isoformat(),
+            "requested_at": wanted.replace(tzinfo=zone).isoformat(),
+            "post_text": post.get("post_text", ""),
+            "hashtags": post.get("hashtags", []),
+            "engagement_prompt": post.get("engagement_prompt", "")
+        })
+
+    delayed = sum(1 for entry in calendar if entry["scheduled_at"] != entry["requested_at"])
+    logger.info(f"Scheduled {len(calendar)} posts across {len(states)} platforms, {delayed} moved by posting rules")
+    return calendar
+
+def _ical_escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+def _ical_fold(line: str) -> List[str]:
+    # Content lines are limited to 75 octets, continuation lines start with a space
+    folded = []
+    current = ""
+    for char in line:
+        limit = 75 if not folded else 74
+        if len((current + char).encode("utf-8")) > limit:
+            folded.append(current)
+            current = char
+        else:
+            current += char
+    folded.append(current)
+    return [folded[0]] + [f" {part}" for part in folded[1:]]
+
+def _ical_time(value: str) -> str:
+    return datetime.fromisoformat(value).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def calendar_to_ical(calendar: List[Dict[str, Any]], season_id: str, series_title: str = "Mischievous Cat Shopper") -> str:
+    """Export a posting calendar as an iCalendar feed"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Wisker//Posting Calendar//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ical_escape(f'{series_title} - {season_id}')}",
+    ]
+    for entry in calendar:
+        start = _ical_time(entry["scheduled_at"])
+        end = (datetime.fromisoformat(entry["scheduled_at"]) + timedelta(minutes=EVENT_MINUTES))
+        slug = re.sub(r"[^a-z0-9]+", "-", entry["platform"].lower()).strip("-")
+        description = entry["post_text"]
+        if entry["hashtags"]:
+            description += "\n\n" + " ".join(f"#{tag}" for tag in entry["hashtags"])
+        if entry["engagement_prompt"]:
+            description += "\n\n" + entry["engagement_prompt"]
+
+        summary = f"{entry['platform']}: Episode {entry['episode']}"
+        if entry["title"]:
+            summary += f" - {entry['title']}"
+
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{season_id}-ep{entry['episode']}-{slug}@wisker",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{start}",
+            f"DTEND:{_ical_time(end.isoformat())}",
+            f"SUMMARY:{_ical_escape(summary)}",
+            f"DESCRIPTION:{_ical_escape(description)}",
+            f"CATEGORIES:{_ical_escape(entry['platform'])}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+
+    output = []
+    for line in lines:
+        output.extend(_ical_fold(line))
+    return "\r\n".join(output) + "\r\n"
@@ -0,0 +1,319 @@
+import os
+import re
+import json
+import hashlib
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+from pydantic import ValidationError
+
+from agents.api_client import generate_text
+from models.schemas import SocialMediaPlan, SocialMediaPlatform, ContentVariation
+from utils.helpers import update_job_progress, update_job_status
+from utils.artifact_store import artifact_key, artifact_store
+from utils.checkpoints import Checkpoint, inputs_fingerprint
+from utils.plan_store import ANALYTICS_EXPORT_ENABLED, export_social_media_plans
+from utils.profiler import profiled
+
+logger = logging.getLogger(__name__)
+
+# Social media configuration
+DEFAULT_PLATFORMS = ["TikTok", "Instagram", "YouTube Shorts", "Twitter"]
+SOCIAL_BATCH_SIZE = int(os.getenv("SOCIAL_BATCH_SIZE", "5"))
+SOCIAL_CONCURRENCY = int(os.getenv("SOCIAL_CONCURRENCY", "3"))
+
+SOCIAL_OUTPUT_DIR = "./outputs/social_media"
+SOCIAL_CACHE_DIR = os.path.join(SOCIAL_OUTPUT_DIR, "cache")
+
+# Key under which an episode's content variations are cached
+VARIATIONS_CACHE_KEY = "_content_variations"
+
+EPISODE_FIELDS = ("title", "premise", "setting", "items", "conflict", "resolution")
+
+def episode_fingerprint(episode: Dict[str, Any], cat_name: str) -> str:
+    """Stable hash of the parts of an episode that shape its social posts"""
+    payload = json.dumps(
+        {"cat_name": cat_name, **{field: episode.get(field) for field in EPISODE_FIELDS}},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def _cache_path(fingerprint: str, platform: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", platform.lower()).strip("_")
+    return os.path.join(SOCIAL_CACHE_DIR, f"{fingerprint}_{slug}.json")
+
+async def _read_cache(fingerprint: str, platform: str) -> Optional[Any]:
+    return await artifact_store.read_json(artifact_key(_cache_path(fingerprint, platform)))
+
+async def _write_cache(fingerprint: str, platform: str, value: Any):
+    await artifact_store.write_json(artifact_key(_cache_path(fingerprint, platform)), value)
+
+@profiled("social.build_prompt")
+def build_social_media_prompt(
+    episodes: List[Dict[str, Any]],
+    platforms: List[str],
+    cat_name: str,
+    series_title: str
+) -> str:
+    """Build one prompt that asks for posts on every platform for several episodes"""
+    episode_lines = []
+    for index, episode in enumerate(episodes):
+        episode_lines.append(
+            f"Episode {index}: \"{episode.get('title', '')}\" - {episode.get('premise', '')} "
+            f"(setting: {episode.get('setting', '')}; conflict: {episode.get('conflict', '')})"
+        )
+
+    return f"""Create social media plans for these episodes of the short-form video series "{series_title}", starring a cat named {cat_name}.
+
+    {chr(10).join(episode_lines)}
+
+    For every episode, write one post for each of these platforms: {', '.join(platforms)}.
+    Each post needs post_text, 3-6 hashtags (without #), best_time_to_post (24h HH:MM) and an engagement_prompt.
+    Also suggest 2-4 content_variations per episode (type, description, purpose).
+
+    Return only a JSON object with this structure:
+    {{
+      "episodes": [
+        {{
+          "episode_index": 0,
+          "platforms": [
+            {{"name": "<platform>", "post_text": "...", "hashtags": ["..."], "best_time_to_post": "18:00", "engagement_prompt": "..."}}
+          ],
+          "content_variations": [
+            {{"type": "...", "description": "...", "purpose": "..."}}
+          ]
+        }}
+      ]
+    }}"""
+
+def _extract_json(response_text: str) -> Dict[str, Any]:
+    # Models sometimes wrap JSON in markdown fences or add text around it
+    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
+    if json_match:
+        return json.loads(json_match.group(1))
+    json_match = re.search(r'({[\s\S]*})', response_text)
+    if json_match:
+        return json.loads(json_match.group(1))
+    raise ValueError("Failed to extract JSON from social media response")
+
+@profiled("social.parse_json")
+def parse_social_media_batch(
+    response_text: str,
+    episode_count: int,
+    platforms: List[str]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Validate a batched response against the social media schemas
+
+    Returns, per episode index, the valid platform posts by platform name and
+    the content variations. Invalid or missing entries are left out so they are
+    generated again on the next run.
+    """
+    data = _extract_json(response_text)
+    wanted = {platform.lower(): platform for platform in platforms}
+    parsed = {}
+
+    for item in data.get("episodes", []):
+        index = item.get("episode_index")
+        if not isinstance(index, int) or not 0 <= index < episode_count:
+            continue
+
+        posts = {}
+        for post in item.get("platforms", []):
+            try:
+                validated = SocialMediaPlatform(**post)
+            except (ValidationError, TypeError) as e:
+                logger.warning(f"Dropping invalid post for episode {index}: {str(e)}")
+                continue
+            name = wanted.get(validated.name.lower())
+            if name:
+                posts[name] = validated.model_dump()
+
+        variations = []
+        for variation in item.get("content_variations", []):
+            try:
+                variations.append(ContentVariation(**variation).model_dump())
+            except (ValidationError, TypeError):
+                continue
+
+        parsed[index] = {"platforms": posts, "content_variations": variations}
+    return parsed
+
+async def generate_social_media_plans(
+    episodes: List[Dict[str, Any]],
+    platforms: Optional[List[str]] = None,
+    cat_name: str = "Whiskers",
+    series_title: str = "Mischievous Cat Shopper",
+    api_provider: str = "openai",
+    api_key: Optional[str] = None,
+    on_progress=None,
+    on_plan=None
+) -> List[Dict[str, Any]]:
+    """
+    Generate a SocialMediaPlan for each episode
+
+    Posts are cached per (episode fingerprint, platform), so only missing pairs
+    are requested. Episodes that still need posts are grouped SOCIAL_BATCH_SIZE
+    to a provider call, and up to SOCIAL_CONCURRENCY calls run at once. A failed
+    call is logged and its episodes get plans with the platforms they have.
+    on_plan(index, plan) is awaited as soon as each episode's plan is ready.
+    """
+    platforms = platforms or DEFAULT_PLATFORMS
+
+    fingerprints = [episode_fingerprint(episode, cat_name) for episode in episodes]
+    posts: List[Dict[str, Any]] = [{} for _ in episodes]
+    variations: List[Optional[List[Dict[str, Any]]]] = [None] * len(episodes)
+    missing = []
+
+    for index, fingerprint in enumerate(fingerprints):
+        *cached_posts, variations[index] = await asyncio.gather(
+            *[_read_cache(fingerprint, key) for key in platforms + [VARIATIONS_CACHE_KEY]]
+        )
+        for platform, cached in zip(platforms, cached_posts):
+            if cached is not None:
+                posts[index][platform] = cached
+        if len(posts[index]) < len(platforms) or variations[index] is None:
+            missing.append(index)
+
+    logger.info(f"Social media plans: {len(episodes) - len(missing)}/{len(episodes)} episodes fully cached")
+
+    plans: List[Optional[Dict[str, Any]]] = [None] * len(episodes)
+
+    async def finish_plan(index: int):
+        absent = [platform for platform in platforms if platform not in posts[index]]
+        if absent:
+            logger.warning(f"No valid posts for {', '.join(absent)} in episode '{episodes[index].get('title', index)}'")
+        plan = SocialMediaPlan(
+            platforms=[posts[index][platform] for platform in platforms if platform in posts[index]],
+            content_variations=variations[index] or []
+        )
+        plans[index] = plan.model_dump()
+        if on_plan:
+            await on_plan(index, plans[index])
+
+    waiting = set(missing)
+    for index in range(len(episodes)):
+        if index not in waiting:
+            await finish_plan(index)
+
+    semaphore = asyncio.Semaphore(SOCIAL_CONCURRENCY)
+    batches = [missing[i:i + SOCIAL_BATCH_SIZE] for i in range(0, len(missing), SOCIAL_BATCH_SIZE)]
+    finished = 0
+
+    async def generate_batch(batch: List[int]):
+        nonlocal finished
+        prompt = build_social_media_prompt([episodes[i] for i in batch], platforms, cat_name, series_title)
+        try:
+            async with semaphore:
+                response_text = await generate_text(
+                    prompt=prompt,
+                    system_message="You are a social media strategist for short-form video content. Respond with valid JSON only.",
+                    api_provider=api_provider,
+                    temperature=0.8,
+                    max_tokens=min(4000, 600 * len(batch) + 200),
+                    api_key=api_key,
+                    task="social"
+                )
+            results = parse_social_media_batch(response_text, len(batch), platforms)
+        except Exception as e:
+            # The batch's episodes keep whatever was cached; the rest is generated on the next run
+            titles = ", ".join(f"'{episodes[i].get('title', i)}'" for i in batch)
+            logger.error(f"Social media batch for {titles} failed: {str(e)}")
+            results = {}
+
+        for position, result in results.items():
+            index = batch[position]
+            for platform, post in result["platforms"].items():
+                if platform not in posts[index]:
+                    posts[index][platform] = post
+                    await _write_cache(fingerprints[index], platform, post)
+            if variations[index] is None and result["content_variations"]:
+                variations[index] = result["content_variations"]
+                await _write_cache(fingerprints[index], VARIATIONS_CACHE_KEY, variations[index])
+
+        for index in batch:
+            await finish_plan(index)
+        finished += len(batch)
+        if on_progress:
+            on_progress(finished, len(missing))
+
+    await asyncio.gather(*[generate_batch(batch) for batch in batches])
+    return plans
+
+async def run_season_social_media_plans(
+    job_id: str,
+    season_id: str,
+    episodes: List[Dict[str, Any]],
+    platforms: Optional[List[str]] = None,
+    cat_name: str = "Whiskers",
+    series_title: str = "Mischievous Cat Shopper",
+    api_provider: str = "openai",
+    api_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Generate social media plans for a whole season as a background job
+
+    Each episode's plan is written to its own file as soon as it is ready and
+    the season manifest is checkpointed, so a re-run of the same season only
+    generates the episodes that are missing.
+    """
+    update_job_status(job_id, "processing")
+    platforms = platforms or DEFAULT_PLATFORMS
+
+    season_dir = os.path.join(SOCIAL_OUTPUT_DIR, season_id)
+    checkpoint = Checkpoint(
+        os.path.join(season_dir, "manifest.json"),
+        "episodes",
+        "episode",
+        inputs_fingerprint(episodes, platforms, cat_name, series_title, api_provider),
+        len(episodes),
+        header={"season_id": season_id, "job_id": job_id},
+        job_id=job_id
+    )
+    await checkpoint.load()
+    await checkpoint.save()
+
+    remaining = []
+    for number in range(1, len(episodes) + 1):
+        done = checkpoint.completed(number)
+        if done is None or await artifact_store.stat(artifact_key(done["path"])) is None:
+            remaining.append(number)
+    if len(remaining) < len(episodes):
+        logger.info(f"Season {season_id}: {len(episodes) - len(remaining)} episodes already written")
+
+    def on_progress(finished: int, total: int):
+        update_job_progress(job_id, int(finished / total * 90))
+
+    async def on_plan(position: int, plan: Dict[str, Any]):
+        number = remaining[position]
+        plan_path = os.path.join(season_dir, f"episode{number}_social_media.json")
+        await artifact_store.write_json(artifact_key(plan_path), plan)
+        await checkpoint.record(number, {"title": episodes[number - 1].get("title"), "path": plan_path})
+
+    await generate_social_media_plans(
+        [episodes[number - 1] for number in remaining],
+        platforms=platforms,
+        cat_name=cat_name,
+        series_title=series_title,
+        api_provider=api_provider,
+        api_key=api_key,
+        on_progress=on_progress,
+        on_plan=on_plan
+    )
+
+    manifest = await checkpoint.finish()
+    manifest_path = checkpoint.path
+
+    if ANALYTICS_EXPORT_ENABLED:
+        try:
+            plans = await asyncio.gather(*[
+                artifact_store.read_json(artifact_key(entry["path"])) for entry in manifest["episodes"]
+            ])
+            titles = [episode.get("title") for episode in episodes]
+            export_social_media_plans(plans, season_id, series_title, titles)
+        except Exception as e:
+            logger.warning(f"Failed to export social media plans for analytics: {str(e)}")
+
+    update_job_progress(job_id, 100)
+    update_job_status(job_id, "completed", manifest_path)
+    return manifest
@@ -0,0 +1,252 @@
+import os
+import json
+import shutil
+import asyncio
+import logging
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from agents.voiceover_agent.voiceover_agent import AUDIO_OUTPUT_DIR, concatenate_audio
+from agents.image_agent.image_agent import IMAGE_OUTPUT_DIR
+from utils.artifact_store import artifact_key, artifact_store
+from utils.helpers import update_job_progress, update_job_status
+from utils.script_parser import parse_script
+
+logger = logging.getLogger(__name__)
+
+# Video assembly configuration
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+FFPROBE_PATH = os.getenv("FFPROBE_PATH", "ffprobe")
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+DEFAULT_SCENE_SECONDS = 5
+
+VIDEO_OUTPUT_DIR = "./outputs/video"
+
+# CPU-only x264 presets, from quick previews to final renders
+VIDEO_PRESETS = {
+    "draft": {"preset": "ultrafast", "crf": "32", "width": 854, "height": 480, "fps": 24},
+    "fast": {"preset": "veryfast", "crf": "26", "width": 1280, "height": 720, "fps": 30},
+    "standard": {"preset": "medium", "crf": "22", "width": 1920, "height": 1080, "fps": 30},
+}
+
+# Every segment gets the same audio layout so segments can be stream-copied together
+AUDIO_SAMPLE_RATE = 44100
+
+# Shared process pool for segment builds, created on first use
+_segment_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_segment_executor() -> ProcessPoolExecutor:
+    global _segment_executor
+    if _segment_executor is None:
+        _segment_executor = ProcessPoolExecutor(max_workers=VIDEO_WORKERS)
+    return _segment_executor
+
+def _run_ffmpeg(args: List[str]):
+    result = subprocess.run([FFMPEG_PATH, "-y", "-loglevel", "error", *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+
+def build_segment(
+    image_path: str,
+    audio_paths: List[str],
+    duration: float,
+    output_path: str,
+    preset_name: str
+) -> str:
+    """
+    Encode one scene: a still image held for the scene's duration over its narration
+
+    Runs in the segment process pool. Scenes without narration get silence so
+    every segment has the same streams.
+    """
+    preset = VIDEO_PRESETS[preset_name]
+
+    args = ["-loop", "1", "-framerate", str(preset["fps"]), "-i", image_path]
+    if audio_paths:
+        # Narration lines are joined without re-encoding before muxing
+        extension = os.path.splitext(audio_paths[0])[1]
+        scene_audio = f"{os.path.splitext(output_path)[0]}_audio{extension}"
+        concatenate_audio(audio_paths, scene_audio)
+        args += ["-i", scene_audio, "-af", "apad"]
+    else:
+        args += ["-f", "lavfi", "-i", f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo"]
+
+    args += [
+        "-t", f"{duration:.3f}",
+        "-vf", (
+            f"scale={preset['width']}:{preset['height']}:force_original_aspect_ratio=decrease,"
+            f"pad={preset['width']}:{preset['height']}:(ow-iw)/2:(oh-ih)/2,format=yuv420p"
+        ),
+        "-c:v", "libx264", "-preset", preset["preset"], "-crf", preset["crf"], "-tune", "stillimage",
+        "-r", str(preset["fps"]),
+        "-c:a", "aac", "-b:a", "128k", "-ar", str(AUDIO_SAMPLE_RATE), "-ac", "2",
+        output_path
+    ]
+    _run_ffmpeg(args)
+    return output_path
+
+def probe_streams(path: str) -> List[Dict[str, Any]]:
+    """Return the codec parameters that must match for stream-copy concatenation"""
+    result = subprocess.run(
+        [
+            FFPROBE_PATH, "-v", "error", "-print_format", "json", "-show_entries",
+            "stream=codec_type,codec_name,profile,width,height,pix_fmt,r_frame_rate,sample_rate,channels",
+            path
+        ],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout).get("streams", [])
+
+def concatenate_segments(segment_paths: List[str], output_path: str) -> bool:
+    """
+    Join segments into the final video
+
+    Stream-copies when all segments share codec parameters and only re-encodes
+    otherwise. Returns True if the segments were stream-copied.
+    """
+    list_path = f"{os.path.splitext(output_path)[0]}_segments.txt"
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+
+    signatures = [probe_streams(path) for path in segment_paths]
+    stream_copy = all(signature == signatures[0] for signature in signatures)
+
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    if stream_copy:
+        args += ["-c", "copy"]
+    else:
+        logger.warning(f"Segment codecs differ, re-encoding {output_path}")
+        args += ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac"]
+    args += ["-movflags", "+faststart", output_path]
+
+    _run_ffmpeg(args)
+    os.remove(list_path)
+    return stream_copy
+
+async def _load_manifest(path: str, required: bool = True) -> Optional[Dict[str, Any]]:
+    manifest = await artifact_store.read_json(artifact_key(path))
+    if manifest is None:
+        if required:
+            raise ValueError(f"Manifest not found: {path}")
+        return None
+    if manifest.get("status") == "partial":
+        raise ValueError(f"Manifest is still being written by a running job: {path}")
+    return manifest
+
+def plan_segments(script: str, image_manifest: Dict[str, Any], audio_manifest: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pair each scene of the parsed script with its image, narration audio and duration"""
+    parsed = parse_script(script).scenes
+    scenes = [scene for scene in parsed if scene.number > 0]
+    images = image_manifest["scenes"]
+    audio_lines = audio_manifest["lines"] if audio_manifest else []
+
+    if len(images) < len(scenes):
+        logger.warning(f"{len(scenes)} scenes but only {len(images)} images, extra scenes reuse the last image")
+
+    segments = []
+    # Narration before the first scene header (scene 0) is voiced but gets no segment
+    line_index = sum(len(scene.narration) for scene in parsed if scene.number == 0)
+    for index, scene in enumerate(scenes):
+        # Voiceover lines are in script order, so each scene takes the next len(narration) of them
+        narration = scene.narration
+        lines = audio_lines[line_index:line_index + len(narration)]
+        line_index += len(narration)
+        if [line["text"] for line in lines] != narration:
+            if audio_manifest:
+                logger.warning(f"Voiceover does not match scene {scene.number}, using silence")
+            lines = []
+
+        # Headers without timestamps, or with an end before the start, get the default length
+        duration = scene.duration
+        if duration is None or duration <= 0:
+            if duration is not None:
+                logger.warning(f"Scene {scene.number} has a duration of {duration}s, using {DEFAULT_SCENE_SECONDS}s")
+            duration = DEFAULT_SCENE_SECONDS
+
+        segments.append({
+            "scene": scene.number,
+            "image_path": images[min(index, len(images) - 1)]["path"],
+            "audio_paths": [line["path"] for line in lines],
+            "duration": duration
+        })
+    return segments
+
+async def generate_video(
+    script: str,
+    episode_id: str,
+    preset: str = "fast",
+    job_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Assemble an episode video from its generated images and voiceover
+
+    Scene timings come from the parsed script. Each scene segment is encoded in
+    a worker process, then the segments are stream-copied into
+    outputs/video/<episode_id>/final_video.mp4.
+    """
+    if preset not in VIDEO_PRESETS:
+        raise ValueError(f"Unknown video preset: {preset}")
+    if not shutil.which(FFMPEG_PATH):
+        raise ValueError("FFmpeg is not installed or FFMPEG_PATH is wrong")
+
+    image_manifest, audio_manifest = await asyncio.gather(
+        _load_manifest(os.path.join(IMAGE_OUTPUT_DIR, episode_id, "manifest.json")),
+        _load_manifest(os.path.join(AUDIO_OUTPUT_DIR, episode_id, "manifest.json"), required=False)
+    )
+
+    segments = plan_segments(script, image_manifest, audio_manifest)
+    if not segments:
+        raise ValueError("Script has no scenes")
+
+    logger.info(f"Assembling video for {episode_id}: {len(segments)} segments with preset {preset}")
+    if job_id:
+        update_job_status(job_id, "processing")
+
+    episode_dir = os.path.join(VIDEO_OUTPUT_DIR, episode_id)
+    segment_dir = os.path.join(episode_dir, "segments")
+    os.makedirs(segment_dir, exist_ok=True)
+
+    loop = asyncio.get_running_loop()
+    executor = _get_segment_executor()
+    finished = 0
+
+    async def encode(segment: Dict[str, Any]) -> str:
+        nonlocal finished
+        output_path = os.path.join(segment_dir, f"scene_{segment['scene']}.mp4")
+        await loop.run_in_executor(
+            executor,
+            build_segment,
+            segment["image_path"],
+            segment["audio_paths"],
+            segment["duration"],
+            output_path,
+            preset
+        )
+        finished += 1
+        if job_id:
+            update_job_progress(job_id, int(finished / len(segments) * 90))
+        return output_path
+
+    segment_paths = await asyncio.gather(*[encode(segment) for segment in segments])
+
+    video_path = os.path.join(episode_dir, "final_video.mp4")
+    stream_copied = await loop.run_in_executor(None, concatenate_segments, segment_paths, video_path)
+
+    manifest = {
+        "episode_id": episode_id,
+        "preset": preset,
+        "video_path": video_path,
+        "stream_copied": stream_copied,
+        "duration": sum(segment["duration"] for segment in segments),
+        "segments": [dict(segment, path=path) for segment, path in zip(segments, segment_paths)]
+    }
+    manifest_path = os.path.join(episode_dir, "manifest.json")
+    await artifact_store.write_json(artifact_key(manifest_path), manifest)
+
+    logger.info(f"Video for {episode_id} written to {video_path}")
+    if job_id:
+        update_job_progress(job_id, 100)
+        update_job_status(job_id, "completed", video_path)
+    return manifest
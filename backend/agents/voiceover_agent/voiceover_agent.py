@@ -0,0 +1,230 @@
+import os
+import io
+import json
+import math
+import wave
+import shutil
+import hashlib
+import asyncio
+import logging
+import struct
+import uuid
+import httpx
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from utils.helpers import update_job_progress, update_job_status
+from utils.artifact_store import run_io
+from utils.checkpoints import Checkpoint, inputs_fingerprint
+from utils.script_parser import parse_script
+
+logger = logging.getLogger(__name__)
+
+# Voiceover configuration
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/text-to-speech/"
+ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
+ELEVENLABS_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_monolingual_v1")
+VOICEOVER_CONCURRENCY = int(os.getenv("VOICEOVER_CONCURRENCY", "4"))
+
+AUDIO_OUTPUT_DIR = "./outputs/audio"
+AUDIO_CACHE_DIR = os.path.join(AUDIO_OUTPUT_DIR, "cache")
+
+DEFAULT_VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.75}
+
+# Offline stand-in output format
+OFFLINE_SAMPLE_RATE = 22050
+OFFLINE_SECONDS_PER_WORD = 0.35
+
+# File extension produced by each provider
+PROVIDER_FORMATS = {"elevenlabs": "mp3", "offline": "wav"}
+
+def line_cache_key(text: str, voice_id: str, settings: Dict[str, Any], provider: str) -> str:
+    """Hash of everything that affects the audio of a line"""
+    payload = json.dumps(
+        {"text": text, "voice_id": voice_id, "settings": settings, "provider": provider},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def synthesize_elevenlabs(
+    client: httpx.AsyncClient,
+    text: str,
+    voice_id: str,
+    settings: Dict[str, Any],
+    api_key: Optional[str] = None
+) -> bytes:
+    """Synthesize one line with ElevenLabs and return MP3 bytes"""
+    api_key = api_key or ELEVENLABS_API_KEY
+
+    if not api_key:
+        logger.error("ElevenLabs API key is not provided")
+        raise ValueError("ElevenLabs API key is not provided")
+
+    response = await client.post(
+        f"{ELEVENLABS_API_URL}{voice_id}",
+        headers={"xi-api-key": api_key, "Accept": "audio/mpeg"},
+        json={"text": text, "model_id": ELEVENLABS_MODEL_ID, "voice_settings": settings},
+        timeout=60.0
+    )
+    response.raise_for_status()
+    return response.content
+
+def synthesize_offline(text: str, voice_id: str, settings: Dict[str, Any]) -> bytes:
+    """
+    Local stand-in for a TTS provider, used for tests and offline runs
+
+    Produces a deterministic mono WAV tone whose length follows the word count
+    and whose pitch depends on the voice, so edits change the audio.
+    """
+    duration = max(0.5, len(text.split()) * OFFLINE_SECONDS_PER_WORD)
+    frequency = 180 + int(hashlib.sha256(voice_id.encode("utf-8")).hexdigest(), 16) % 120
+    volume = 3000 * float(settings.get("stability", 0.5))
+
+    frames = bytearray()
+    for i in range(int(duration * OFFLINE_SAMPLE_RATE)):
+        frames += struct.pack("<h", int(volume * math.sin(2 * math.pi * frequency * i / OFFLINE_SAMPLE_RATE)))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(OFFLINE_SAMPLE_RATE)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+def concatenate_audio(paths: List[str], output_path: str):
+    """
+    Join line audio into one file without re-encoding
+
+    WAV lines are joined frame by frame under a single header; MP3 lines are
+    joined by appending their frames, which players decode back to back.
+    """
+    if output_path.endswith(".wav"):
+        with wave.open(output_path, "wb") as output:
+            for index, path in enumerate(paths):
+                with wave.open(path, "rb") as line:
+                    if index == 0:
+                        output.setparams(line.getparams())
+                    output.writeframes(line.readframes(line.getnframes()))
+    else:
+        with open(output_path, "wb") as output:
+            for path in paths:
+                with open(path, "rb") as line:
+                    shutil.copyfileobj(line, output)
+
+async def generate_voiceover(
+    script: str,
+    episode_id: str,
+    voice_id: Optional[str] = None,
+    voice_settings: Optional[Dict[str, Any]] = None,
+    provider: str = "elevenlabs",
+    api_key: Optional[str] = None,
+    job_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Synthesize the narration of a script line by line
+
+    Lines are synthesized concurrently (at most VOICEOVER_CONCURRENCY at a time)
+    and cached by a hash of (text, voice, settings), so re-running after an edit
+    only synthesizes the lines that changed, and a line repeated in the script
+    is synthesized once. Line files and the joined narration
+    are written to outputs/audio/<episode_id>/ with a manifest.json, which is
+    checkpointed as each line file lands so an interrupted job can resume.
+    """
+    if provider not in PROVIDER_FORMATS:
+        raise ValueError(f"Unsupported voiceover provider: {provider}")
+
+    voice_id = voice_id or ELEVENLABS_VOICE_ID
+    settings = voice_settings or DEFAULT_VOICE_SETTINGS
+    extension = PROVIDER_FORMATS[provider]
+
+    lines = parse_script(script).narration_lines
+    if not lines:
+        raise ValueError("Script has no narration lines")
+
+    logger.info(f"Generating voiceover for {episode_id}: {len(lines)} lines with {provider}")
+    if job_id:
+        update_job_status(job_id, "processing")
+
+    episode_dir = os.path.join(AUDIO_OUTPUT_DIR, episode_id)
+    await run_io(partial(os.makedirs, AUDIO_CACHE_DIR, exist_ok=True))
+    await run_io(partial(os.makedirs, episode_dir, exist_ok=True))
+
+    checkpoint = Checkpoint(
+        os.path.join(episode_dir, "manifest.json"),
+        "lines",
+        "line",
+        inputs_fingerprint(provider, voice_id, settings, lines),
+        len(lines),
+        header={"episode_id": episode_id, "provider": provider, "voice_id": voice_id, "voice_settings": settings},
+        job_id=job_id
+    )
+    await checkpoint.load()
+    await checkpoint.save()
+
+    semaphore = asyncio.Semaphore(VOICEOVER_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    finished = 0
+    # Syntheses in flight by cache key, so identical lines wait on the same one
+    syntheses: Dict[str, asyncio.Task] = {}
+
+    async with httpx.AsyncClient() as client:
+        async def synthesize_to_cache(text: str, cache_path: str):
+            async with semaphore:
+                if provider == "elevenlabs":
+                    audio = await synthesize_elevenlabs(client, text, voice_id, settings, api_key)
+                else:
+                    audio = await loop.run_in_executor(None, synthesize_offline, text, voice_id, settings)
+
+            # Write then rename so a crash never leaves a truncated cache entry
+            tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+            await run_io(Path(tmp_path).write_bytes, audio)
+            await run_io(os.replace, tmp_path, cache_path)
+
+        async def synthesize_line(index: int, text: str) -> Dict[str, Any]:
+            nonlocal finished
+            key = line_cache_key(text, voice_id, settings, provider)
+            line_path = os.path.join(episode_dir, f"line_{index}.{extension}")
+            done = checkpoint.completed(index)
+            if done is not None and done["cache_key"] == key and await run_io(os.path.exists, done["path"]):
+                finished += 1
+                return done
+
+            cache_path = os.path.join(AUDIO_CACHE_DIR, f"{key}.{extension}")
+            cached = await run_io(os.path.exists, cache_path)
+
+            if not cached:
+                # A line that joins another's synthesis counts as served from the cache
+                cached = key in syntheses
+                if not cached:
+                    syntheses[key] = asyncio.create_task(synthesize_to_cache(text, cache_path))
+                await syntheses[key]
+
+            await run_io(shutil.copyfile, cache_path, line_path)
+            finished += 1
+            if job_id:
+                update_job_progress(job_id, int(finished / len(lines) * 90))
+            result = {"text": text, "cache_key": key, "cache_path": cache_path, "cached": cached, "path": line_path}
+            await checkpoint.record(index, result)
+            return result
+
+        results = await asyncio.gather(*[
+            synthesize_line(index, text) for index, text in enumerate(lines, start=1)
+        ])
+
+    narration_path = os.path.join(episode_dir, f"narration.{extension}")
+    await loop.run_in_executor(None, concatenate_audio, [result["path"] for result in results], narration_path)
+
+    manifest = await checkpoint.finish(
+        narration_path=narration_path,
+        cached_lines=sum(1 for result in results if result["cached"])
+    )
+    manifest_path = checkpoint.path
+
+    logger.info(f"Voiceover for {episode_id} done ({manifest['cached_lines']}/{len(lines)} lines from cache)")
+    if job_id:
+        update_job_progress(job_id, 100)
+        update_job_status(job_id, "completed", manifest_path)
+    return manifest
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from agents import api_client, local_model
+from agents.content_plan_agent.content_agent import generate_content_ideas
+from agents.script_generator.generat_script_ import generate_script, plan_catchphrases
+from utils.semantic_cache import SEMANTIC_CACHE_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Warm pool configuration
+WARM_POOL_ENABLED = os.getenv("WARM_POOL_ENABLED", "false").lower() == "true"
+WARM_POOL_TOP_N = int(os.getenv("WARM_POOL_TOP_N", "3"))
+WARM_POOL_SIZE = int(os.getenv("WARM_POOL_SIZE", "5"))
+WARM_POOL_LOW_WATERMARK = int(os.getenv("WARM_POOL_LOW_WATERMARK", "2"))
+WARM_POOL_MAX_AGE = int(os.getenv("WARM_POOL_MAX_AGE", str(6 * 3600)))
+WARM_POOL_INTERVAL = int(os.getenv("WARM_POOL_INTERVAL", "60"))
+WARM_POOL_CONCURRENCY = int(os.getenv("WARM_POOL_CONCURRENCY", "2"))
+# Scripts are only reachable through the script cache, so they need it turned on
+WARM_POOL_SCRIPTS = os.getenv("WARM_POOL_SCRIPTS", "false").lower() == "true"
+
+# Request popularity halves over this many seconds, so old traffic fades out
+POPULARITY_HALF_LIFE = 3600
+# Decayed request count a signature needs before it is pre-generated,
+# roughly two recent requests
+MIN_POPULARITY = 1.5
+# Signatures decayed below this (one request, about four and a half hours
+# ago) are forgotten, since request signatures are free text
+POPULARITY_FLOOR = 0.05
+
+# Request fields that decide which plan is generated; keys and other
+# per-user settings are left out so everyone shares the pool
+SIGNATURE_FIELDS = (
+    "series_title", "num_episodes", "cat_name", "content_style", "theme",
+    "setting", "target_audience", "additional_characters", "api_provider", "use_gpt4"
+)
+
+def request_signature(config: Dict[str, Any]) -> str:
+    """Stable id of the plan a request asks for"""
+    payload = json.dumps({field: config.get(field) for field in SIGNATURE_FIELDS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def has_server_credentials(api_provider: Optional[str]) -> bool:
+    """Whether the server can call a provider on its own, without a caller's key"""
+    api_provider = (api_provider or "openai").lower()
+    if api_provider == "openai":
+        return bool(api_client.OPENAI_API_KEY)
+    if api_provider == "huggingface":
+        return bool(api_client.HUGGINGFACE_API_TOKEN)
+    if api_provider == "local":
+        return bool(local_model.LOCAL_MODEL_PATH)
+    return False
+
+class WarmPool:
+    """
+    Pre-generated content plans for the most requested configurations
+
+    Every request counts towards its signature's popularity. A background task
+    keeps up to WARM_POOL_SIZE fresh plans for the top WARM_POOL_TOP_N
+    signatures and refills a pool as soon as it drops below the low watermark.
+    Each plan is served once and plans older than WARM_POOL_MAX_AGE are dropped,
+    so users keep seeing new plans. Refills run without any caller's
+    credentials, so only signatures whose provider has a server-side key are
+    pre-generated.
+    """
+
+    def __init__(self):
+        self.popularity: Dict[str, Dict[str, Any]] = {}
+        self.pools: Dict[str, deque] = {}
+        self.served = 0
+        self.missed = 0
+        self._refilling: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def observe(self, config: Dict[str, Any]) -> str:
+        """Count a request towards its signature's popularity"""
+        signature = request_signature(config)
+        now = time.monotonic()
+        entry = self.popularity.get(signature)
+        if entry is None:
+            entry = self.popularity[signature] = {"score": 0.0, "updated": now}
+        entry["score"] = self._decayed(entry, now) + 1.0
+        entry["updated"] = now
+        # Keep the latest config, without credentials, for refills
+        entry["config"] = {field: config.get(field) for field in SIGNATURE_FIELDS}
+        return signature
+
+    def _decayed(self, entry: Dict[str, Any], now: float) -> float:
+        return entry["score"] * 0.5 ** ((now - entry["updated"]) / POPULARITY_HALF_LIFE)
+
+    def top_signatures(self) -> List[str]:
+        now = time.monotonic()
+        scored = [
+            (self._decayed(entry, now), signature)
+            for signature, entry in self.popularity.items()
+            if has_server_credentials(entry["config"].get("api_provider"))
+        ]
+        scored = [item for item in scored if item[0] >= MIN_POPULARITY]
+        scored.sort(reverse=True)
+        return [signature for _, signature in scored[:WARM_POOL_TOP_N]]
+
+    def _drop_stale(self, signature: str):
+        pool = self.pools.get(signature)
+        now = time.monotonic()
+        while pool and now - pool[0]["created"] > WARM_POOL_MAX_AGE:
+            pool.popleft()
+
+    def take(self, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Record the request and return a pooled plan for it, if one is ready
+
+        Taking a plan may start a refill in the background.
+        """
+        signature = self.observe(config)
+        self._drop_stale(signature)
+        pool = self.pools.get(signature)
+        plan = pool.popleft()["plan"] if pool else None
+
+        if plan is None:
+            self.missed += 1
+        else:
+            self.served += 1
+        if signature in self.top_signatures() and len(self.pools.get(signature, ())) < WARM_POOL_LOW_WATERMARK:
+            self._schedule_refill(signature)
+        return plan
+
+    def _schedule_refill(self, signature: str):
+        task = self._refilling.get(signature)
+        if task is not None and not task.done():
+            return
+        self._refilling[signature] = asyncio.create_task(self._refill(signature))
+
+    async def _refill(self, signature: str):
+        config = self.popularity[signature]["config"]
+        pool = self.pools.setdefault(signature, deque())
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(WARM_POOL_CONCURRENCY)
+
+        while len(pool) < WARM_POOL_SIZE and signature in self.top_signatures():
+            async with self._semaphore:
+                try:
+                    # Skip the plan cache so every pooled plan is a new one; plans
+                    # are kept as the agent's compact, validated records
+                    plan = await generate_content_ideas(dict(config), use_cache=False)
+                except Exception as e:
+                    logger.warning(f"Warm pool refill for {signature} failed: {str(e)}")
+                    return
+
+            pool.append({"plan": plan, "created": time.monotonic()})
+            logger.info(f"Warm pool {signature} has {len(pool)} plans")
+
+            if WARM_POOL_SCRIPTS and SEMANTIC_CACHE_ENABLED:
+                await self._prewarm_scripts(plan, config)
+
+    async def _prewarm_scripts(self, plan: Dict[str, Any], config: Dict[str, Any]):
+        # Scripts land in the script cache, from where script requests are answered.
+        # Each takes a slot of its own, so plan refills for other pools interleave
+        catchphrases = plan_catchphrases(plan)
+
+        async def prewarm(episode: Dict[str, Any]):
+            async with self._semaphore:
+                try:
+                    await generate_script(
+                        episode,
+                        cat_name=config.get("cat_name") or "Whiskers",
+                        content_style=config.get("content_style") or "",
+                        api_provider=config.get("api_provider") or "openai",
+                        catchphrases=catchphrases
+                    )
+                except Exception as e:
+                    logger.warning(f"Warm pool script for '{episode.get('title')}' failed: {str(e)}")
+
+        await asyncio.gather(*[prewarm(episode) for episode in plan["episodes"]])
+
+    def _forget_unpopular(self):
+        now = time.monotonic()
+        for signature, entry in list(self.popularity.items()):
+            if self._decayed(entry, now) < POPULARITY_FLOOR and signature not in self.pools:
+                del self.popularity[signature]
+        for signature, task in list(self._refilling.items()):
+            if task.done():
+                del self._refilling[signature]
+
+    async def maintain(self):
+        """Background loop: drop stale plans, forget unpopular signatures and pools and top up popular ones"""
+        while True:
+            top = set(self.top_signatures())
+            for signature in list(self.pools):
+                if signature not in top:
+                    del self.pools[signature]
+            self._forget_unpopular()
+            for signature in top:
+                self._drop_stale(signature)
+                if len(self.pools.get(signature, ())) < WARM_POOL_LOW_WATERMARK:
+                    self._schedule_refill(signature)
+            await asyncio.sleep(WARM_POOL_INTERVAL)
+
+    def start(self):
+        if WARM_POOL_SCRIPTS and not SEMANTIC_CACHE_ENABLED:
+            logger.warning("WARM_POOL_SCRIPTS needs SEMANTIC_CACHE_ENABLED=true, scripts will not be pre-generated")
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self.maintain())
+
+    async def stop(self):
+        tasks = [task for task in [self._loop_task, *self._refilling.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        self._refilling.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": WARM_POOL_ENABLED,
+            "served": self.served,
+            "missed": self.missed,
+            "pools": [
+                {
+                    "signature": signature,
+                    "popularity": round(self._decayed(self.popularity[signature], now), 2),
+                    "series_title": self.popularity[signature]["config"].get("series_title"),
+                    "num_episodes": self.popularity[signature]["config"].get("num_episodes"),
+                    "ready": len(self.pools.get(signature, ())),
+                    "refilling": signature in self._refilling and not self._refilling[signature].done()
+                }
+                for signature in self.top_signatures()
+            ]
+        }
+
+# Shared pool for the content routes
+warm_pool = WarmPool()
@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional
 
 from backend.agents.content_plan_agent.content_agent import generate_content_plan, generate_episode_script
+from backend.utils.request_context import request_context
 
 app = FastAPI(
     title="Content Generation API",
@@ -43,10 +44,8 @@ class ScriptRequest(BaseModel):
 async def api_generate_content_plan(request: ContentPlanRequest):
     print(f"Received request to /generate/content-plan: {request}")
     """Generate a content plan based on the provided parameters"""
-    # Set API key if provided
-    # Set API key if provided
+    # Use the API key from the request if provided
     if request.api_key:
-        os.environ["OPENAI_API_KEY"] = request.api_key
         print(f"Using API key from request")
     elif not os.getenv("OPENAI_API_KEY"):
         print(f"No API key found in environment or request")
@@ -54,12 +53,6 @@ async def api_generate_content_plan(request: ContentPlanRequest):
     else:
         print(f"Using API key from environment")
    
-    # Set GPT-4 flag if requested
-    if request.use_gpt4:
-        os.environ["USE_GPT4"] = "true"
-    else:
-        os.environ["USE_GPT4"] = "false"
-   
     # Create config from request
     config = {
         "series_title": request.title,
@@ -71,8 +64,9 @@ async def api_generate_content_plan(request: ContentPlanRequest):
     }
    
     try:
-        # Generate content plan
-        content_plan = await generate_content_plan(config)
+        # Generate content plan with this request's key and GPT-4 flag
+        with request_context(api_provider="openai", api_key=request.api_key, use_gpt4=request.use_gpt4):
+            content_plan = await generate_content_plan(config)
         return content_plan
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating content plan: {str(e)}")
@@ -81,18 +75,10 @@ async def api_generate_content_plan(request: ContentPlanRequest):
 @app.post("/generate/script/{episode_index}")
 async def api_generate_script(episode_index: int, request: ScriptRequest = None):
     """Generate a script for a specific episode"""
-    # Set API key if provided
-    if request and request.api_key:
-        os.environ["OPENAI_API_KEY"] = request.api_key
-    elif not os.getenv("OPENAI_API_KEY"):
+    # An API key is needed from the request or the environment
+    if not (request and request.api_key) and not os.getenv("OPENAI_API_KEY"):
         raise HTTPException(status_code=400, detail="OpenAI API key is required")
    
-    # Set GPT-4 flag if requested
-    if request and request.use_gpt4:
-        os.environ["USE_GPT4"] = "true"
-    else:
-        os.environ["USE_GPT4"] = "false"
-   
     # Create config from request
     config = {
         "cat_name": request.cat_name if request else "Whiskers",
@@ -103,7 +89,12 @@ async def api_generate_script(episode_index: int, request: ScriptRequest = None)
     try:
         # Generate script
         episode = request.episode if request else {"index": episode_index}
-        script = await generate_episode_script(episode, config)
+        with request_context(
+            api_provider="openai",
+            api_key=request.api_key if request else None,
+            use_gpt4=request.use_gpt4 if request else False
+        ):
+            script = await generate_episode_script(episode, config)
         return {"script": script}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
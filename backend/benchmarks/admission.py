@@ -0,0 +1,125 @@
+"""
+Noisy neighbour against admission control
+
+One tenant keeps --noisy-loops 100-episode plan requests in flight while
+--victims other tenants each send 5-episode plans one after another, for
+--seconds, through the app with admission control off and then on. The
+provider is replaced by a fake with --provider-slots shared slots that takes
+--call-seconds plus --episode-seconds per episode. Reports the victims'
+latency and how many plans each side got. Tenants are told apart by
+X-Tenant-ID, as a gateway would set it. From backend/:
+
+    python -m benchmarks.admission
+    python -m benchmarks.admission --noisy-loops 24 --victims 10
+"""
+import io
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import argparse
+import contextlib
+from collections import Counter
+from typing import List
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("ADMISSION_TENANT_HEADER", "X-Tenant-ID")
+
+import httpx
+
+import main
+from agents.content_plan_agent import content_agent
+from utils import admission
+
+EPISODE = {
+    "premise": "Whiskers sneaks into the craft store to find the perfect ball of yarn.",
+    "setting": "Craft store",
+    "items": ["yarn", "needles"],
+    "conflict": "The store closes in five minutes.",
+    "resolution": "Whiskers trades a button for the yarn.",
+}
+
+def fake_provider(slots: int, call_seconds: float, episode_seconds: float):
+    """A provider that serves `slots` calls at once, slower for longer plans"""
+    semaphore = asyncio.Semaphore(slots)
+
+    async def run(task, provider, call, prompt="", pinned=None):
+        match = re.search(r"with (\d+) episodes", prompt)
+        episodes = int(match.group(1)) if match else 5
+        async with semaphore:
+            await asyncio.sleep(call_seconds + episodes * episode_seconds)
+        plan = {
+            "series_concept": "A cat goes shopping",
+            "cat_personality": {"traits": ["curious"], "catchphrases": ["Meow or never!"]},
+            "episodes": [dict(EPISODE, title=f"The Great Yarn Heist {number}") for number in range(episodes)]
+        }
+        return json.dumps(plan)
+
+    return run
+
+async def plan_loop(client: httpx.AsyncClient, tenant: str, episodes: int, deadline: float, latencies: List[float], statuses: Counter):
+    """Send plan requests back to back until the deadline"""
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        response = await client.post(
+            "/content/generate-plan",
+            json={"num_episodes": episodes, "series_title": f"{tenant} series"},
+            headers={"X-Tenant-ID": tenant}
+        )
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            latencies.append(time.monotonic() - started)
+        elif response.status_code == 429:
+            # Back off as told, but not past the end of the run
+            retry_after = float(response.headers.get("retry-after", "1"))
+            await asyncio.sleep(min(retry_after, max(0.0, deadline - time.monotonic())))
+
+async def run_mode(enabled: bool, args: argparse.Namespace):
+    admission.ADMISSION_ENABLED = enabled
+    admission.admission_controller = admission.AdmissionController()
+    content_agent.model_router.run = fake_provider(args.provider_slots, args.call_seconds, args.episode_seconds)
+
+    noisy_latencies, victim_latencies = [], []
+    noisy_statuses, victim_statuses = Counter(), Counter()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        deadline = time.monotonic() + args.seconds
+        await asyncio.gather(
+            *[plan_loop(client, "noisy", 100, deadline, noisy_latencies, noisy_statuses) for _ in range(args.noisy_loops)],
+            *[plan_loop(client, f"victim-{index}", 5, deadline, victim_latencies, victim_statuses) for index in range(args.victims)]
+        )
+    return victim_latencies, victim_statuses, noisy_statuses
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Benchmark a noisy tenant against admission control")
+    parser.add_argument("--noisy-loops", type=int, default=12, help="100-episode requests the noisy tenant keeps in flight")
+    parser.add_argument("--victims", type=int, default=5, help="Tenants sending 5-episode plans")
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--provider-slots", type=int, default=4)
+    parser.add_argument("--call-seconds", type=float, default=0.05)
+    parser.add_argument("--episode-seconds", type=float, default=0.005)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    print(
+        f"{args.noisy_loops} noisy loops of 100 episodes, {args.victims} victims of 5 episodes, "
+        f"{args.provider_slots} provider slots, {args.seconds:.0f}s"
+    )
+    print(f"{'admission':<11}{'victim p50':>12}{'victim p95':>12}{'victim 200':>12}{'noisy 200':>11}{'noisy 429':>11}")
+    for enabled in (False, True):
+        # The agents print progress; keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, victims, noisy = asyncio.run(run_mode(enabled, args))
+        print(
+            f"{'on' if enabled else 'off':<11}{percentile(latencies, 0.5) * 1000:>10.0f}ms"
+            f"{percentile(latencies, 0.95) * 1000:>10.0f}ms{victims[200]:>12}{noisy[200]:>11}{noisy[429]:>11}"
+        )
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,152 @@
+"""
+Bytes on the wire and latency of plan files served from /outputs/
+
+Writes a content plan of each --episodes size to a temporary artifact store
+and serves it through the files router behind CompressionMiddleware, as the
+app does. For each plan it reports:
+
+- the body size raw, with gzip and with brotli, compressed per request
+  (GZIP_LEVEL, BROTLI_QUALITY) and as sidecars (slowest, smallest settings)
+- the time to compress one response on the fly, and the one-off time to
+  write the sidecar that replaces it
+- the median latency of a full response from the sidecar, of the same
+  response compressed on the fly by the middleware, and of a 304 revalidation
+  with If-None-Match
+
+Brotli rows are skipped when brotli is not installed. From backend/:
+
+    python -m benchmarks.compression
+    python -m benchmarks.compression --episodes 5,50,100 --requests 500
+"""
+import time
+import random
+import asyncio
+import tempfile
+import argparse
+import statistics
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from routes import files as files_routes
+from utils.artifact_store import LocalArtifactStore
+from utils.compression import CompressionMiddleware, available_encodings, compress
+
+WORDS = (
+    "whiskers sneaks past the shelves toward the premium tuna while the manager turns and the cart "
+    "rolls on as shoppers gasp at the tiny shopper with refined taste for yarn bakery treats catnip "
+    "coupons checkout lanes sliding doors security guards balloons cereal boxes frozen peas"
+).split()
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def sample_plan(episodes: int) -> Dict[str, Any]:
+    """A plan whose episodes differ from each other, as generated ones do"""
+    rng = random.Random(episodes)
+    return {
+        "series_concept": "A cat goes shopping",
+        "cat_personality": {"traits": ["curious", "bold"], "catchphrases": ["Meow or never!"]},
+        "episodes": [
+            {
+                "title": _sentence(rng, 4)[:-1].title(),
+                "premise": _sentence(rng, 20),
+                "setting": _sentence(rng, 3)[:-1],
+                "items": [rng.choice(WORDS) for _ in range(3)],
+                "conflict": _sentence(rng, 14),
+                "resolution": _sentence(rng, 12),
+            }
+            for _ in range(episodes)
+        ]
+    }
+
+def build_app(store: LocalArtifactStore) -> FastAPI:
+    files_routes.artifact_store = store
+    app = FastAPI()
+    app.include_router(files_routes.router)
+
+    @app.get("/on-the-fly/{key:path}")
+    async def on_the_fly(key: str):
+        # The same bytes without a Content-Encoding, so the middleware compresses them per request
+        return Response(await store.read(key), media_type="application/json")
+
+    app.add_middleware(CompressionMiddleware)
+    return app
+
+def per_call(function, repeat: int) -> float:
+    """Best of three runs, in milliseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, time.perf_counter() - started)
+    return best / repeat * 1000
+
+async def median_latency(client: httpx.AsyncClient, url: str, headers: Dict[str, str], requests: int, status: int) -> float:
+    """Median milliseconds per request, sent one at a time"""
+    latencies: List[float] = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != status:
+            raise RuntimeError(f"{url} returned {response.status_code}, expected {status}")
+    return statistics.median(latencies)
+
+async def measure(store: LocalArtifactStore, key: str, requests: int) -> List[Dict[str, Any]]:
+    transport = httpx.ASGITransport(app=build_app(store))
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for encoding in ("identity",) + available_encodings():
+            headers = {"Accept-Encoding": encoding}
+            # The first request writes the sidecar
+            first = await client.get(f"/outputs/{key}", headers=headers)
+            etag = first.headers["etag"]
+            rows.append({
+                "encoding": encoding,
+                "wire": len(first.content) if encoding == "identity" else int(first.headers["content-length"]),
+                "sidecar": await median_latency(client, f"/outputs/{key}", headers, requests, 200),
+                "on_the_fly": await median_latency(client, f"/on-the-fly/{key}", headers, requests, 200),
+                "not_modified": await median_latency(
+                    client, f"/outputs/{key}", dict(headers, **{"If-None-Match": etag}), requests, 304
+                )
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes on the wire and latency of plan files served from /outputs/")
+    parser.add_argument("--episodes", default="100", help="Comma-separated plan sizes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per latency measurement")
+    parser.add_argument("--repeat", type=int, default=50, help="Compressions per timing run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalArtifactStore(root)
+        for episodes in [int(value) for value in args.episodes.split(",")]:
+            key = f"plans/plan_{episodes}.json"
+            asyncio.run(store.write_json(key, sample_plan(episodes)))
+            raw = asyncio.run(store.read(key))
+
+            print(f"{episodes} episodes, {len(raw)} bytes of JSON")
+            print(f"{'encoding':<10}{'per request':>13}{'sidecar':>10}{'compress':>11}{'sidecar once':>14}")
+            for encoding in available_encodings():
+                print(
+                    f"{encoding:<10}{len(compress(raw, encoding)):>13}{len(compress(raw, encoding, True)):>10}"
+                    f"{per_call(lambda: compress(raw, encoding), args.repeat):>9.2f}ms"
+                    f"{per_call(lambda: compress(raw, encoding, True), max(1, args.repeat // 10)):>12.2f}ms"
+                )
+
+            rows = asyncio.run(measure(store, key, args.requests))
+            print(f"{'encoding':<10}{'on wire':>10}{'sidecar':>10}{'on the fly':>12}{'304':>9}")
+            for row in rows:
+                print(
+                    f"{row['encoding']:<10}{row['wire']:>10}{row['sidecar']:>8.2f}ms"
+                    f"{row['on_the_fly']:>10.2f}ms{row['not_modified']:>7.2f}ms"
+                )
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Job progress by polling against pushed events
+
+Starts a server with the jobs router in a child process, where one job
+advances every --update-interval until it completes. --clients followers
+then watch it three ways: polling GET /jobs/{job_id} every --poll-interval,
+an SSE stream each, and a WebSocket each. Reports the requests or messages
+clients sent, the updates they received, how stale those updates were and the
+server's CPU time. From backend/:
+
+    python -m benchmarks.job_events --clients 200
+    python -m benchmarks.job_events --clients 1000 --poll-interval 0.5
+"""
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from typing import Dict, Any, List
+
+import httpx
+import uvicorn
+import websockets
+from fastapi import FastAPI
+
+from routes import jobs as jobs_routes
+from utils.helpers import create_job, update_job_progress, update_job_status
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve(port: int, commands: multiprocessing.Queue, replies: multiprocessing.Queue):
+    """Child process: the jobs API plus a job that advances on request"""
+    app = FastAPI()
+    app.include_router(jobs_routes.router)
+
+    @app.get("/bench/cpu")
+    async def cpu():
+        return {"cpu": time.process_time()}
+
+    def run_jobs():
+        while True:
+            command = commands.get()
+            if command is None:
+                return
+            steps, interval = command
+            job_id = create_job("bench")
+            started = time.time()
+            replies.put((job_id, started))
+            for step in range(1, steps + 1):
+                time.sleep(max(0.0, started + step * interval - time.time()))
+                if step == steps:
+                    update_job_status(job_id, "completed")
+                else:
+                    update_job_progress(job_id, step * 100 // steps)
+
+    threading.Thread(target=run_jobs, daemon=True).start()
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+class Followers:
+    """Counts what clients sent and received, and how late each update arrived"""
+
+    def __init__(self, started: float, steps: int, interval: float):
+        self.started = started
+        self.steps = steps
+        self.interval = interval
+        self.sent = 0
+        self.received = 0
+        self.lags: List[float] = []
+
+    def seen(self, snapshot: Dict[str, Any], last_progress: int) -> int:
+        self.received += 1
+        progress = 100 if snapshot["status"] == "completed" else snapshot["progress"]
+        if progress != last_progress:
+            step = max(1, round(progress * self.steps / 100))
+            self.lags.append(time.time() - (self.started + step * self.interval))
+        return progress
+
+async def poll(client: httpx.AsyncClient, url: str, interval: float, followers: Followers):
+    progress = -1
+    while True:
+        followers.sent += 1
+        snapshot = (await client.get(url)).json()
+        progress = followers.seen(snapshot, progress)
+        if snapshot["status"] == "completed":
+            return
+        await asyncio.sleep(interval)
+
+async def stream(client: httpx.AsyncClient, url: str, followers: Followers):
+    progress = -1
+    followers.sent += 1
+    async with client.stream("GET", url) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                snapshot = json.loads(line[6:])
+                progress = followers.seen(snapshot, progress)
+                if snapshot["status"] == "completed":
+                    return
+
+async def websocket(url: str, job_id: str, followers: Followers):
+    progress = -1
+    async with websockets.connect(url) as connection:
+        followers.sent += 1
+        await connection.send(json.dumps({"subscribe": [job_id]}))
+        while True:
+            snapshot = json.loads(await connection.recv())
+            progress = followers.seen(snapshot, progress)
+            if snapshot["status"] == "completed":
+                return
+
+async def follow(mode: str, base_url: str, args: argparse.Namespace, job_id: str, started: float) -> Followers:
+    followers = Followers(started, args.steps, args.update_interval)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        if mode == "poll":
+            tasks = [poll(client, f"{base_url}/jobs/{job_id}", args.poll_interval, followers) for _ in range(args.clients)]
+        elif mode == "sse":
+            tasks = [stream(client, f"{base_url}/jobs/{job_id}/events", followers) for _ in range(args.clients)]
+        else:
+            ws_url = base_url.replace("http://", "ws://") + "/jobs/ws"
+            tasks = [websocket(ws_url, job_id, followers) for _ in range(args.clients)]
+        await asyncio.gather(*tasks)
+    return followers
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare polling job status with pushed events")
+    parser.add_argument("--clients", type=int, default=200, help="Followers of the job")
+    parser.add_argument("--steps", type=int, default=20, help="Progress updates before the job completes")
+    parser.add_argument("--update-interval", type=float, default=0.5, help="Seconds between job updates")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between polls")
+    parser.add_argument("--modes", default="poll,sse,ws")
+    args = parser.parse_args()
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    commands, replies = multiprocessing.Queue(), multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port, commands, replies), daemon=True)
+    server.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            httpx.get(f"{base_url}/bench/cpu")
+            break
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Benchmark server did not start")
+            time.sleep(0.05)
+
+    print(
+        f"{args.clients} clients, job of {args.steps} updates every {args.update_interval}s, "
+        f"polling every {args.poll_interval}s"
+    )
+    print(f"{'mode':<6}{'sent':>9}{'received':>10}{'sent/s':>9}{'lag p50':>10}{'lag p95':>10}{'server cpu':>12}")
+    try:
+        for mode in args.modes.split(","):
+            cpu_before = httpx.get(f"{base_url}/bench/cpu").json()["cpu"]
+            # The job exists before followers connect; its first update is one interval later
+            commands.put((args.steps, args.update_interval))
+            job_id, started = replies.get()
+            run_started = time.monotonic()
+            followers = asyncio.run(follow(mode, base_url, args, job_id, started))
+            elapsed = time.monotonic() - run_started
+            cpu = httpx.get(f"{base_url}/bench/cpu").json()["cpu"] - cpu_before
+            print(
+                f"{mode:<6}{followers.sent:>9}{followers.received:>10}{followers.sent / elapsed:>9.0f}"
+                f"{percentile(followers.lags, 0.5) * 1000:>8.0f}ms{percentile(followers.lags, 0.95) * 1000:>8.0f}ms"
+                f"{cpu:>11.2f}s"
+            )
+    finally:
+        commands.put(None)
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Throughput and latency of the local model scheduler
+
+Runs a mixed workload (short title/hashtag requests and full scripts) at
+several client concurrencies and instance counts, and compares expected-finish
+ordering with plain arrival order. Without --model, instances are simulated:
+each token takes --token-ms with the GIL released, as llama.cpp decoding does.
+From backend/:
+
+    python -m benchmarks.local_scheduler
+    python -m benchmarks.local_scheduler --model /models/instruct-q4_k_m.gguf --requests 32
+"""
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, Any, List
+
+from agents.local_scheduler import LOCAL_TOKENS_PER_SECOND, LocalScheduler
+
+SHORT_TOKENS = 16
+LONG_TOKENS = 256
+
+class SimulatedModel:
+    """Stands in for a llama_cpp.Llama instance with a fixed decode speed"""
+
+    def __init__(self, token_seconds: float):
+        self.token_seconds = token_seconds
+
+    def create_chat_completion(self, stream: bool = True, max_tokens: int = 16, **kwargs):
+        for _ in range(max_tokens):
+            time.sleep(self.token_seconds)
+            yield {"choices": [{"delta": {"content": "x"}}]}
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+async def run_workload(scheduler: LocalScheduler, requests: int, concurrency: int, short_fraction: float, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    sizes = [SHORT_TOKENS if rng.random() < short_fraction else LONG_TOKENS for _ in range(requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: Dict[int, List[float]] = {SHORT_TOKENS: [], LONG_TOKENS: []}
+    first_token: List[float] = []
+    tokens = 0
+
+    async def client(max_tokens: int):
+        nonlocal tokens
+        async with semaphore:
+            started = time.monotonic()
+            first = None
+            request = {"messages": [{"role": "user", "content": "Write something."}], "max_tokens": max_tokens}
+            async for _ in scheduler.stream(request):
+                if first is None:
+                    first = time.monotonic() - started
+                tokens += 1
+            latencies[max_tokens].append(time.monotonic() - started)
+            first_token.append(first or 0.0)
+
+    started = time.monotonic()
+    await asyncio.gather(*[client(size) for size in sizes])
+    elapsed = time.monotonic() - started
+    return {
+        "tokens_per_second": tokens / elapsed,
+        "short_p50": percentile(latencies[SHORT_TOKENS], 0.5),
+        "short_p95": percentile(latencies[SHORT_TOKENS], 0.95),
+        "long_p50": percentile(latencies[LONG_TOKENS], 0.5),
+        "first_token_p50": percentile(first_token, 0.5)
+    }
+
+def load_instances(args: argparse.Namespace, count: int) -> List[Any]:
+    if not args.model:
+        return [SimulatedModel(args.token_ms / 1000) for _ in range(count)]
+    from llama_cpp import Llama
+    return [Llama(model_path=args.model, n_threads=max(1, args.threads // count), verbose=False) for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local model scheduler")
+    parser.add_argument("--model", help="GGUF model file; simulated instances are used without it")
+    parser.add_argument("--threads", type=int, default=8, help="Threads split between real model instances")
+    parser.add_argument("--instances", default="1,2,4", help="Comma-separated instance counts")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client concurrencies")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--short-fraction", type=float, default=0.75, help="Share of short requests")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="Simulated milliseconds per token")
+    args = parser.parse_args()
+
+    print(f"{'order':<16}{'inst':>5}{'conc':>6}{'tok/s':>9}{'short p50':>11}{'short p95':>11}{'long p50':>10}{'ttft p50':>10}")
+    for count in [int(value) for value in args.instances.split(",")]:
+        instances = load_instances(args, count)
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            # An infinite token rate orders waiting requests by arrival alone
+            for order, tokens_per_second in (("arrival", float("inf")), ("expected-finish", LOCAL_TOKENS_PER_SECOND)):
+                scheduler = LocalScheduler(instances, tokens_per_second=tokens_per_second)
+                scheduler.start()
+                try:
+                    result = asyncio.run(run_workload(scheduler, args.requests, concurrency, args.short_fraction, seed=concurrency))
+                finally:
+                    scheduler.stop()
+                print(
+                    f"{order:<16}{count:>5}{concurrency:>6}{result['tokens_per_second']:>9.0f}"
+                    f"{result['short_p50']:>10.3f}s{result['short_p95']:>10.3f}s{result['long_p50']:>9.3f}s"
+                    f"{result['first_token_p50']:>9.3f}s"
+                )
+
+if __name__ == "__main__":
+    main()
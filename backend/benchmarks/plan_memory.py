@@ -0,0 +1,125 @@
+"""
+Peak memory of concurrent content plan requests
+
+Sends --requests concurrent POST /content/generate-plan requests through the
+app for plans of several sizes, with and without gzip, and reports the peak
+memory traced by tracemalloc while they are answered. The provider is
+replaced by a canned reply (so the model router is skipped) and the client
+reads slowly, so response bodies are held while they are sent. Admission
+control is off so every request is answered. From backend/:
+
+    python -m benchmarks.plan_memory
+    python -m benchmarks.plan_memory --episodes 50 --stream-min-episodes 1000
+"""
+import io
+import os
+import json
+import asyncio
+import logging
+import argparse
+import contextlib
+import tracemalloc
+from typing import Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+# All requests come from one client; admission control would shed most of them
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+import main
+from agents.content_plan_agent import content_agent
+from routes import content as content_routes
+
+EPISODE = {
+    "title": "The Great Yarn Heist {number}",
+    "premise": "Whiskers sneaks into the craft store to find the perfect ball of yarn before closing time, dodging the clerk. " * 2,
+    "setting": "Craft store",
+    "items": ["yarn", "needles", "buttons"],
+    "conflict": "The clerk is watching closely and the store closes in five minutes. " * 2,
+    "resolution": "Whiskers trades a button for the yarn and leaves triumphantly. " * 2,
+}
+
+def model_reply(episodes: int) -> str:
+    """A plan the way models return it: indented JSON with text around it"""
+    plan = {
+        "series_concept": "A cat goes shopping",
+        "cat_personality": {"traits": ["curious", "bold"], "catchphrases": ["Meow or never!"]},
+        "episodes": [dict(EPISODE, title=EPISODE["title"].format(number=number)) for number in range(episodes)]
+    }
+    return "Here is your plan:\n" + json.dumps(plan, indent=2) + "\nEnjoy!"
+
+async def request(episodes: int, encoding: bytes, client_delay: float) -> Tuple[int, int]:
+    """One request straight through the ASGI app, read by a slow client; returns status and body size"""
+    body = json.dumps({"num_episodes": episodes}).encode()
+    scope = {
+        "type": "http", "method": "POST", "path": "/content/generate-plan", "raw_path": b"/content/generate-plan",
+        "query_string": b"", "root_path": "", "http_version": "1.1", "scheme": "http",
+        "server": ("bench", 80), "client": ("client", 1),
+        "headers": [(b"content-type", b"application/json"), (b"accept-encoding", encoding)],
+    }
+    received = False
+    status = []
+    size = 0
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        else:
+            size += len(message.get("body", b""))
+            await asyncio.sleep(client_delay)
+
+    await main.app(scope, receive, send)
+    return status[0], size
+
+async def measure(episodes: int, encoding: bytes, requests: int, client_delay: float) -> Tuple[float, int]:
+    reply = model_reply(episodes)
+
+    async def fake_run(task, provider, call, prompt="", pinned=None):
+        await asyncio.sleep(0.05)
+        return reply
+
+    content_agent.model_router.run = fake_run
+    # One request first, so imports and caches don't count
+    await request(episodes, encoding, client_delay)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    results = await asyncio.gather(*[request(episodes, encoding, client_delay) for _ in range(requests)])
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    if any(status != 200 for status, _ in results):
+        raise RuntimeError(f"Requests failed: {[status for status, _ in results]}")
+    return peak, results[0][1]
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Peak memory of concurrent content plan requests")
+    parser.add_argument("--episodes", default="5,50,100", help="Comma-separated plan sizes")
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent requests")
+    parser.add_argument("--client-delay", type=float, default=0.01, help="Seconds the client takes per body chunk")
+    parser.add_argument("--stream-min-episodes", type=int, help="Override PLAN_STREAM_MIN_EPISODES")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.stream_min_episodes is not None:
+        content_routes.PLAN_STREAM_MIN_EPISODES = args.stream_min_episodes
+    print(
+        f"{args.requests} concurrent requests, plans streamed from "
+        f"{content_routes.PLAN_STREAM_MIN_EPISODES} episodes"
+    )
+    print(f"{'encoding':<10}{'episodes':>9}{'peak MB':>10}{'body bytes':>12}")
+    for encoding in (b"identity", b"gzip"):
+        for episodes in [int(value) for value in args.episodes.split(",")]:
+            # The agents print progress; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                peak, size = asyncio.run(measure(episodes, encoding, args.requests, args.client_delay))
+            print(f"{encoding.decode():<10}{episodes:>9}{peak / 1e6:>10.2f}{size:>12}")
+
+if __name__ == "__main__":
+    main_benchmark()
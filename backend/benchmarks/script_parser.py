@@ -0,0 +1,124 @@
+"""
+Script parsing throughput over thousands of generated scripts
+
+Compares the single-pass parser (utils.script_parser) with the
+extract_narration_lines it replaced, on a corpus of synthetic scripts in the
+formats the providers return: plain and bold speaker names, NARRATOR and
+NARRATION, quoted and multi-line narration, SFX cues and scenes with and
+without timestamps. From backend/:
+
+    python -m benchmarks.script_parser --scripts 5000
+"""
+import re
+import time
+import random
+import argparse
+from typing import List
+
+from utils.script_parser import parse_script
+
+LOCATIONS = ["SUPERMARKET", "PET STORE", "CHECKOUT", "BAKERY AISLE", "PARKING LOT", "FARMERS MARKET"]
+SPEAKERS = ["WHISKERS", "STORE MANAGER", "CASHIER", "SHOPPER"]
+WORDS = (
+    "whiskers sneaks past the shelves toward the premium tuna while the manager turns "
+    "and the cart rolls on as shoppers gasp at the tiny shopper with refined taste"
+).split()
+
+def legacy_extract_narration_lines(script: str) -> List[str]:
+    """extract_narration_lines as it was before the single-pass parser"""
+    lines = script.split('\n')
+    narration_lines = []
+
+    in_narration_block = False
+
+    for line in lines:
+        trimmed_line = line.strip()
+
+        if re.search(r'narration:', trimmed_line, re.IGNORECASE) or re.search(r'voiceover:', trimmed_line, re.IGNORECASE):
+            in_narration_block = True
+            match = re.search(r'(?:narration|voiceover):(.*)', trimmed_line, re.IGNORECASE)
+            if match and match.group(1).strip():
+                narration_lines.append(match.group(1).strip())
+
+        elif in_narration_block and not trimmed_line.endswith(':') and not trimmed_line.startswith('[') and trimmed_line:
+            narration_lines.append(trimmed_line)
+
+        elif in_narration_block and (trimmed_line.endswith(':') or trimmed_line.startswith('[') or not trimmed_line):
+            in_narration_block = False
+
+    return narration_lines
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def synthetic_script(rng: random.Random) -> str:
+    """One generated-looking script of 4-12 scenes"""
+    lines = [f"TITLE: {_sentence(rng, 3)[:-1].upper()}", ""]
+    second = 0
+    for number in range(1, rng.randint(4, 12) + 1):
+        length = rng.randint(3, 10)
+        location = rng.choice(LOCATIONS)
+        if rng.random() < 0.8:
+            lines.append(f"[SCENE {number} - {location} - 0:{second:02d}-0:{second + length:02d}]")
+        else:
+            lines.append(f"[SCENE {number} - {location}]")
+        second = min(second + length, 49)
+        lines.append(_sentence(rng, rng.randint(6, 16)))
+        lines.append("")
+
+        for _ in range(rng.randint(1, 3)):
+            kind = rng.random()
+            if kind < 0.4:
+                narrator = rng.choice(["NARRATOR", "NARRATION", "**NARRATOR:**"])
+                separator = "" if narrator.endswith(":**") else ":"
+                lines.append(f'{narrator}{separator} "{_sentence(rng, rng.randint(6, 18))}"')
+                if rng.random() < 0.3:
+                    lines.append(_sentence(rng, rng.randint(4, 10)))
+            elif kind < 0.8:
+                speaker = rng.choice(SPEAKERS)
+                if rng.random() < 0.3:
+                    speaker = f"**{speaker}:**"
+                else:
+                    speaker += ":"
+                lines.append(f"{speaker} {_sentence(rng, rng.randint(3, 10))}")
+            else:
+                lines.append(f"[SFX: {_sentence(rng, rng.randint(2, 5))[:-1]}]")
+            lines.append("")
+    return "\n".join(lines)
+
+def measure(name: str, func, scripts: List[str], repeats: int):
+    total_bytes = sum(len(script) for script in scripts)
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for script in scripts:
+            func(script)
+        best = min(best, time.perf_counter() - started)
+    print(
+        f"{name:<34}{len(scripts) / best:>12,.0f}{best / len(scripts) * 1e6:>12.1f}"
+        f"{total_bytes / best / 1e6:>10.1f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark script parsing")
+    parser.add_argument("--scripts", type=int, default=5000, help="Synthetic scripts in the corpus")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the corpus; the best is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scripts = [synthetic_script(rng) for _ in range(args.scripts)]
+    size = sum(len(script) for script in scripts) / len(scripts)
+    print(f"{len(scripts)} scripts, {size:.0f} bytes each on average, best of {args.repeats}")
+    print(f"{'':<34}{'scripts/s':>12}{'us/script':>12}{'MB/s':>10}")
+    measure("legacy extract_narration_lines", legacy_extract_narration_lines, scripts, args.repeats)
+    measure("parse_script().narration_lines", lambda script: parse_script(script).narration_lines, scripts, args.repeats)
+    measure("parse_script (full structure)", parse_script, scripts, args.repeats)
+
+    # The legacy extractor misses NARRATOR lines and bold names, so counts differ
+    legacy = sum(len(legacy_extract_narration_lines(script)) for script in scripts)
+    parsed = sum(len(parse_script(script).narration_lines) for script in scripts)
+    print(f"narration lines found: legacy {legacy}, parser {parsed}")
+
+if __name__ == "__main__":
+    main()
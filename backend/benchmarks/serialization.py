@@ -0,0 +1,96 @@
+"""
+Serialization cost of content plan responses per plan size
+
+Times how long it takes to turn a content plan into a response body, three ways:
+
+- json: what /content/generate-plan did before. FastAPI validates the plan dict
+  against the ContentPlan response_model, then encodes it with the stdlib
+  json encoder (JSONResponse).
+- orjson: the same response_model validation, encoded by ORJSONResponse.
+- records: the plan validated once into records (as the agent does) and sent
+  as a ValidatedJSONResponse, which FastAPI does not validate again.
+
+The validation that builds the records is reported in its own column,
+because it happens while the model output is decoded. The speedup compares
+json against records plus that validation, so the plan is validated once on
+both sides. From backend/:
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --episodes 5,50,100,500 --repeat 500
+"""
+import time
+import argparse
+from typing import Any, Callable, Dict
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models.records import content_plan_record
+from models.schemas import ContentPlan
+from utils.responses import ValidatedJSONResponse
+
+EPISODE = {
+    "premise": "Whiskers sneaks into the craft store to find the perfect ball of yarn before closing time.",
+    "setting": "Craft store",
+    "items": ["yarn", "needles", "buttons"],
+    "conflict": "The clerk is watching closely and the store closes in five minutes.",
+    "resolution": "Whiskers trades a button for the yarn and leaves triumphantly.",
+}
+
+# The response_model field FastAPI builds for the plan route
+PLAN_FIELD = create_response_field(name="Response_create_content_plan", type_=ContentPlan)
+
+def sample_plan(episodes: int) -> Dict[str, Any]:
+    return {
+        "series_concept": "A cat goes shopping",
+        "cat_personality": {"traits": ["curious", "bold"], "catchphrases": ["Meow or never!"]},
+        "episodes": [dict(EPISODE, title=f"The Great Yarn Heist {number}") for number in range(episodes)]
+    }
+
+def validated_body(plan: Dict[str, Any], response_class) -> bytes:
+    """Validate against the response_model and render, as FastAPI does for a returned dict"""
+    # For an async route serialize_response never suspends, so it is stepped
+    # directly rather than paying for an event loop per call
+    coroutine = serialize_response(field=PLAN_FIELD, response_content=plan)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return response_class(done.value).body
+    raise RuntimeError("serialize_response suspended")
+
+def per_call(function: Callable[[], Any], repeat: int) -> float:
+    """Best of three runs, in microseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, time.perf_counter() - started)
+    return best / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization cost of content plan responses per plan size")
+    parser.add_argument("--episodes", default="5,50,100", help="Comma-separated plan sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Responses per timing run")
+    args = parser.parse_args()
+
+    print(f"{'episodes':>8}{'body bytes':>12}{'json':>10}{'orjson':>10}{'records':>10}{'validate':>10}{'speedup':>9}")
+    for episodes in [int(value) for value in args.episodes.split(",")]:
+        plan = sample_plan(episodes)
+        record = content_plan_record(plan)
+        # Every path must send the same document
+        body = validated_body(plan, ORJSONResponse)
+        assert ORJSONResponse(None).render(record) == body
+
+        json_us = per_call(lambda: validated_body(plan, JSONResponse), args.repeat)
+        orjson_us = per_call(lambda: validated_body(plan, ORJSONResponse), args.repeat)
+        records_us = per_call(lambda: ValidatedJSONResponse(record).body, args.repeat)
+        validate_us = per_call(lambda: content_plan_record(plan), args.repeat)
+        print(
+            f"{episodes:>8}{len(body):>12}{json_us:>8.0f}us{orjson_us:>8.0f}us{records_us:>8.0f}us"
+            f"{validate_us:>8.0f}us{json_us / (records_us + validate_us):>8.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Video assembly over a batch of episodes
+
+Builds --episodes synthetic episodes (rendered stills and a timed script,
+narration left silent), assembles all of them with generate_video at several
+segment worker counts, then times the final join of each episode with stream
+copy against a full re-encode. Needs ffmpeg and ffprobe (FFMPEG_PATH,
+FFPROBE_PATH). From backend/:
+
+    python -m benchmarks.video_assembly --episodes 100
+    python -m benchmarks.video_assembly --episodes 100 --preset fast --workers 1,4,8
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from PIL import Image, ImageDraw
+
+from agents.video_agent import video_agent
+from agents.video_agent.video_agent import VIDEO_PRESETS, concatenate_segments, generate_video
+from utils.artifact_store import artifact_key, artifact_store
+
+COLORS = [(214, 94, 60), (68, 140, 200), (120, 180, 90), (230, 190, 70), (150, 100, 190), (90, 90, 90)]
+
+def synthetic_script(scenes: int, scene_seconds: int) -> str:
+    lines = ["TITLE: THE GREAT TUNA HEIST", ""]
+    for number in range(1, scenes + 1):
+        start = (number - 1) * scene_seconds
+        end = start + scene_seconds
+        lines.append(f"[SCENE {number} - AISLE {number} - {start // 60}:{start % 60:02d}-{end // 60}:{end % 60:02d}]")
+        lines.append("Whiskers creeps toward the premium tuna.")
+        lines.append("")
+    return "\n".join(lines)
+
+def render_stills(directory: str, scenes: int, size) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(scenes):
+        image = Image.new("RGB", size, COLORS[index % len(COLORS)])
+        ImageDraw.Draw(image).text((40, 40), f"Scene {index + 1}", fill=(255, 255, 255))
+        path = os.path.join(directory, f"scene_{index + 1}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+async def write_manifests(episode_ids: List[str], image_paths: List[str]):
+    for episode_id in episode_ids:
+        manifest = {
+            "episode_id": episode_id,
+            "status": "complete",
+            "scenes": [{"scene": index + 1, "path": path} for index, path in enumerate(image_paths)]
+        }
+        await artifact_store.write_json(artifact_key(f"./outputs/images/{episode_id}/manifest.json"), manifest)
+
+async def assemble_all(episode_ids: List[str], script: str, preset: str, concurrency: int) -> List[dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def assemble(episode_id: str) -> dict:
+        async with semaphore:
+            return await generate_video(script, episode_id, preset=preset)
+
+    return await asyncio.gather(*[assemble(episode_id) for episode_id in episode_ids])
+
+def time_joins(manifests: List[dict]):
+    """Join each episode's segments again, with stream copy and with a re-encode"""
+    copy_seconds = 0.0
+    reencode_seconds = 0.0
+    for manifest in manifests:
+        segment_paths = [segment["path"] for segment in manifest["segments"]]
+        output_dir = os.path.dirname(manifest["video_path"])
+
+        started = time.perf_counter()
+        concatenate_segments(segment_paths, os.path.join(output_dir, "join_copy.mp4"))
+        copy_seconds += time.perf_counter() - started
+
+        list_path = os.path.join(output_dir, "join_reencode.txt")
+        with open(list_path, "w") as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        started = time.perf_counter()
+        video_agent._run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac",
+            "-movflags", "+faststart", os.path.join(output_dir, "join_reencode.mp4")
+        ])
+        reencode_seconds += time.perf_counter() - started
+    return copy_seconds, reencode_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark video assembly over a batch of episodes")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--scenes", type=int, default=6, help="Scenes per episode")
+    parser.add_argument("--scene-seconds", type=int, default=5)
+    parser.add_argument("--preset", default="draft", choices=sorted(VIDEO_PRESETS))
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated segment worker counts")
+    parser.add_argument("--concurrency", type=int, default=4, help="Episodes assembled at a time")
+    args = parser.parse_args()
+
+    preset = VIDEO_PRESETS[args.preset]
+    script = synthetic_script(args.scenes, args.scene_seconds)
+    episode_ids = [f"bench-{index}" for index in range(args.episodes)]
+    video_seconds = args.episodes * args.scenes * args.scene_seconds
+
+    with tempfile.TemporaryDirectory() as root:
+        # The artifact store and output directories are relative to the working directory
+        os.chdir(root)
+        image_paths = render_stills(os.path.join(root, "stills"), args.scenes, (preset["width"], preset["height"]))
+        asyncio.run(write_manifests(episode_ids, image_paths))
+
+        print(
+            f"{args.episodes} episodes x {args.scenes} scenes x {args.scene_seconds}s, preset {args.preset}, "
+            f"{args.concurrency} episodes at a time, {os.cpu_count()} CPUs"
+        )
+        print(f"{'workers':>8}{'total':>10}{'s/episode':>11}{'episodes/min':>14}{'video s/s':>11}{'copied':>8}")
+        manifests = []
+        for workers in [int(value) for value in args.workers.split(",")]:
+            video_agent._segment_executor = ProcessPoolExecutor(max_workers=workers)
+            try:
+                started = time.perf_counter()
+                manifests = asyncio.run(assemble_all(episode_ids, script, args.preset, args.concurrency))
+                elapsed = time.perf_counter() - started
+            finally:
+                video_agent._segment_executor.shutdown()
+                video_agent._segment_executor = None
+            copied = sum(1 for manifest in manifests if manifest["stream_copied"])
+            print(
+                f"{workers:>8}{elapsed:>9.1f}s{elapsed / args.episodes:>11.2f}"
+                f"{args.episodes / elapsed * 60:>14.1f}{video_seconds / elapsed:>11.1f}{copied:>8}"
+            )
+
+        copy_seconds, reencode_seconds = time_joins(manifests)
+        print(
+            f"final join per episode: stream copy {copy_seconds / args.episodes * 1000:.0f} ms, "
+            f"re-encode {reencode_seconds / args.episodes * 1000:.0f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Bulk content plan generation from the command line
+
+Reads a JSONL file of plan requests (the body of POST /content/generate-plan,
+one per line) and runs them through the same engine as the API, without the
+HTTP server:
+
+    python cli.py plans.jsonl --concurrency 16 --generate-scripts
+
+Plans are written to the artifact store under bulk/<input name>/ (or to
+--output-dir) and each finished request is recorded in a local
+checkpoint.jsonl, so an interrupted run picks up where it stopped when started
+again with the same arguments.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Dict, Any, List, Optional
+
+from pydantic import ValidationError
+
+from agents.client_pool import client_pool
+from agents.content_plan_agent.content_agent import generate_content_ideas
+from agents.local_model import warm_up_local_model
+from agents.script_generator.generat_script_ import generate_script, plan_catchphrases
+from agents.warm_pool import request_signature
+from models.records import ContentPlanRecord, iter_content_plan_json
+from routes.content import ContentPlanRequest
+from utils.artifact_store import ARTIFACT_ROOT, ArtifactStore, LocalArtifactStore, artifact_store
+from utils.checkpoints import CheckpointLog, inputs_fingerprint
+from utils.plan_store import analytics_buffer
+from utils.request_context import request_context
+
+logger = logging.getLogger(__name__)
+
+BULK_OUTPUT_DIR = os.path.join(ARTIFACT_ROOT, "bulk")
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+
+def read_requests(path: str) -> List[Dict[str, Any]]:
+    """Parse a JSONL file of plan requests; bad lines become errors rather than stopping the run"""
+    stream = sys.stdin if path == "-" else open(path, "r")
+    requests = []
+    with stream:
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                requests.append({"line": number, "request": json.loads(line)})
+            except ValueError as e:
+                requests.append({"line": number, "error": f"Invalid JSON: {str(e)}"})
+    return requests
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class BulkRun:
+    """One pass over a request file, with the counters behind the throughput report"""
+
+    def __init__(
+        self,
+        requests: List[Dict[str, Any]],
+        store: ArtifactStore,
+        prefix: str,
+        output_dir: str,
+        checkpoint: CheckpointLog,
+        args: argparse.Namespace
+    ):
+        self.requests = requests
+        self.store = store
+        self.prefix = prefix
+        self.output_dir = output_dir
+        self.checkpoint = checkpoint
+        self.args = args
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.resumed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.episodes = 0
+        self.scripts = 0
+        self.latencies: List[float] = []
+        self.started = time.monotonic()
+
+    def key(self, *parts: str) -> str:
+        return "/".join(part for part in (self.prefix, *parts) if part)
+
+    def path(self, key: str) -> str:
+        # Where the artifact shows up locally, or under /outputs/ for the shared store
+        return os.path.join(self.output_dir, key[len(self.prefix):].lstrip("/"))
+
+    def config_for(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if self.args.api_provider:
+            request = {"api_provider": self.args.api_provider, **request}
+        return ContentPlanRequest(**request).model_dump()
+
+    async def generate(self, index: int, config: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        with request_context(api_provider=config["api_provider"], api_key=config["api_key"], use_gpt4=config["use_gpt4"]):
+            async with self.semaphore:
+                plan: ContentPlanRecord = await generate_content_ideas(config)
+
+            script_paths = []
+            if self.args.generate_scripts:
+                catchphrases = plan_catchphrases(plan)
+
+                async def write_script(number: int, episode) -> str:
+                    async with self.semaphore:
+                        script = await generate_script(
+                            episode,
+                            cat_name=config["cat_name"],
+                            content_style=config["content_style"],
+                            api_provider=config["api_provider"],
+                            api_key=config["api_key"],
+                            catchphrases=catchphrases,
+                            # A simulated script would be checkpointed as done and never retried
+                            fallback=False
+                        )
+                    script_key = self.key("scripts", f"plan_{index}", f"episode{number}_script.txt")
+                    await self.store.write_text(script_key, script)
+                    return self.path(script_key)
+
+                script_paths = await asyncio.gather(*[
+                    write_script(number, episode) for number, episode in enumerate(plan.episodes, start=1)
+                ])
+
+        plan_key = self.key("plans", f"plan_{index}.json")
+        await self.store.write(plan_key, iter_content_plan_json(plan))
+
+        seconds = time.monotonic() - started
+        self.latencies.append(seconds)
+        self.episodes += len(plan.episodes)
+        self.scripts += len(script_paths)
+        result = {"key": plan_key, "path": self.path(plan_key), "episodes": len(plan.episodes), "seconds": round(seconds, 3)}
+        if script_paths:
+            result["scripts"] = script_paths
+        return result
+
+    async def run_one(self, index: int, item: Dict[str, Any]):
+        if "error" in item:
+            self.failed += 1
+            self.checkpoint.record(index, {"line": item["line"], "error": item["error"]})
+            return
+
+        try:
+            config = self.config_for(item["request"])
+        except ValidationError as e:
+            self.failed += 1
+            self.checkpoint.record(index, {"line": item["line"], "error": f"Invalid request: {str(e)}"})
+            return
+
+        signature = inputs_fingerprint(request_signature(config), self.args.generate_scripts)
+        done = self.checkpoint.completed(index)
+        if done is not None and done.get("signature") == signature and "key" in done and await self.store.stat(done["key"]):
+            self.resumed += 1
+            return
+
+        try:
+            result = await self.generate(index, config)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Request on line {item['line']} failed: {str(e)}")
+            self.checkpoint.record(index, {"line": item["line"], "signature": signature, "error": str(e)})
+            return
+        self.succeeded += 1
+        self.checkpoint.record(index, {"line": item["line"], "signature": signature, **result})
+
+    async def worker(self, queue: "asyncio.Queue[int]"):
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self.run_one(index, self.requests[index])
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "requests": len(self.requests),
+            "generated": self.succeeded,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "episodes": self.episodes,
+            "scripts": self.scripts,
+            "elapsed_seconds": round(elapsed, 2),
+            "plans_per_second": round(self.succeeded / elapsed, 3) if elapsed else 0.0,
+            "episodes_per_second": round(self.episodes / elapsed, 3) if elapsed else 0.0,
+            "latency_p50_seconds": round(percentile(self.latencies, 0.5), 3),
+            "latency_p95_seconds": round(percentile(self.latencies, 0.95), 3)
+        }
+
+    def report(self, stream=sys.stderr):
+        stats = self.stats()
+        finished = stats["generated"] + stats["resumed"] + stats["failed"]
+        remaining = stats["requests"] - finished
+        eta = remaining / stats["plans_per_second"] if stats["plans_per_second"] else 0.0
+        print(
+            f"[{stats['elapsed_seconds']:.0f}s] {finished}/{stats['requests']} done "
+            f"({stats['generated']} generated, {stats['resumed']} resumed, {stats['failed']} failed) | "
+            f"{stats['plans_per_second']:.2f} plans/s, {stats['episodes_per_second']:.1f} episodes/s | "
+            f"p50 {stats['latency_p50_seconds']:.2f}s, p95 {stats['latency_p95_seconds']:.2f}s | "
+            f"ETA {eta:.0f}s",
+            file=stream
+        )
+
+    async def run(self) -> Dict[str, Any]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(len(self.requests)):
+            queue.put_nowait(index)
+
+        async def report_progress():
+            while True:
+                await asyncio.sleep(self.args.progress_interval)
+                self.report()
+
+        reporter = asyncio.create_task(report_progress())
+        try:
+            await asyncio.gather(*[self.worker(queue) for _ in range(self.args.concurrency)])
+        finally:
+            reporter.cancel()
+        return self.stats()
+
+async def run_bulk(args: argparse.Namespace) -> int:
+    requests = read_requests(args.input)
+    name = "stdin" if args.input == "-" else os.path.splitext(os.path.basename(args.input))[0]
+    if args.output_dir:
+        # Anywhere on disk, outside the artifact store
+        store, prefix, output_dir = LocalArtifactStore(args.output_dir), "", args.output_dir
+    else:
+        store, prefix, output_dir = artifact_store, f"bulk/{name}", os.path.join(BULK_OUTPUT_DIR, name)
+
+    checkpoint = CheckpointLog(args.checkpoint or os.path.join(output_dir, "checkpoint.jsonl"))
+    print(f"Generating {len(requests)} plans into {output_dir} with concurrency {args.concurrency}", file=sys.stderr)
+
+    if any((item.get("request") or {}).get("api_provider") == "local" for item in requests) or args.api_provider == "local":
+        await warm_up_local_model()
+
+    run = BulkRun(requests, store, prefix, output_dir, checkpoint, args)
+    try:
+        stats = await run.run()
+        await store.write_json(run.key("manifest.json"), {
+            "input": args.input,
+            "stats": stats,
+            "items": [checkpoint.units[index] for index in sorted(checkpoint.units)]
+        })
+    finally:
+        checkpoint.close()
+        await analytics_buffer.close()
+        await client_pool.close()
+        await store.close()
+    run.report(sys.stdout)
+    return 1 if stats["failed"] else 0
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate content plans in bulk from a JSONL file of plan requests")
+    parser.add_argument("input", help="JSONL file with one /content/generate-plan request body per line, or - for stdin")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY, help="Provider calls in flight at once")
+    parser.add_argument("--output-dir", help=f"Where plans are written (default {BULK_OUTPUT_DIR}/<input name>)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default <output dir>/checkpoint.jsonl)")
+    parser.add_argument("--api-provider", help="Provider for requests that don't name one")
+    parser.add_argument("--generate-scripts", action="store_true", help="Also write a script for every episode")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Seconds between progress reports")
+    parser.add_argument("--log-level", default="WARNING", help="Log level for the agents (default WARNING)")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.getLogger().setLevel(args.log_level.upper())
+    try:
+        return asyncio.run(run_bulk(args))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume", file=sys.stderr)
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ os.makedirs("./outputs/images", exist_ok=True)
 os.makedirs("./outputs/audio", exist_ok=True)
 os.makedirs("./outputs/video", exist_ok=True)
 os.makedirs("./outputs/social_media", exist_ok=True)
+os.makedirs("./outputs/batch", exist_ok=True)
 
 # API configuration
 API_TITLE = "Mischievous Cat Shopper API"
@@ -17,3 +18,12 @@ CORS_ORIGINS = ["*"]  # In production, replace with specific origins
 CORS_CREDENTIALS = True
 CORS_METHODS = ["*"]
 CORS_HEADERS = ["*"]
+
+# Batch API settings
+ENABLE_FAKE_BATCH_API = os.getenv("ENABLE_FAKE_BATCH_API", "false").lower() == "true"
+
+# Artifact store settings
+ENABLE_FAKE_S3 = os.getenv("ENABLE_FAKE_S3", "false").lower() == "true"
+
+# Admin settings; the admin API is disabled unless a token is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
@@ -1,9 +1,10 @@
 import os
+import json
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
@@ -16,17 +17,30 @@ logger = logging.getLogger(__name__)
 # Import configuration
 from config import (
     API_TITLE, API_DESCRIPTION, API_VERSION,
-    CORS_ORIGINS, CORS_CREDENTIALS, CORS_METHODS, CORS_HEADERS
+    CORS_ORIGINS, CORS_CREDENTIALS, CORS_METHODS, CORS_HEADERS,
+    ENABLE_FAKE_BATCH_API, ENABLE_FAKE_S3, ADMIN_TOKEN
 )
 
+from agents.api_client import stream_text
+from agents.local_model import close_local_models, warm_up_local_model
+from agents.script_generator.generat_script_ import build_script_prompts
+from agents.client_pool import client_pool
+from agents.warm_pool import WARM_POOL_ENABLED, warm_pool
+from utils.artifact_store import artifact_store
+from utils.compression import CompressionMiddleware
+from utils.episode_index import EPISODE_DEDUP_ENABLED, episode_index
+from utils.plan_store import analytics_buffer
+from utils.profiler import PROFILER_ALWAYS_ON, ProfilerMiddleware, profiler
+
 # Import routers
-from routes import content, jobs, files
+from routes import content, jobs, files, batch, fake_batch, fake_s3, voiceover, images, video, social, routing, admin
 
 # Initialize FastAPI app
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
-    version=API_VERSION
+    version=API_VERSION,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -38,10 +52,34 @@ app.add_middleware(
     allow_headers=CORS_HEADERS,
 )
 
+# Compress large responses with brotli or gzip
+app.add_middleware(CompressionMiddleware)
+
+# Attribute profiler samples to endpoints while the profiler runs
+app.add_middleware(ProfilerMiddleware)
+
 # Include routers
 app.include_router(content.router)
 app.include_router(jobs.router)
 app.include_router(files.router)
+app.include_router(batch.router)
+app.include_router(voiceover.router)
+app.include_router(images.router)
+app.include_router(video.router)
+app.include_router(social.router)
+app.include_router(routing.router)
+
+# Profiler and admission controls, only with an admin token configured
+if ADMIN_TOKEN:
+    app.include_router(admin.router)
+
+# Local stand-in for the provider batch API, used for testing bulk mode
+if ENABLE_FAKE_BATCH_API:
+    app.include_router(fake_batch.router)
+
+# Local stand-in for an S3-compatible bucket, used for testing the s3 artifact backend
+if ENABLE_FAKE_S3:
+    app.include_router(fake_s3.router)
 
 # Custom exception handlers
 @app.exception_handler(StarletteHTTPException)
@@ -49,6 +87,7 @@ async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
 @app.exception_handler(RequestValidationError)
@@ -79,7 +118,7 @@ async def generate_script(request: ScriptGenerationRequest):
     - **episode**: Episode details including title, premise, setting, items, conflict, and resolution
     - **catName**: The name of the cat character
     - **contentStyle**: The style of content (e.g., "humorous, family-friendly")
-    - **apiProvider**: The AI provider to use (e.g., "openai", "huggingface")
+    - **apiProvider**: The AI provider to use (e.g., "openai", "huggingface", "local")
     - **apiKey**: Optional API key for the provider
     """
     try:
@@ -132,6 +171,41 @@ NARRATOR: "{resolution}"
         logger.error(f"Error generating script: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate script: {str(e)}")
 
+@app.post("/scripts/generate/stream", tags=["scripts"])
+async def stream_script(request: ScriptGenerationRequest):
+    """
+    Generate a script and stream it back as server-sent events while it is written
+
+    Each event carries {"token": ...}; the last one is {"done": true}, or
+    {"error": ...} if generation failed. The local provider streams token by
+    token; remote providers send the whole script as one token.
+    """
+    try:
+        system_message, prompt = build_script_prompts(request.episode, request.catName, request.contentStyle or "")
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Episode is missing {str(e)}")
+
+    async def event_stream():
+        try:
+            async for token in stream_text(
+                prompt=prompt,
+                system_message=system_message,
+                api_provider=request.apiProvider,
+                api_key=request.apiKey,
+                task="script"
+            ):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming script: {str(e)}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Mischievous Cat Shopper API"}
@@ -145,8 +219,34 @@ async def status():
 async def startup_event():
     logger.info("=== REGISTERED ROUTES ===")
     for route in app.routes:
-        logger.info(f"Route: {route.path}, methods: {route.methods}")
+        logger.info(f"Route: {route.path}, methods: {getattr(route, 'methods', None)}")
     logger.info("========================")
+    
+    # Load the local model up front so the first request doesn't pay for it
+    await warm_up_local_model()
+    
+    # Read the episode index off the event loop before the first plan needs it
+    if EPISODE_DEDUP_ENABLED:
+        await episode_index.load()
+    
+    # Keep plans for popular requests ready ahead of time
+    if WARM_POOL_ENABLED:
+        warm_pool.start()
+
+    # Low-rate sampling can stay on in production
+    if PROFILER_ALWAYS_ON:
+        profiler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    profiler.stop()
+    await warm_pool.stop()
+    await close_local_models()
+    # Write analytics rows still waiting in memory
+    await analytics_buffer.close()
+    # Close pooled provider connections
+    await client_pool.close()
+    await artifact_store.close()
 
 # Create __init__.py files in necessary directories
 def create_init_files():
@@ -0,0 +1,99 @@
+import json
+from typing import Dict, Any, List, Iterator
+
+import orjson
+from pydantic.dataclasses import dataclass
+
+# Keys that make a JSON object an episode while decoding
+EPISODE_KEYS = frozenset(("title", "premise", "setting", "items", "conflict", "resolution"))
+
+class RecordMixin:
+    """
+    Read access by key, so code written against plan dicts also takes records
+
+    Records are slotted dataclasses: no per-instance __dict__, validated once
+    when built and serialized by orjson directly.
+    """
+
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return orjson.loads(orjson.dumps(self))
+
+@dataclass(slots=True)
+class EpisodeRecord(RecordMixin):
+    """Compact counterpart of EpisodeIdea"""
+    title: str
+    premise: str
+    setting: str
+    items: List[str]
+    conflict: str
+    resolution: str
+
+@dataclass(slots=True)
+class ContentPlanRecord(RecordMixin):
+    """Compact counterpart of ContentPlan"""
+    series_concept: str
+    cat_personality: Dict[str, Any]
+    episodes: List[EpisodeRecord]
+
+def _decode_object(pairs: List[tuple]) -> Any:
+    # Called for each object as soon as its closing brace is read, innermost
+    # first, so episodes become records without an intermediate dict
+    if len(pairs) >= len(EPISODE_KEYS) and EPISODE_KEYS.issubset(key for key, _ in pairs):
+        return EpisodeRecord(**{key: value for key, value in pairs if key in EPISODE_KEYS})
+    return dict(pairs)
+
+_record_decoder = json.JSONDecoder(object_pairs_hook=_decode_object)
+
+def decode_content_plan(text: str) -> ContentPlanRecord:
+    """
+    Decode a content plan from model output straight into records
+
+    Decoding starts at the first brace and stops at the end of that JSON
+    value, so text around it is skipped without copying the JSON out first.
+    Raises ValueError when there is no JSON and pydantic's ValidationError when
+    the JSON is not a content plan.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("Failed to extract JSON from model response")
+    try:
+        plan, _ = _record_decoder.raw_decode(text, start)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse model response as JSON: {str(e)}")
+    return content_plan_record(plan)
+
+def content_plan_record(plan: Any) -> ContentPlanRecord:
+    """Validate a plan dict (or record) into a ContentPlanRecord"""
+    if isinstance(plan, ContentPlanRecord):
+        return plan
+    if not isinstance(plan, dict):
+        raise ValueError("Content plan must be a JSON object")
+    return ContentPlanRecord(
+        series_concept=plan.get("series_concept"),
+        cat_personality=plan.get("cat_personality"),
+        episodes=plan.get("episodes")
+    )
+
+def iter_content_plan_json(plan: ContentPlanRecord, chunk_episodes: int = 10) -> Iterator[bytes]:
+    """Serialize a plan a few episodes at a time, for writing to a file or a stream"""
+    yield b'{"series_concept":' + orjson.dumps(plan.series_concept)
+    yield b',"cat_personality":' + orjson.dumps(plan.cat_personality) + b',"episodes":['
+    for start in range(0, len(plan.episodes), chunk_episodes):
+        chunk = orjson.dumps(plan.episodes[start:start + chunk_episodes])
+        # Drop the list brackets and join chunks with commas
+        yield (b"," if start else b"") + chunk[1:-1]
+    yield b"]}"
@@ -57,3 +57,5 @@ class JobStatus(BaseModel):
     status: str
     progress: Optional[int] = None
     result_path: Optional[str] = None
+    completed_units: Optional[int] = None
+    total_units: Optional[int] = None
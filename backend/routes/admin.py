@@ -0,0 +1,89 @@
+import secrets
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from config import ADMIN_TOKEN
+from utils.admission import admission_controller
+from utils.profiler import profiler
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Only let requests carrying the ADMIN_TOKEN in X-Admin-Token through"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    responses={404: {"description": "Not found"}},
+)
+
+class ProfilerStartRequest(BaseModel):
+    interval: Optional[float] = Field(default=None, gt=0.0005, le=1.0)
+    allocations: bool = False
+    duration: Optional[float] = Field(default=None, gt=0, le=3600)
+
+@router.post("/profiler/start")
+async def start_profiler(request: ProfilerStartRequest):
+    """Start the sampling profiler, optionally stopping by itself after duration seconds"""
+    try:
+        profiler.start(interval=request.interval, allocations=request.allocations, duration=request.duration)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiler.status()
+
+@router.post("/profiler/stop")
+async def stop_profiler():
+    """Stop the profiler; its samples stay available until the next start"""
+    profiler.stop()
+    return profiler.status()
+
+@router.get("/profiler")
+async def get_profiler_status():
+    """Samples per endpoint, profiled sections and the sampler's own overhead"""
+    return profiler.status()
+
+@router.get("/profiler/flamegraph", response_class=PlainTextResponse)
+async def get_flamegraph(
+    kind: str = Query(default="cpu", pattern="^(cpu|alloc)$"),
+    endpoint: Optional[str] = None
+):
+    """
+    Collapsed stacks for flamegraph.pl or speedscope
+
+    - **kind**: cpu (sample counts) or alloc (bytes still held, needs allocations)
+    - **endpoint**: keep only stacks for this endpoint, e.g. generate_content_plan
+    """
+    if kind == "cpu":
+        return PlainTextResponse(profiler.collapsed(endpoint))
+    try:
+        return PlainTextResponse(profiler.allocation_collapsed(endpoint))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/profiler/capture", response_class=PlainTextResponse)
+async def capture_flamegraph(
+    seconds: float = Query(default=10.0, gt=0, le=300),
+    interval: Optional[float] = Query(default=None, gt=0.0005, le=1.0),
+    endpoint: Optional[str] = None
+):
+    """Profile the worker for a number of seconds and return the CPU collapsed stacks"""
+    try:
+        profiler.start(interval=interval)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    return PlainTextResponse(profiler.collapsed(endpoint))
+
+@router.get("/admission")
+async def get_admission_status():
+    """Capacity in use, queued cost and admitted, shed and timed-out requests per tenant"""
+    return admission_controller.snapshot()
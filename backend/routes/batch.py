@@ -0,0 +1,63 @@
+from fastapi import APIRouter, BackgroundTasks
+from pydantic import BaseModel, Field
+from typing import Optional, List
+import logging
+
+from agents.bulk_agent import run_bulk_content_plans, run_bulk_scripts
+from models.schemas import EpisodeIdea
+from utils.helpers import create_job, run_job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    responses={404: {"description": "Not found"}},
+)
+
+class BulkPlanConfig(BaseModel):
+    series_title: str = Field(default="Mischievous Cat Shopper")
+    num_episodes: int = Field(default=5, ge=1, le=100, description="Number of episodes (1-100)")
+    cat_name: str = Field(default="Whiskers")
+    content_style: str = Field(default="humorous, family-friendly")
+    theme: Optional[str] = Field(default=None)
+    setting: Optional[str] = Field(default=None)
+    target_audience: Optional[str] = Field(default=None)
+    additional_characters: Optional[str] = Field(default=None)
+    use_gpt4: bool = Field(default=False)
+
+class BulkContentPlanRequest(BaseModel):
+    plans: List[BulkPlanConfig] = Field(..., min_length=1)
+    api_key: Optional[str] = Field(default=None)
+
+class BulkScriptRequest(BaseModel):
+    episodes: List[EpisodeIdea] = Field(..., min_length=1)
+    cat_name: str = Field(default="Whiskers")
+    content_style: str = Field(default="humorous, family-friendly")
+    use_gpt4: bool = Field(default=False)
+    api_key: Optional[str] = Field(default=None)
+
+@router.post("/content-plans")
+async def create_bulk_content_plans(request: BulkContentPlanRequest, background_tasks: BackgroundTasks):
+    """Queue many content plans as one provider batch job"""
+    job_id = create_job("bulk_content_plans")
+    configs = [plan.model_dump() for plan in request.plans]
+    background_tasks.add_task(run_job, job_id, run_bulk_content_plans(job_id, configs, api_key=request.api_key))
+    logger.info(f"Queued bulk content plan job {job_id} with {len(configs)} plans")
+    return {"job_id": job_id, "status": "pending"}
+
+@router.post("/scripts")
+async def create_bulk_scripts(request: BulkScriptRequest, background_tasks: BackgroundTasks):
+    """Queue scripts for many episodes as one provider batch job"""
+    job_id = create_job("bulk_scripts")
+    episodes = [episode.model_dump() for episode in request.episodes]
+    background_tasks.add_task(run_job, job_id, run_bulk_scripts(
+        job_id,
+        episodes,
+        cat_name=request.cat_name,
+        content_style=request.content_style,
+        use_gpt4=request.use_gpt4,
+        api_key=request.api_key
+    ))
+    logger.info(f"Queued bulk script job {job_id} with {len(episodes)} episodes")
+    return {"job_id": job_id, "status": "pending"}
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel, Field
+import os
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from pydantic import BaseModel, Field, ValidationError
 from typing import Dict, Any, Optional, List
 import logging
 
 # Import the content agent functionality
 from agents.content_plan_agent.content_agent import generate_content_ideas
+from agents.warm_pool import WARM_POOL_ENABLED, warm_pool
+from models.records import ContentPlanRecord, content_plan_record, iter_content_plan_json
+from models.schemas import ContentPlan
+from utils.responses import ValidatedJSONResponse, spooled_json_response
+from utils.request_context import request_context
+from utils.admission import admission
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Plans with at least this many episodes are streamed from a spool instead of
+# being serialized into one response body
+PLAN_STREAM_MIN_EPISODES = int(os.getenv("PLAN_STREAM_MIN_EPISODES", "50"))
+
 router = APIRouter(
     prefix="/content",
     tags=["content"],
@@ -26,11 +37,21 @@ class ContentPlanRequest(BaseModel):
     target_audience: Optional[str] = Field(default=None)
     additional_characters: Optional[str] = Field(default=None)
     api_key: Optional[str] = Field(default=None)
-    api_provider: str = Field(default="openai", description="API provider (e.g., 'openai', 'huggingface')")
+    api_provider: str = Field(default="openai", description="API provider (e.g., 'openai', 'huggingface', 'local')")
     use_gpt4: bool = Field(default=False)
 
-@router.post("/generate-plan")
-async def create_content_plan(request: ContentPlanRequest):
+def plan_response(plan: ContentPlanRecord, http_request: Request):
+    """Send a validated plan, streaming large ones a few episodes at a time"""
+    if len(plan.episodes) >= PLAN_STREAM_MIN_EPISODES:
+        return spooled_json_response(iter_content_plan_json(plan), http_request.headers.get("accept-encoding", ""))
+    return ValidatedJSONResponse(plan)
+
+@router.post(
+    "/generate-plan",
+    response_model=ContentPlan,
+    dependencies=[admission(lambda body: body.get("num_episodes", 5))]
+)
+async def create_content_plan(request: ContentPlanRequest, http_request: Request):
     """Generate a content plan for the Mischievous Cat Shopper series"""
     try:
         logger.info(f"Received content plan request for '{request.series_title}' using {request.api_provider}")
@@ -50,13 +71,33 @@ async def create_content_plan(request: ContentPlanRequest):
             "api_provider": request.api_provider  # Pass the provider to the agent
         }
         
+        # Popular requests are answered from plans generated ahead of time
+        if WARM_POOL_ENABLED:
+            pooled_plan = warm_pool.take(config)
+            if pooled_plan is not None:
+                logger.info("Content plan served from the warm pool")
+                return plan_response(pooled_plan, http_request)
+        
         # Generate content plan
-        content_plan = await generate_content_ideas(config)
+        # Credentials travel with this request only, never through process-wide state
+        with request_context(api_provider=request.api_provider, api_key=request.api_key, use_gpt4=request.use_gpt4):
+            content_plan = await generate_content_ideas(config)
+        
+        # The agent validated the plan into records, so FastAPI doesn't validate it again
+        content_plan = content_plan_record(content_plan)
         logger.info("Content plan generated successfully")
-        return content_plan
+        return plan_response(content_plan, http_request)
+    except ValidationError as e:
+        logger.error(f"Invalid content plan from {request.api_provider}: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Provider returned an invalid content plan: {str(e)}")
     except ValueError as e:
         logger.error(f"Value error in create_content_plan: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error in create_content_plan: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating content plan: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating content plan: {str(e)}")
+
+@router.get("/warm-pool")
+async def get_warm_pool():
+    """Popular request signatures and how many pre-generated plans are ready for each"""
+    return warm_pool.snapshot()
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import uuid
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
+
+# Local stand-in for the OpenAI Files + Batches API.
+# Point OPENAI_BATCH_BASE_URL at http://localhost:8000/fake-openai/v1 to use it.
+router = APIRouter(prefix="/fake-openai/v1", tags=["fake-batch"])
+
+# In-memory stores for uploaded files and batches
+files = {}
+batches = {}
+
+SAMPLE_CONTENT_PLAN = "./outputs/content_plan.json"
+SAMPLE_SCRIPT = "./outputs/episode1_script.txt"
+
+class BatchCreateRequest(BaseModel):
+    input_file_id: str
+    endpoint: str
+    completion_window: str
+    metadata: Optional[Dict[str, str]] = None
+
+def _read_sample(path: str, fallback: str) -> str:
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return f.read()
+    return fallback
+
+def _fake_completion(body: Dict[str, Any]) -> str:
+    """Return a canned completion based on the kind of prompt"""
+    prompt = body["messages"][-1]["content"]
+    if "JSON object" in prompt:
+        return _read_sample(SAMPLE_CONTENT_PLAN, '{"series_concept": "", "cat_personality": {}, "episodes": []}')
+    return _read_sample(SAMPLE_SCRIPT, "[SCENE 1 - STORE - 0:00-1:00]\nNARRATOR: \"Whiskers goes shopping.\"")
+
+def _store_file(content: str) -> str:
+    file_id = f"file-{uuid.uuid4().hex}"
+    files[file_id] = content
+    return file_id
+
+@router.post("/files")
+async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+    """Store an uploaded batch input file"""
+    content = (await file.read()).decode("utf-8")
+    file_id = _store_file(content)
+    return {"id": file_id, "object": "file", "purpose": purpose, "bytes": len(content)}
+
+@router.post("/batches")
+async def create_batch(request: BatchCreateRequest):
+    """Create a batch and complete it immediately with canned responses"""
+    if request.input_file_id not in files:
+        raise HTTPException(status_code=404, detail="Input file not found")
+
+    output_lines = []
+    for line in files[request.input_file_id].splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        output_lines.append(json.dumps({
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": item["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "model": item["body"].get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": _fake_completion(item["body"])}}]
+                }
+            },
+            "error": None
+        }))
+
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": request.endpoint,
+        "input_file_id": request.input_file_id,
+        "completion_window": request.completion_window,
+        "status": "completed",
+        "output_file_id": _store_file("\n".join(output_lines)),
+        "error_file_id": None,
+        "created_at": int(time.time()),
+        "request_counts": {"total": len(output_lines), "completed": len(output_lines), "failed": 0},
+        "metadata": request.metadata or {}
+    }
+    return batches[batch_id]
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Get the status of a batch"""
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batches[batch_id]
+
+@router.get("/files/{file_id}/content", response_class=PlainTextResponse)
+async def get_file_content(file_id: str):
+    """Download the content of a stored file"""
+    if file_id not in files:
+        raise HTTPException(status_code=404, detail="File not found")
+    return files[file_id]
@@ -0,0 +1,66 @@
+import os
+import json
+import uuid
+import hashlib
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+# Local stand-in for an S3-compatible object store, for the s3 artifact backend.
+# Set ARTIFACT_S3_ENDPOINT to http://localhost:8000/fake-s3 to use it; request
+# signatures are not checked. Each object's ETag (the MD5 of its body, as S3
+# gives for single-part uploads) and x-amz-meta-* headers are kept beside it
+# under .meta, which no bucket name can start with.
+router = APIRouter(prefix="/fake-s3", tags=["fake-s3"])
+
+FAKE_S3_DIR = "./fake_s3"
+
+def _object_path(bucket: str, key: str, meta: bool = False) -> str:
+    if bucket.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid bucket name")
+    root = os.path.realpath(FAKE_S3_DIR)
+    path = os.path.realpath(os.path.join(root, bucket, key))
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(status_code=400, detail="Invalid object key")
+    if meta:
+        return os.path.join(root, ".meta", os.path.relpath(path, root) + ".json")
+    return path
+
+def _replace(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+@router.put("/{bucket}/{key:path}")
+async def put_object(bucket: str, key: str, request: Request):
+    """Store an object; it replaces any previous version in one step"""
+    path = _object_path(bucket, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    digest = hashlib.md5()
+    with open(tmp_path, "wb") as f:
+        async for chunk in request.stream():
+            digest.update(chunk)
+            f.write(chunk)
+    etag = f'"{digest.hexdigest()}"'
+    headers = {name: value for name, value in request.headers.items() if name.startswith("x-amz-meta-")}
+    # The object is replaced before its metadata, so a reader in between sees the
+    # old ETag for a moment, never the new ETag with the old body
+    os.replace(tmp_path, path)
+    _replace(_object_path(bucket, key, meta=True), json.dumps({"etag": etag, "headers": headers}).encode())
+    return Response(status_code=200, headers={"ETag": etag})
+
+@router.api_route("/{bucket}/{key:path}", methods=["GET", "HEAD"])
+async def get_object(bucket: str, key: str):
+    """Return an object, or only its headers for HEAD"""
+    path = _object_path(bucket, key)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="NoSuchKey")
+    try:
+        with open(_object_path(bucket, key, meta=True), "rb") as f:
+            meta = json.loads(f.read())
+        headers = {"ETag": meta["etag"], **meta["headers"]}
+    except FileNotFoundError:
+        headers = None
+    return FileResponse(path, media_type="application/octet-stream", headers=headers)
@@ -1,27 +1,68 @@
-import os
-import json
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from utils.artifact_store import ARTIFACT_MMAP_MIN_SIZE, artifact_store
+from utils.compression import COMPRESSION_MIN_SIZE, choose_encoding, encoded_etag, matching_etag
 
 router = APIRouter(tags=["files"])
 
+async def _artifact_response(key: str, size: int, headers: dict) -> Response:
+    # Large artifacts are streamed in chunks rather than read into memory first
+    if size >= ARTIFACT_MMAP_MIN_SIZE:
+        # The length is that of the version opened, which may be newer than the one stat()ed
+        length, chunks = await artifact_store.open_chunks(key)
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(chunks, media_type="application/json", headers=headers)
+    return Response(content=await artifact_store.read(key), media_type="application/json", headers=headers)
+
 @router.get("/outputs/{file_path:path}")
-async def get_file(file_path: str):
+async def get_file(file_path: str, request: Request):
     """Serve files from the outputs directory"""
     try:
-        file_full_path = os.path.join("./outputs", file_path)
-        if not os.path.exists(file_full_path):
+        try:
+            stat = await artifact_store.stat(file_path)
+        except ValueError:
+            stat = None
+        if stat is None:
             raise HTTPException(status_code=404, detail="File not found")
 
+        # JSON and text files can be revalidated with If-None-Match
+        if file_path.endswith((".json", ".txt")):
+            etag = stat.etag
+            matched = matching_etag(request.headers.get("if-none-match"), etag)
+            if matched:
+                # A 304 repeats the validator the client holds, e.g. the "-br" variant of a sidecar
+                headers = {"ETag": matched, "Cache-Control": "no-cache"}
+                if file_path.endswith(".json"):
+                    headers["Vary"] = "Accept-Encoding"
+                return Response(status_code=304, headers=headers)
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
         # For JSON files, return the JSON content
         if file_path.endswith(".json"):
-            with open(file_full_path, 'r') as f:
-                return json.load(f)
+            # The file is already JSON, so it is sent as stored, from a precompressed
+            # sidecar when the client accepts one
+            encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+            if encoding and stat.size >= COMPRESSION_MIN_SIZE:
+                sidecar_key = await artifact_store.sidecar(file_path, encoding)
+                sidecar_stat = await artifact_store.stat(sidecar_key)
+                if sidecar_stat is None:
+                    # Replaced by a newer version's sidecar in the meantime
+                    sidecar_key = await artifact_store.sidecar(file_path, encoding)
+                    sidecar_stat = await artifact_store.stat(sidecar_key)
+                headers.update({
+                    "ETag": encoded_etag(etag, encoding),
+                    "Content-Encoding": encoding,
+                    "Vary": "Accept-Encoding"
+                })
+                return await _artifact_response(sidecar_key, sidecar_stat.size, headers)
+
+            return await _artifact_response(file_path, stat.size, headers)
 
         # For text files, return the text content
         if file_path.endswith(".txt"):
-            with open(file_full_path, 'r') as f:
-                content = f.read()
-            return {"content": content}
+            content = await artifact_store.read_text(file_path)
+            return Response(content=orjson.dumps({"content": content}), media_type="application/json", headers=headers)
 
         # For other files, return a message (in a real app, you'd serve the file)
         return {
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, BackgroundTasks
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import logging
+
+from agents.image_agent.image_agent import generate_images
+from models.schemas import VisualPrompt
+from utils.helpers import create_job, run_job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/images",
+    tags=["images"],
+    responses={404: {"description": "Not found"}},
+)
+
+class ImageGenerationRequest(BaseModel):
+    scenes: List[VisualPrompt] = Field(..., min_length=1)
+    episode_id: str = Field(default="episode1", pattern=r"^[A-Za-z0-9_-]+$")
+    provider: str = Field(default="huggingface", description="Image provider ('huggingface' or 'local')")
+    seed: int = Field(default=42)
+    api_key: Optional[str] = Field(default=None)
+
+@router.post("/generate")
+async def create_images(request: ImageGenerationRequest, background_tasks: BackgroundTasks):
+    """Render all scenes of an episode from their visual prompts as a background job"""
+    job_id = create_job("images")
+    background_tasks.add_task(run_job, job_id, generate_images(
+        request.scenes,
+        request.episode_id,
+        provider=request.provider,
+        seed=request.seed,
+        api_key=request.api_key,
+        job_id=job_id
+    ))
+    logger.info(f"Queued image job {job_id} for {request.episode_id} with {len(request.scenes)} scenes")
+    return {"job_id": job_id, "status": "pending"}
@@ -1,19 +1,96 @@
-from fastapi import APIRouter, HTTPException
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from models.schemas import JobStatus
-from utils.helpers import jobs
+from utils.helpers import jobs, job_snapshot
+from utils.job_events import job_events, Subscription, FINAL_JOB_STATES
 
 router = APIRouter(tags=["jobs"])
 
+# Seconds between keep-alive comments on idle SSE streams
+SSE_HEARTBEAT_INTERVAL = 15
+
 @router.get("/jobs/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str):
     """Get the status of a background job"""
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = jobs[job_id]
-    return {
-        "job_id": job_id,
-        "status": job["status"],
-        "progress": job["progress"],
-        "result_path": job["result_path"]
-    }
+    return job_snapshot(job_id)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job status updates as server-sent events until the job finishes"""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        subscription = Subscription(asyncio.get_running_loop())
+        job_events.subscribe(subscription, job_id)
+        try:
+            snapshot = job_snapshot(job_id)
+            yield f"data: {json.dumps(snapshot)}\n\n"
+            while snapshot["status"] not in FINAL_JOB_STATES:
+                updates = await subscription.next_updates(timeout=SSE_HEARTBEAT_INTERVAL)
+                if not updates:
+                    yield ": keep-alive\n\n"
+                    continue
+                snapshot = updates[-1]
+                yield f"data: {json.dumps(snapshot)}\n\n"
+        finally:
+            job_events.close(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/jobs/ws")
+async def job_events_websocket(websocket: WebSocket):
+    """
+    Push status updates for many jobs over one connection
+
+    Send {"subscribe": [job_id, ...]} or {"unsubscribe": [job_id, ...]}; every
+    update is pushed as a job status object. Malformed messages get an
+    {"error": ...} reply and the connection stays open.
+    """
+    await websocket.accept()
+    subscription = Subscription(asyncio.get_running_loop())
+
+    async def receive_commands():
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                await websocket.send_json({"error": "Message is not valid JSON"})
+                continue
+            if not isinstance(message, dict) or not all(
+                isinstance(message.get(command, []), list) and all(isinstance(job_id, str) for job_id in message.get(command, []))
+                for command in ("subscribe", "unsubscribe")
+            ):
+                await websocket.send_json({"error": 'Expected {"subscribe": [job_id, ...]} or {"unsubscribe": [job_id, ...]}'})
+                continue
+
+            for job_id in message.get("unsubscribe", []):
+                job_events.unsubscribe(subscription, job_id)
+            for job_id in message.get("subscribe", []):
+                if job_id not in jobs:
+                    await websocket.send_json({"job_id": job_id, "error": "Job not found"})
+                    continue
+                job_events.subscribe(subscription, job_id)
+                await websocket.send_json(job_snapshot(job_id))
+
+    receiver = asyncio.create_task(receive_commands())
+    try:
+        while not receiver.done():
+            for snapshot in await subscription.next_updates(timeout=1):
+                await websocket.send_json(snapshot)
+        receiver.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        job_events.close(subscription)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+
+from agents.model_router import model_router
+from agents.script_generator.generat_script_ import speculative_stats
+
+router = APIRouter(
+    prefix="/models",
+    tags=["models"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/routing")
+async def get_model_routing():
+    """Model catalog, task policies and the live latency, error and cost statistics"""
+    return model_router.snapshot()
+
+@router.get("/decisions")
+async def get_routing_decisions(limit: int = Query(default=50, ge=1, le=500)):
+    """Most recent routing decisions, newest first"""
+    return {"decisions": list(model_router.decisions)[-limit:][::-1]}
+
+@router.get("/speculative-scripts")
+async def get_speculative_script_stats():
+    """How many speculative script drafts were kept or upgraded, and the latency saved"""
+    return speculative_stats.summary()
@@ -1,6 +1,6 @@
 import logging
 from fastapi import APIRouter, HTTPException, Body, Depends
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
 from backend.agents.script_generator.generat_script_ import generate_script
@@ -14,6 +14,7 @@ class ScriptRequest(BaseModel):
     content_style: str
     api_provider: Optional[str] = "openai"
     api_key: Optional[str] = None
+    catchphrases: Optional[List[str]] = None
 
 class ScriptResponse(BaseModel):
     script: str
@@ -29,7 +30,8 @@ async def generate_script_route(request: ScriptRequest = Body(...)):
             cat_name=request.cat_name,
             content_style=request.content_style,
             api_provider=request.api_provider,
-            api_key=request.api_key
+            api_key=request.api_key,
+            catchphrases=request.catchphrases
         )
         
         return ScriptResponse(script=script)
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional, List
+from datetime import date
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import os
+import asyncio
+import logging
+
+from agents.social_media_agent.social_media_agent import SOCIAL_OUTPUT_DIR, generate_social_media_plans, run_season_social_media_plans
+from agents.social_media_agent.posting_scheduler import build_posting_calendar, calendar_to_ical
+from models.schemas import SocialMediaPlan
+from utils.artifact_store import artifact_key, artifact_store
+from utils.responses import ValidatedJSONResponse
+from utils.helpers import create_job, run_job
+from utils.admission import admission
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/social",
+    tags=["social"],
+    responses={404: {"description": "Not found"}},
+)
+
+class SocialMediaRequest(BaseModel):
+    episodes: List[Dict[str, Any]] = Field(..., min_length=1, max_length=20)
+    platforms: Optional[List[str]] = Field(default=None, description="Defaults to TikTok, Instagram, YouTube Shorts and Twitter")
+    cat_name: str = Field(default="Whiskers")
+    series_title: str = Field(default="Mischievous Cat Shopper")
+    api_provider: str = Field(default="openai", description="API provider (e.g., 'openai', 'huggingface', 'local')")
+    api_key: Optional[str] = Field(default=None)
+
+class SeasonSocialMediaRequest(SocialMediaRequest):
+    episodes: List[Dict[str, Any]] = Field(..., min_length=1, max_length=500)
+    season_id: str = Field(default="season1", pattern=r"^[A-Za-z0-9_-]+$")
+
+class SocialMediaPlansResponse(BaseModel):
+    plans: List[SocialMediaPlan]
+
+class PostingScheduleRequest(BaseModel):
+    season_id: str = Field(default="season1", pattern=r"^[A-Za-z0-9_-]+$")
+    start_date: date
+    episode_interval_days: int = Field(default=1, ge=1)
+    timezone: str = Field(default="UTC", description="IANA timezone for the posting times")
+    series_title: str = Field(default="Mischievous Cat Shopper")
+    format: str = Field(default="json", pattern=r"^(json|ical)$")
+
+@router.post(
+    "/generate",
+    response_model=SocialMediaPlansResponse,
+    dependencies=[admission(lambda body: len(body.get("episodes") or []))]
+)
+async def create_social_media_plans(request: SocialMediaRequest):
+    """Generate social media plans for a few episodes and return them directly"""
+    try:
+        plans = await generate_social_media_plans(
+            request.episodes,
+            platforms=request.platforms,
+            cat_name=request.cat_name,
+            series_title=request.series_title,
+            api_provider=request.api_provider,
+            api_key=request.api_key
+        )
+        # Plans are built from validated SocialMediaPlan models
+        return ValidatedJSONResponse({"plans": plans})
+    except ValueError as e:
+        logger.error(f"Value error in create_social_media_plans: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error in create_social_media_plans: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating social media plans: {str(e)}")
+
+@router.post("/generate-season")
+async def create_season_social_media_plans(request: SeasonSocialMediaRequest, background_tasks: BackgroundTasks):
+    """Generate social media plans for a whole season as a background job"""
+    job_id = create_job("social_media")
+    background_tasks.add_task(run_job, job_id, run_season_social_media_plans(
+        job_id,
+        request.season_id,
+        request.episodes,
+        platforms=request.platforms,
+        cat_name=request.cat_name,
+        series_title=request.series_title,
+        api_provider=request.api_provider,
+        api_key=request.api_key
+    ))
+    logger.info(f"Queued social media job {job_id} for {len(request.episodes)} episodes")
+    return {"job_id": job_id, "status": "pending"}
+
+async def _load_season_plans(season_id: str):
+    manifest = await artifact_store.read_json(artifact_key(os.path.join(SOCIAL_OUTPUT_DIR, season_id, "manifest.json")))
+    if manifest is None:
+        raise HTTPException(status_code=404, detail=f"No social media plans for season {season_id}")
+    if manifest.get("status") == "partial":
+        raise HTTPException(status_code=409, detail=f"Social media plans for season {season_id} are still being generated")
+
+    plans = await asyncio.gather(*[
+        artifact_store.read_json(artifact_key(entry["path"])) for entry in manifest["episodes"]
+    ])
+    titles = [entry.get("title") for entry in manifest["episodes"]]
+    return list(plans), titles
+
+@router.post("/schedule")
+async def create_posting_schedule(request: PostingScheduleRequest):
+    """Turn a season's social media plans into a posting calendar"""
+    try:
+        ZoneInfo(request.timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {request.timezone}")
+
+    plans, titles = await _load_season_plans(request.season_id)
+    calendar = build_posting_calendar(
+        plans,
+        request.start_date,
+        episode_interval_days=request.episode_interval_days,
+        timezone_name=request.timezone,
+        titles=titles
+    )
+    ical = calendar_to_ical(calendar, request.season_id, request.series_title)
+
+    season_dir = os.path.join(SOCIAL_OUTPUT_DIR, request.season_id)
+    await asyncio.gather(
+        artifact_store.write_json(
+            artifact_key(os.path.join(season_dir, "calendar.json")),
+            {"season_id": request.season_id, "timezone": request.timezone, "posts": calendar}
+        ),
+        artifact_store.write_text(artifact_key(os.path.join(season_dir, "calendar.ics")), ical)
+    )
+
+    if request.format == "ical":
+        return Response(content=ical, media_type="text/calendar")
+    return {"season_id": request.season_id, "timezone": request.timezone, "posts": calendar}
+
+@router.get("/calendar/{season_id}.ics")
+async def get_posting_calendar_feed(season_id: str):
+    """Serve the last generated posting calendar as a subscribable iCal feed"""
+    path = os.path.join(SOCIAL_OUTPUT_DIR, os.path.basename(season_id), "calendar.ics")
+    ical = await artifact_store.read(artifact_key(path))
+    if ical is None:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    return Response(content=ical, media_type="text/calendar")
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, BackgroundTasks
+from pydantic import BaseModel, Field
+import logging
+
+from agents.video_agent.video_agent import generate_video
+from utils.helpers import create_job, run_job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/video",
+    tags=["video"],
+    responses={404: {"description": "Not found"}},
+)
+
+class VideoAssemblyRequest(BaseModel):
+    script: str
+    episode_id: str = Field(default="episode1", pattern=r"^[A-Za-z0-9_-]+$")
+    preset: str = Field(default="fast", description="Encoding preset ('draft', 'fast' or 'standard')")
+
+@router.post("/assemble")
+async def assemble_video(request: VideoAssemblyRequest, background_tasks: BackgroundTasks):
+    """Assemble an episode video from its generated images and voiceover as a background job"""
+    job_id = create_job("video")
+    background_tasks.add_task(run_job, job_id, generate_video(
+        request.script,
+        request.episode_id,
+        preset=request.preset,
+        job_id=job_id
+    ))
+    logger.info(f"Queued video job {job_id} for {request.episode_id}")
+    return {"job_id": job_id, "status": "pending"}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, BackgroundTasks
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional
+import logging
+
+from agents.voiceover_agent.voiceover_agent import generate_voiceover
+from utils.helpers import create_job, run_job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/voiceover",
+    tags=["voiceover"],
+    responses={404: {"description": "Not found"}},
+)
+
+class VoiceoverRequest(BaseModel):
+    script: str
+    episode_id: str = Field(default="episode1", pattern=r"^[A-Za-z0-9_-]+$")
+    voice_id: Optional[str] = Field(default=None)
+    voice_settings: Optional[Dict[str, Any]] = Field(default=None)
+    provider: str = Field(default="elevenlabs", description="Voiceover provider ('elevenlabs' or 'offline')")
+    api_key: Optional[str] = Field(default=None)
+
+@router.post("/generate")
+async def create_voiceover(request: VoiceoverRequest, background_tasks: BackgroundTasks):
+    """Synthesize the narration of a script as a background job"""
+    job_id = create_job("voiceover")
+    background_tasks.add_task(run_job, job_id, generate_voiceover(
+        request.script,
+        request.episode_id,
+        voice_id=request.voice_id,
+        voice_settings=request.voice_settings,
+        provider=request.provider,
+        api_key=request.api_key,
+        job_id=job_id
+    ))
+    logger.info(f"Queued voiceover job {job_id} for {request.episode_id}")
+    return {"job_id": job_id, "status": "pending"}
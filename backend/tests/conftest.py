@@ -0,0 +1,52 @@
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+
+from utils.artifact_store import LocalArtifactStore
+
+# Modules that hold a reference to the shared artifact store
+STORE_MODULES = ("utils.checkpoints", "agents.bulk_agent")
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A local artifact store in a temporary directory, in place of the shared one"""
+    monkeypatch.chdir(tmp_path)
+    local_store = LocalArtifactStore(str(tmp_path / "outputs"))
+    for module in STORE_MODULES:
+        monkeypatch.setattr(f"{module}.artifact_store", local_store)
+    return local_store
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def serve():
+    """Start routers on a real local server, the way the stand-ins are meant to be used; returns its base URL"""
+    servers = []
+
+    def start(*routers) -> str:
+        app = FastAPI()
+        for router in routers:
+            app.include_router(router)
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Test server did not start")
+            time.sleep(0.01)
+        servers.append((server, thread))
+        return f"http://127.0.0.1:{port}"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(5)
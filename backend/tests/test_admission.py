@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from utils import admission
+from utils.admission import AdmissionController, AdmissionRejected, request_cost, tenant_for
+
+def test_request_cost_grows_with_episodes():
+    assert request_cost(0) == 1.0
+    assert request_cost(20) > request_cost(5) > request_cost(0)
+
+def test_quiet_tenant_is_not_stuck_behind_noisy_one():
+    controller = AdmissionController(capacity=2, tenant_concurrency=2, tenant_queue=10, max_queue=100, max_wait=5, weights={})
+    order = []
+
+    async def request(tenant: str, number: int):
+        async with controller.slot(tenant):
+            order.append((tenant, number))
+            await asyncio.sleep(0.01)
+
+    async def run():
+        noisy = [asyncio.create_task(request("noisy", number)) for number in range(6)]
+        await asyncio.sleep(0)
+        quiet = asyncio.create_task(request("quiet", 0))
+        await asyncio.gather(*noisy, quiet)
+
+    asyncio.run(run())
+    # Ahead of the rest of the noisy backlog, not after all of it
+    assert order.index(("quiet", 0)) < order.index(("noisy", 3))
+    assert controller.in_use == 0
+    assert not controller.running and not controller.queued
+
+def test_full_tenant_queue_is_shed_with_retry_after():
+    controller = AdmissionController(capacity=1, tenant_concurrency=1, tenant_queue=1, max_queue=100, max_wait=5, weights={})
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot("a"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot("a"):
+                pass
+        release.set()
+        await asyncio.gather(holder, queued)
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert rejected.retry_after >= 1
+    assert controller.stats["a"]["shed"] == 1
+    assert controller.stats["a"]["admitted"] == 2
+
+def test_waiting_too_long_times_out():
+    controller = AdmissionController(capacity=1, tenant_concurrency=1, tenant_queue=5, max_queue=100, max_wait=0.05, weights={})
+
+    async def run():
+        async with controller.slot("a"):
+            with pytest.raises(AdmissionRejected, match="Timed out"):
+                async with controller.slot("b"):
+                    pass
+
+    asyncio.run(run())
+    assert controller.stats["b"]["timed_out"] == 1
+    assert controller.queued_cost == 0
+    assert controller.in_use == 0
+
+def make_request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("10.0.0.7", 4321),
+    })
+
+def test_tenant_header_is_only_trusted_when_configured(monkeypatch):
+    request = make_request({"X-Tenant-ID": "rotating-1"})
+    assert tenant_for(request) == "ip:10.0.0.7"
+    assert tenant_for(request, "sk-test").startswith("key:")
+
+    monkeypatch.setattr(admission, "ADMISSION_TENANT_HEADER", "X-Tenant-ID")
+    assert tenant_for(request, "sk-test") == "tenant:rotating-1"
+    assert tenant_for(make_request({})) == "ip:10.0.0.7"
@@ -0,0 +1,148 @@
+import os
+import gzip
+import asyncio
+
+import pytest
+
+from routes import fake_s3
+from utils import artifact_store as artifact_store_module
+from utils.artifact_store import LocalArtifactStore, S3ArtifactStore, artifact_key
+
+async def _collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+def test_artifact_key_is_relative_to_outputs():
+    assert artifact_key("./outputs/images/ep1/manifest.json") == "images/ep1/manifest.json"
+    with pytest.raises(ValueError):
+        artifact_key("./elsewhere/file.json")
+
+def test_local_round_trip_leaves_no_temp_files(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+
+    async def run():
+        await store.write_json("plans/plan.json", {"episodes": [1, 2]})
+        await store.write("plans/parts.txt", [b"a", b"b", b"c"])
+        return await store.read_json("plans/plan.json"), await store.read_text("plans/parts.txt"), await store.stat("plans/missing.json")
+
+    plan, parts, missing = asyncio.run(run())
+    assert plan == {"episodes": [1, 2]}
+    assert parts == "abc"
+    assert missing is None
+    assert sorted(os.listdir(tmp_path / "plans")) == ["parts.txt", "plan.json"]
+
+def test_local_keys_cannot_escape_the_root(tmp_path):
+    store = LocalArtifactStore(str(tmp_path / "outputs"))
+    with pytest.raises(ValueError):
+        asyncio.run(store.read("../secret.json"))
+
+def test_local_large_files_stream_through_mmap(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store_module, "ARTIFACT_MMAP_MIN_SIZE", 16)
+    store = LocalArtifactStore(str(tmp_path))
+    data = bytes(range(256)) * 40
+
+    async def run():
+        await store.write("big.bin", data)
+        return await _collect(store.iter_chunks("big.bin", chunk_size=1000))
+
+    streamed = asyncio.run(run())
+    assert streamed == data
+
+def test_local_open_chunks_keeps_the_opened_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store_module, "ARTIFACT_MMAP_MIN_SIZE", 16)
+    store = LocalArtifactStore(str(tmp_path))
+    data = b"a" * 4000
+
+    async def run():
+        await store.write("plan.json", data)
+        size, chunks = await store.open_chunks("plan.json", chunk_size=1000)
+        # Replaced atomically after it was opened, as plans and manifests are
+        await store.write("plan.json", b"b" * 100)
+        return size, await _collect(chunks)
+
+    size, streamed = asyncio.run(run())
+    assert size == len(streamed) == len(data)
+    assert streamed == data
+
+def test_sidecar_is_refreshed_when_source_changes(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+
+    async def run():
+        await store.write_json("plan.json", {"version": 1})
+        first = await store.sidecar("plan.json", "gzip")
+        first_data = await store.read(first)
+        await store.write_json("plan.json", {"version": 2, "padding": "x" * 100})
+        second = await store.sidecar("plan.json", "gzip")
+        return first, first_data, second, await store.read(second), await store.sidecar("plan.json", "gzip")
+
+    first, first_data, second, second_data, again = asyncio.run(run())
+    assert first != second == again
+    assert gzip.decompress(second_data) == (tmp_path / "plan.json").read_bytes()
+    assert first_data != second_data
+    # The old version's sidecar is removed once the new one is written
+    assert sorted(os.listdir(tmp_path)) == ["plan.json", second]
+
+def test_sidecar_written_late_is_not_served_for_a_newer_version(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+
+    async def run():
+        await store.write_json("plan.json", {"version": 1})
+        old_sidecar = await store.sidecar("plan.json", "gzip")
+        stale = await store.read(old_sidecar)
+        await store.write_json("plan.json", {"version": 2})
+        # A compression of version 1 that finishes after version 2 was written
+        await store.write(old_sidecar, stale)
+        return await store.read(await store.sidecar("plan.json", "gzip"))
+
+    served = asyncio.run(run())
+    assert gzip.decompress(served) == (tmp_path / "plan.json").read_bytes()
+
+def test_s3_store_against_fake_s3(serve, tmp_path, monkeypatch):
+    monkeypatch.setattr(fake_s3, "FAKE_S3_DIR", str(tmp_path / "bucket"))
+    endpoint = serve(fake_s3.router) + "/fake-s3"
+    store = S3ArtifactStore(endpoint=endpoint, bucket="artifacts", prefix="test", access_key="key", secret_key="secret")
+    data = b"x" * 5000
+
+    async def run():
+        try:
+            await store.write_json("plans/plan.json", {"episodes": [1]})
+            await store.write("plans/big.bin", [data[:2500], data[2500:]])
+            return (
+                await store.read_json("plans/plan.json"),
+                await store.stat("plans/big.bin"),
+                await store.read("plans/missing.json"),
+                await _collect(store.iter_chunks("plans/big.bin", chunk_size=1024))
+            )
+        finally:
+            await store.close()
+
+    plan, stat, missing, streamed = asyncio.run(run())
+    assert plan == {"episodes": [1]}
+    assert stat.size == len(data)
+    assert missing is None
+    assert streamed == data
+    assert (tmp_path / "bucket" / "artifacts" / "test" / "plans" / "plan.json").exists()
+
+def test_s3_sidecar_is_refreshed_within_the_same_second(serve, tmp_path, monkeypatch):
+    monkeypatch.setattr(fake_s3, "FAKE_S3_DIR", str(tmp_path / "bucket"))
+    endpoint = serve(fake_s3.router) + "/fake-s3"
+    store = S3ArtifactStore(endpoint=endpoint, bucket="artifacts", access_key="key", secret_key="secret")
+
+    async def run():
+        try:
+            await store.write_json("manifest.json", {"completed": 1})
+            first_stat = await store.stat("manifest.json")
+            first = await store.read(await store.sidecar("manifest.json", "gzip"))
+            # Same size, and well within Last-Modified's one second resolution
+            await store.write_json("manifest.json", {"completed": 2})
+            second_stat = await store.stat("manifest.json")
+            second = await store.read(await store.sidecar("manifest.json", "gzip"))
+            again = await store.read(await store.sidecar("manifest.json", "gzip"))
+            return first_stat, second_stat, first, second, again
+        finally:
+            await store.close()
+
+    first_stat, second_stat, first, second, again = asyncio.run(run())
+    assert first_stat.size == second_stat.size
+    assert first_stat.etag != second_stat.etag
+    assert gzip.decompress(first) != gzip.decompress(second)
+    assert second == again
@@ -0,0 +1,107 @@
+import json
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.batch_client import build_batch_request, parse_batch_output, run_batch
+from agents.bulk_agent import run_bulk_content_plans, run_bulk_scripts
+from routes import batch, fake_batch
+from routes.batch import BulkPlanConfig
+from utils.helpers import create_job, jobs
+
+SAMPLE_PLAN = {
+    "series_concept": "A cat who shops",
+    "cat_personality": {"traits": ["curious"], "catchphrases": ["Meow-velous!"]},
+    "episodes": [{"title": "Aisle Nine", "plot_summary": "Whiskers finds the treats."}]
+}
+
+EPISODE = {
+    "title": "",
+    "premise": "Whiskers goes looking for treats.",
+    "setting": "Supermarket",
+    "items": ["tuna", "catnip"],
+    "conflict": "The treats are on the top shelf.",
+    "resolution": "A shelf stacker helps out."
+}
+
+def test_parse_batch_output_separates_results_and_errors():
+    output = "\n".join([
+        json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "hi"}}]}}}),
+        json.dumps({"custom_id": "b", "response": {"status_code": 429, "body": {"error": "rate limited"}}}),
+        json.dumps({"custom_id": "c", "error": {"message": "expired"}}),
+        ""
+    ])
+    results = parse_batch_output(output)
+    assert results["a"] == {"content": "hi"}
+    assert results["b"] == {"error": "rate limited"}
+    assert results["c"] == {"error": {"message": "expired"}}
+
+def test_parse_batch_output_fails_only_the_malformed_lines():
+    output = "\n".join([
+        json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "hi"}}]}}}),
+        json.dumps({"custom_id": "b", "response": {"status_code": 200, "body": {"choices": []}}}),
+        json.dumps({"custom_id": "c", "response": {"status_code": 200, "body": None}}),
+        '{"custom_id": "d", "resp',
+        json.dumps(["not", "a", "record"])
+    ])
+    results = parse_batch_output(output)
+    assert results["a"] == {"content": "hi"}
+    assert results["b"] == {"error": "Malformed response body"}
+    assert results["c"] == {"error": "Malformed response body"}
+    assert set(results) == {"a", "b", "c"}
+
+def test_bulk_scripts_reject_incomplete_episodes():
+    app = FastAPI()
+    app.include_router(batch.router)
+    episode = dict(EPISODE, title="Aisle Nine")
+    del episode["conflict"]
+
+    response = TestClient(app).post("/batch/scripts", json={"episodes": [episode]})
+    assert response.status_code == 422
+
+def test_run_batch_against_fake_api(serve, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base_url = serve(fake_batch.router) + "/fake-openai/v1"
+    requests = [
+        build_batch_request("plan-0", "Format the response as a JSON object"),
+        build_batch_request("script-0", "Write a script")
+    ]
+    progress = []
+    results = asyncio.run(run_batch(
+        requests, api_key="test", base_url=base_url, poll_interval=0,
+        on_progress=lambda finished, total: progress.append((finished, total))
+    ))
+    assert set(results) == {"plan-0", "script-0"}
+    assert json.loads(results["plan-0"]["content"])["episodes"] == []
+    assert "NARRATOR" in results["script-0"]["content"]
+    assert progress[-1] == (2, 2)
+
+def test_bulk_content_plans_write_plans_and_manifest(store, serve, tmp_path):
+    (tmp_path / "outputs").mkdir()
+    (tmp_path / "outputs" / "content_plan.json").write_text(json.dumps(SAMPLE_PLAN))
+    base_url = serve(fake_batch.router) + "/fake-openai/v1"
+    configs = [BulkPlanConfig().model_dump(), BulkPlanConfig(series_title="Second").model_dump()]
+
+    job_id = create_job("bulk_content_plans")
+    manifest = asyncio.run(run_bulk_content_plans(job_id, configs, api_key="test", base_url=base_url))
+
+    assert [item.get("error") for item in manifest["items"]] == [None, None]
+    for item in manifest["items"]:
+        key = item["path"].replace("./outputs/", "")
+        assert asyncio.run(store.read_json(key)) == SAMPLE_PLAN
+    assert jobs[job_id]["status"] == "completed"
+    assert jobs[job_id]["progress"] == 100
+    assert asyncio.run(store.read_json(f"batch/{job_id}/manifest.json")) == manifest
+
+def test_bulk_scripts_write_one_file_per_episode(store, serve):
+    base_url = serve(fake_batch.router) + "/fake-openai/v1"
+    episodes = [dict(EPISODE, title="Aisle Nine"), dict(EPISODE, title="Checkout Chaos")]
+
+    job_id = create_job("bulk_scripts")
+    manifest = asyncio.run(run_bulk_scripts(job_id, episodes, api_key="test", base_url=base_url))
+
+    assert [item["title"] for item in manifest["items"]] == ["Aisle Nine", "Checkout Chaos"]
+    for number in (1, 2):
+        script = asyncio.run(store.read_text(f"batch/{job_id}/episode{number}_script.txt"))
+        assert script.startswith("[SCENE 1")
@@ -0,0 +1,93 @@
+import asyncio
+
+from utils import checkpoints
+from utils.checkpoints import Checkpoint, CheckpointLog, inputs_fingerprint
+
+MANIFEST_PATH = "./outputs/images/episode_1/manifest.json"
+
+def _checkpoint(fingerprint: str, total: int = 3) -> Checkpoint:
+    return Checkpoint(MANIFEST_PATH, "scenes", "scene", fingerprint, total, header={"episode": 1})
+
+def test_fingerprint_is_stable_and_input_sensitive():
+    assert inputs_fingerprint({"a": 1, "b": 2}) == inputs_fingerprint({"b": 2, "a": 1})
+    assert inputs_fingerprint({"a": 1}) != inputs_fingerprint({"a": 2})
+
+def test_resume_picks_up_recorded_units(store):
+    async def first_run():
+        checkpoint = await _checkpoint("inputs-1").load()
+        await checkpoint.record(0, {"path": "scene_0.png"})
+        await checkpoint.record(2, {"path": "scene_2.png"})
+        await checkpoint.flush()
+
+    async def second_run():
+        return await _checkpoint("inputs-1").load()
+
+    asyncio.run(first_run())
+    manifest = asyncio.run(store.read_json("images/episode_1/manifest.json"))
+    assert manifest["status"] == "partial"
+    assert manifest["completed"] == 2
+    assert [scene["scene"] for scene in manifest["scenes"]] == [0, 2]
+
+    resumed = asyncio.run(second_run())
+    assert resumed.completed(0) == {"scene": 0, "path": "scene_0.png"}
+    assert resumed.completed(1) is None
+
+def test_changed_inputs_start_over(store):
+    async def run():
+        checkpoint = await _checkpoint("inputs-1").load()
+        await checkpoint.record(0, {"path": "scene_0.png"})
+        return await _checkpoint("inputs-2").load()
+
+    assert asyncio.run(run()).units == {}
+
+def test_finish_marks_manifest_complete(store):
+    async def run():
+        checkpoint = await _checkpoint("inputs-1", total=1).load()
+        await checkpoint.record(0, {"path": "scene_0.png"})
+        return await checkpoint.finish(video="episode_1.mp4")
+
+    manifest = asyncio.run(run())
+    assert manifest["status"] == "complete"
+    assert manifest["video"] == "episode_1.mp4"
+    assert asyncio.run(store.read_json("images/episode_1/manifest.json"))["status"] == "complete"
+
+def test_units_recorded_close_together_share_a_save(store, monkeypatch):
+    writes = []
+    write_json = store.write_json
+
+    async def counting_write_json(key, value):
+        writes.append(value["completed"])
+        await write_json(key, value)
+
+    monkeypatch.setattr(store, "write_json", counting_write_json)
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_SAVE_INTERVAL", 0.05)
+
+    async def run():
+        checkpoint = await _checkpoint("inputs-1", total=50).load()
+        for index in range(50):
+            await checkpoint.record(index, {"path": f"scene_{index}.png"})
+        # The deferred save lands without anyone waiting for it
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert writes == [1, 50]
+    assert asyncio.run(store.read_json("images/episode_1/manifest.json"))["completed"] == 50
+
+def test_checkpoint_log_resumes_and_skips_torn_line(tmp_path):
+    path = str(tmp_path / "run" / "checkpoint.jsonl")
+    log = CheckpointLog(path)
+    log.record(0, {"key": "plan_0.json"})
+    log.record(1, {"error": "bad request"})
+    log.close()
+    with open(path, "a") as f:
+        f.write('{"index": 2, "key": "pla')
+
+    resumed = CheckpointLog(path)
+    assert resumed.completed(0) == {"index": 0, "key": "plan_0.json"}
+    assert resumed.completed(1)["error"] == "bad request"
+    assert resumed.completed(2) is None
+
+    # The next line after the torn one is kept
+    resumed.record(2, {"key": "plan_2.json"})
+    resumed.close()
+    assert CheckpointLog(path).completed(2) == {"index": 2, "key": "plan_2.json"}
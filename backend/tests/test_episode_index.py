@@ -0,0 +1,89 @@
+import time
+import asyncio
+
+import numpy as np
+
+from agents.content_plan_agent import content_agent
+from utils import episode_index as episode_index_module
+from utils.episode_index import NUM_PERM, EpisodeIndex, episode_shingles, minhash_signature
+
+def _episode(title: str, setting: str = "Busy supermarket", items=("tuna", "catnip"), conflict: str = "The manager chases Whiskers") -> dict:
+    return {"title": title, "setting": setting, "items": list(items), "conflict": conflict}
+
+def _random_index(size: int, rng) -> EpisodeIndex:
+    index = EpisodeIndex()
+    signatures = rng.integers(0, (1 << 31) - 1, size=(size, NUM_PERM), dtype=np.int64)
+    index._insert([f"episode {number}" for number in range(size)], signatures)
+    return index
+
+def test_near_duplicates_are_flagged_within_and_across_batches():
+    index = EpisodeIndex()
+    original = _episode("Grocery Store Mayhem")
+    asyncio.run(index.add([original]))
+
+    batch = [
+        _episode("Grocery Store Mayhem!"),
+        _episode("Midnight at the Pet Spa", "Luxury pet spa", ["bubble bath"], "The groomer wants to trim Whiskers"),
+        _episode("Midnight at the Pet Spa", "Luxury pet spa", ["bubble bath"], "The groomer wants to trim Whiskers")
+    ]
+    matches = asyncio.run(index.find_duplicates(batch))
+    assert matches[0]["title"] == "Grocery Store Mayhem"
+    assert matches[1] is None
+    assert matches[2]["title"] == "Midnight at the Pet Spa"
+
+def test_index_is_persisted_and_reloaded(tmp_path):
+    path = str(tmp_path / "episode_index.jsonl")
+    asyncio.run(EpisodeIndex(path).add([_episode("Grocery Store Mayhem")]))
+
+    reloaded = EpisodeIndex(path)
+    asyncio.run(reloaded.load())
+    assert len(reloaded) == 1
+    assert asyncio.run(reloaded.find_duplicates([_episode("Grocery Store Mayhem")]))[0] is not None
+
+def test_sorted_and_tail_entries_are_both_searched(monkeypatch):
+    monkeypatch.setattr(episode_index_module, "EPISODE_INDEX_TAIL_SIZE", 8)
+    rng = np.random.default_rng(0)
+    index = _random_index(100, rng)
+    assert index._sorted_count >= 96
+
+    index._insert(["late"], minhash_signature(episode_shingles(_episode("Late Night Snack")))[np.newaxis, :])
+    index._insert(["early"], minhash_signature(episode_shingles(_episode("Grocery Store Mayhem")))[np.newaxis, :])
+    for _ in range(10):
+        index._insert(["filler"], rng.integers(0, (1 << 31) - 1, size=(1, NUM_PERM), dtype=np.int64))
+
+    matches = index._find_duplicates([_episode("Grocery Store Mayhem"), _episode("Late Night Snack")])
+    assert [match["title"] for match in matches] == ["early", "late"]
+
+def test_lookup_cost_stays_flat_at_scale():
+    rng = np.random.default_rng(1)
+    index = _random_index(200_000, rng)
+    index._insert(["target"], minhash_signature(episode_shingles(_episode("Grocery Store Mayhem")))[np.newaxis, :])
+    words = [f"word{number}" for number in range(1000)]
+    queries = [
+        _episode(*(" ".join(rng.choice(words, 4)) for _ in range(2)), [str(rng.choice(words))], " ".join(rng.choice(words, 5)))
+        for _ in range(50)
+    ]
+
+    started = time.perf_counter()
+    matches = index._find_duplicates(queries + [_episode("Grocery Store Mayhem")])
+    per_episode = (time.perf_counter() - started) / len(matches)
+
+    assert matches[-1]["title"] == "target"
+    assert all(match is None for match in matches[:-1])
+    assert per_episode < 0.005
+
+def test_final_replacements_are_checked_before_indexing(monkeypatch):
+    index = EpisodeIndex()
+    asyncio.run(index.add([_episode("Grocery Store Mayhem")]))
+    monkeypatch.setattr(content_agent, "episode_index", index)
+    monkeypatch.setattr(content_agent, "EPISODE_DEDUP_MAX_RETRIES", 1)
+
+    async def same_again(config):
+        return {"episodes": [_episode("Grocery Store Mayhem!!")]}
+
+    monkeypatch.setattr(content_agent, "_generate_content_ideas", same_again)
+    plan = {"episodes": [_episode("Grocery Store Mayhem"), _episode("Rooftop Fish Market", "Harbor", ["sardines"], "Seagulls")]}
+    asyncio.run(content_agent.replace_duplicate_episodes(plan, {"num_episodes": 2}))
+
+    # The repeat that survived the retry is kept in the plan but not indexed a second time
+    assert index.titles == ["Grocery Store Mayhem", "Rooftop Fish Market"]
@@ -0,0 +1,32 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import files
+
+def make_client(store, monkeypatch) -> TestClient:
+    monkeypatch.setattr(files, "artifact_store", store)
+    app = FastAPI()
+    app.include_router(files.router)
+    return TestClient(app)
+
+def test_not_modified_repeats_the_matched_etag(store, monkeypatch):
+    asyncio.run(store.write_json("plans/plan.json", {"episodes": ["The Tuna Heist"] * 200}))
+    client = make_client(store, monkeypatch)
+
+    plain = client.get("/outputs/plans/plan.json", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/outputs/plans/plan.json", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+    for etag, encoding in ((plain.headers["ETag"], "identity"), (gzipped.headers["ETag"], "gzip")):
+        response = client.get(
+            "/outputs/plans/plan.json",
+            headers={"Accept-Encoding": encoding, "If-None-Match": f"W/{etag}"}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    stale = client.get("/outputs/plans/plan.json", headers={"If-None-Match": plain.headers["ETag"][:-1] + '-xz"'})
+    assert stale.status_code == 200
@@ -0,0 +1,45 @@
+import asyncio
+
+from agents.image_agent import image_agent
+from agents.image_agent.image_agent import generate_images, render_cache_key
+from models.schemas import VisualPrompt
+
+def make_prompt(**changes) -> VisualPrompt:
+    fields = {
+        "description": "Whiskers eyes the tuna",
+        "stable_diffusion_prompt": "a cat in a supermarket aisle",
+        "style": "pixar",
+        "shot_type": "close-up"
+    }
+    fields.update(changes)
+    return VisualPrompt(**fields)
+
+def test_cache_key_covers_the_full_prompt():
+    key = render_cache_key(make_prompt(), 42, "huggingface")
+    assert render_cache_key(make_prompt(description="Another caption"), 42, "huggingface") == key
+    assert render_cache_key(make_prompt(shot_type="wide shot"), 42, "huggingface") != key
+    assert render_cache_key(make_prompt(style="anime"), 42, "huggingface") != key
+    assert render_cache_key(make_prompt(), 7, "huggingface") != key
+
+def test_cache_key_changes_with_the_model(monkeypatch):
+    key = render_cache_key(make_prompt(), 42, "huggingface")
+    monkeypatch.setattr(image_agent, "HUGGINGFACE_IMAGE_MODEL", "black-forest-labs/FLUX.1-schnell")
+    assert render_cache_key(make_prompt(), 42, "huggingface") != key
+
+def test_identical_scenes_share_one_render(store, monkeypatch):
+    rendered = []
+    render_local = image_agent.render_local
+
+    def counting_render(prompt, seed, output_path):
+        rendered.append(prompt.stable_diffusion_prompt)
+        render_local(prompt, seed, output_path)
+
+    monkeypatch.setattr(image_agent, "render_local", counting_render)
+    # Thumbnails on the default thread pool rather than a process pool
+    monkeypatch.setattr(image_agent, "_get_thumbnail_executor", lambda: None)
+    scenes = [make_prompt(), make_prompt(description="Same shot again"), make_prompt(style="anime")]
+
+    manifest = asyncio.run(generate_images(scenes, "episode_1", provider="local"))
+    assert sorted(rendered) == ["a cat in a supermarket aisle"] * 2
+    assert [scene["cached"] for scene in manifest["scenes"]] == [False, True, False]
+    assert manifest["cached_scenes"] == 1
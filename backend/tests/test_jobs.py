@@ -0,0 +1,28 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import jobs as jobs_routes
+from utils.helpers import create_job, update_job_progress
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(jobs_routes.router)
+    return TestClient(app)
+
+def test_websocket_rejects_bad_messages_and_stays_open():
+    job_id = create_job("test")
+    with make_client().websocket_connect("/jobs/ws") as websocket:
+        websocket.send_text("not json")
+        assert "error" in websocket.receive_json()
+        websocket.send_text('["subscribe"]')
+        assert "error" in websocket.receive_json()
+        websocket.send_json({"subscribe": "job"})
+        assert "error" in websocket.receive_json()
+
+        websocket.send_json({"subscribe": ["missing"]})
+        assert websocket.receive_json() == {"job_id": "missing", "error": "Job not found"}
+
+        websocket.send_json({"subscribe": [job_id]})
+        assert websocket.receive_json()["job_id"] == job_id
+        update_job_progress(job_id, 40)
+        assert websocket.receive_json()["progress"] == 40
@@ -0,0 +1,127 @@
+import json
+import time
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents import local_model
+from agents.local_model import LocalModelPool
+from agents.local_scheduler import LocalScheduler
+
+class FakeModel:
+    """Emits max_tokens numbered tokens; can be held before the first one"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = []
+
+    def create_chat_completion(self, stream=True, max_tokens=4, messages=None, **kwargs):
+        self.started.append(messages[-1]["content"])
+        self.gate.wait(5)
+        for number in range(max_tokens):
+            time.sleep(0.001)
+            yield {"choices": [{"delta": {"content": f"{number} "}}]}
+
+def _request(content: str, max_tokens: int):
+    return {"messages": [{"role": "user", "content": content}], "max_tokens": max_tokens}
+
+async def _collect(scheduler, request):
+    return "".join([token async for token in scheduler.stream(request)])
+
+def test_streams_tokens_in_order():
+    scheduler = LocalScheduler([FakeModel()])
+    scheduler.start()
+    try:
+        assert asyncio.run(_collect(scheduler, _request("a", 3))) == "0 1 2 "
+    finally:
+        scheduler.stop()
+
+def test_waiting_short_request_runs_before_long_one():
+    model = FakeModel()
+    scheduler = LocalScheduler([model], tokens_per_second=20)
+    scheduler.start()
+
+    async def run():
+        model.gate.clear()
+        busy = asyncio.create_task(_collect(scheduler, _request("busy", 1)))
+        while not model.started:
+            await asyncio.sleep(0.001)
+        long = asyncio.create_task(_collect(scheduler, _request("long", 200)))
+        await asyncio.sleep(0.01)
+        short = asyncio.create_task(_collect(scheduler, _request("short", 2)))
+        await asyncio.sleep(0.01)
+        model.gate.set()
+        await asyncio.gather(busy, long, short)
+
+    try:
+        asyncio.run(run())
+    finally:
+        scheduler.stop()
+    assert model.started == ["busy", "short", "long"]
+
+def test_stop_fails_waiting_requests():
+    model = FakeModel()
+    scheduler = LocalScheduler([model])
+    scheduler.start()
+
+    async def run():
+        model.gate.clear()
+        busy = asyncio.create_task(_collect(scheduler, _request("busy", 1)))
+        while not model.started:
+            await asyncio.sleep(0.001)
+        waiting = asyncio.create_task(_collect(scheduler, _request("waiting", 1)))
+        await asyncio.sleep(0.01)
+        # The busy generation ends while stop() waits for the worker
+        threading.Timer(0.05, model.gate.set).start()
+        scheduler.stop()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await waiting
+        await busy
+        with pytest.raises(RuntimeError, match="stopped"):
+            await _collect(scheduler, _request("late", 1))
+
+    asyncio.run(run())
+
+def test_stop_ends_every_worker():
+    scheduler = LocalScheduler([FakeModel(), FakeModel(), FakeModel()])
+    scheduler.start()
+    workers = list(scheduler._workers)
+    assert asyncio.run(_collect(scheduler, _request("a", 2))) == "0 1 "
+
+    scheduler.stop(timeout=5)
+    assert not any(worker.is_alive() for worker in workers)
+
+def test_script_route_streams_local_tokens(monkeypatch):
+    import main
+
+    pool = LocalModelPool("fake.gguf")
+    pool._scheduler = LocalScheduler([FakeModel()])
+    pool._scheduler.start()
+    monkeypatch.setattr(local_model, "LOCAL_MODEL_PATH", "fake.gguf")
+    monkeypatch.setitem(local_model._pools, "fake.gguf", pool)
+
+    episode = {
+        "title": "Aisle Nine", "premise": "Treats.", "setting": "Store",
+        "items": ["tuna"], "conflict": "Top shelf.", "resolution": "A ladder."
+    }
+    try:
+        response = TestClient(main.app).post(
+            "/scripts/generate/stream",
+            json={"episode": episode, "catName": "Whiskers", "apiProvider": "local"}
+        )
+    finally:
+        pool.stop()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == {"done": True}
+    assert "".join(event["token"] for event in events[:-1]).startswith("0 1 ")
+
+def test_script_route_rejects_incomplete_episode():
+    import main
+
+    response = TestClient(main.app).post("/scripts/generate/stream", json={"episode": {"title": "x"}, "catName": "Whiskers"})
+    assert response.status_code == 400
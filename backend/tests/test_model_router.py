@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from agents.model_router import DEFAULT_CATALOG, DEFAULT_TASK_POLICIES, ModelRouter, ProviderError
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    return httpx.HTTPStatusError(f"{status}", request=request, response=httpx.Response(status, request=request))
+
+def run(router: ModelRouter, failures: dict):
+    calls = []
+
+    async def call(model: str) -> str:
+        calls.append(model)
+        if model in failures:
+            raise failures[model]
+        return "ok"
+
+    return asyncio.run(router.run("plan", "openai", call)), calls
+
+@pytest.mark.parametrize("error", [
+    status_error(429),
+    status_error(503),
+    httpx.ConnectError("connection refused"),
+    httpx.ReadTimeout("timed out"),
+    ProviderError("OpenAI API returned error 502", 502),
+    ProviderError("Hugging Face API request failed"),
+])
+def test_retryable_errors_fall_back_and_count(error):
+    router = ModelRouter(DEFAULT_CATALOG, DEFAULT_TASK_POLICIES)
+    first = router.rank("plan", "openai")[0][0].model
+    text, calls = run(router, {first: error})
+    assert text == "ok" and len(calls) == 2
+    assert router.stats[f"openai:{first}"].errors == 1
+
+@pytest.mark.parametrize("error", [
+    status_error(400),
+    status_error(401),
+    ProviderError("OpenAI API returned error 401", 401),
+    ValueError("OpenAI API key is not provided"),
+])
+def test_request_and_credential_errors_are_raised_at_once(error):
+    router = ModelRouter(DEFAULT_CATALOG, DEFAULT_TASK_POLICIES)
+    first = router.rank("plan", "openai")[0][0].model
+    with pytest.raises(type(error)):
+        run(router, {first: error})
+    assert router.stats[f"openai:{first}"].errors == 0
+    assert len(router.decisions[-1]["attempts"]) == 1
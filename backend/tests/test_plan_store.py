@@ -0,0 +1,63 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from utils import plan_store
+from utils.plan_store import AnalyticsBuffer, query
+
+PLAN = {
+    "series_concept": "A cat goes shopping",
+    "cat_personality": {"traits": ["bold"]},
+    "episodes": [{"title": "The Tuna Heist", "items": ["tuna"]}, {"title": "Checkout Chaos", "items": []}]
+}
+GENERATED_AT = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+def episode_parts(tmp_path):
+    return list(tmp_path.glob("outputs/analytics/episodes/*/*/part-*.parquet"))
+
+def test_exports_are_buffered_and_compacted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    buffer = AnalyticsBuffer()
+    monkeypatch.setattr(plan_store, "analytics_buffer", buffer)
+    monkeypatch.setattr(plan_store, "ANALYTICS_COMPACT_FILES", 3)
+
+    for _ in range(5):
+        plan_store.export_content_plan(PLAN, {"series_title": "Cat Shopper"}, GENERATED_AT)
+    assert buffer.pending == 15
+    assert episode_parts(tmp_path) == []
+
+    # One file per partition per flush, merged once the partition has three
+    buffer.flush()
+    assert len(episode_parts(tmp_path)) == 1
+    plan_store.export_content_plan(PLAN, {"series_title": "Cat Shopper"}, GENERATED_AT)
+    buffer.flush()
+    plan_store.export_content_plan(PLAN, {"series_title": "Cat Shopper"}, GENERATED_AT)
+    buffer.flush()
+    assert len(episode_parts(tmp_path)) == 1
+
+    episodes = query("episodes", columns=["title"], series_title="Cat Shopper")
+    assert episodes.num_rows == 14
+    assert query("plans").num_rows == 7
+
+def test_flush_runs_off_the_loop_when_full_and_on_close(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    buffer = AnalyticsBuffer()
+    monkeypatch.setattr(plan_store, "analytics_buffer", buffer)
+    monkeypatch.setattr(plan_store, "ANALYTICS_FLUSH_ROWS", 6)
+
+    async def export():
+        plan_store.export_content_plan(PLAN, {"series_title": "Cat Shopper"}, GENERATED_AT)
+        plan_store.export_content_plan(PLAN, {"series_title": "Cat Shopper"}, GENERATED_AT)
+        await asyncio.sleep(0.5)
+        assert buffer.pending == 0
+        plan_store.export_content_plan(PLAN, {"series_title": "Cat Shopper"}, GENERATED_AT)
+        await buffer.close()
+
+    asyncio.run(export())
+    assert buffer.pending == 0
+    assert query("episodes").num_rows == 6
+    assert os.path.isdir(tmp_path / "outputs" / "analytics" / "plans")
@@ -0,0 +1,24 @@
+from datetime import time
+
+import pytest
+
+from agents.social_media_agent.posting_scheduler import parse_best_time
+
+@pytest.mark.parametrize("text, expected", [
+    ("18:00", time(18, 0)),
+    ("6:30 PM", time(18, 30)),
+    ("Between 7 and 9 PM EST", time(19, 0)),
+    ("Weekdays 6-9pm", time(18, 0)),
+    ("7:00 PM - 9:00 PM EST", time(19, 0)),
+    ("9 to 11 p.m.", time(21, 0)),
+    ("11-1pm", time(11, 0)),
+    ("10am-2pm", time(10, 0)),
+    ("18:00-21:00", time(18, 0)),
+    ("evening", time(18, 0)),
+])
+def test_parse_best_time(text, expected):
+    assert parse_best_time(text, "Instagram") == expected
+
+def test_bare_numbers_fall_back_to_the_platform_default():
+    assert parse_best_time("Between 6 and 9", "Instagram") == time(12, 0)
+    assert parse_best_time("Post 3 times a week", "Instagram") == time(12, 0)
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import profiler as profiler_module
+from utils.profiler import SamplingProfiler
+
+def busy(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+def sleepy(stop: threading.Event):
+    while not stop.is_set():
+        time.sleep(0.05)
+
+@pytest.mark.skipif(not profiler_module.THREAD_CPU_CLOCKS, reason="needs per-thread CPU clocks")
+def test_blocked_threads_are_not_counted_as_cpu():
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=busy, args=(stop,), name="busy", daemon=True),
+        threading.Thread(target=sleepy, args=(stop,), name="sleepy", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    async def profile():
+        profiler = SamplingProfiler()
+        profiler.start(interval=0.005)
+        await asyncio.sleep(0.5)
+        profiler.stop()
+        return profiler.status()
+
+    try:
+        status = asyncio.run(profile())
+    finally:
+        stop.set()
+    endpoints = {entry["endpoint"]: entry for entry in status["endpoints"]}
+
+    assert status["mode"] == "cpu"
+    assert endpoints["[thread busy]"]["cpu_seconds"] > 0.05
+    # time.sleep is called from sleepy(), so a leaf-frame filter alone would count it
+    assert "[thread sleepy]" not in endpoints
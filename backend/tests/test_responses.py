@@ -0,0 +1,29 @@
+import os
+import gzip
+import asyncio
+
+from fastapi.responses import StreamingResponse
+
+from utils import responses
+from utils.responses import spooled_json_response
+
+def test_bodies_that_fit_the_spool_are_not_streamed():
+    response = spooled_json_response([b'{"episodes": [', b'"The Tuna Heist"', b"]}"])
+    assert not isinstance(response, StreamingResponse)
+    assert response.body == b'{"episodes": ["The Tuna Heist"]}'
+    assert response.headers["Content-Length"] == str(len(response.body))
+
+def test_large_bodies_are_streamed_from_the_spool(monkeypatch):
+    monkeypatch.setattr(responses, "RESPONSE_SPOOL_SIZE", 1024)
+    # Random titles, so the body is still larger than the spool once compressed
+    chunks = [b'{"episodes": ['] + [b'"%s",' % os.urandom(32).hex().encode() for _ in range(200)] + [b'"The End"]}']
+    response = spooled_json_response(chunks, accept_encoding="gzip")
+    assert isinstance(response, StreamingResponse)
+    assert response.headers["Content-Encoding"] == "gzip"
+
+    async def read():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(read())
+    assert response.headers["Content-Length"] == str(len(body))
+    assert gzip.decompress(body) == b"".join(chunks)
@@ -0,0 +1,37 @@
+import asyncio
+
+import httpx
+import pytest
+
+from agents.model_router import model_router
+from agents.script_generator import generat_script_
+from agents.script_generator.generat_script_ import SpeculativeStats, generate_script, plan_catchphrases
+from models.records import content_plan_record
+
+def test_plan_catchphrases_from_plan_records():
+    episode = {"title": "t", "premise": "p", "setting": "s", "items": ["tuna"], "conflict": "c", "resolution": "r"}
+    plan = content_plan_record({
+        "series_concept": "A cat goes shopping",
+        "cat_personality": {"traits": ["bold"], "catchphrases": ["Meow or never!", "", 3]},
+        "episodes": [episode]
+    })
+    assert plan_catchphrases(plan) == ["Meow or never!"]
+    assert plan_catchphrases({"cat_personality": {"traits": ["bold"]}}) is None
+
+def test_summary_estimates_upgrades_from_the_router():
+    stats = SpeculativeStats()
+    stats.record(2.0, [])
+    summary = stats.summary()
+    assert summary["average_upgrade_seconds"] == round(model_router.expected_latency("script_upgrade", "openai"), 3)
+    assert summary["drafts"] == 1 and summary["upgraded"] == 0
+
+def test_provider_errors_fall_back_unless_disabled(monkeypatch):
+    async def failing_generate_text(**kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(generat_script_, "generate_text", failing_generate_text)
+    episode = {"title": "The Tuna Heist", "premise": "p", "setting": "s", "items": ["tuna"], "conflict": "c", "resolution": "r"}
+    # The fallback swallows the error
+    asyncio.run(generate_script(episode, speculative=False))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(generate_script(episode, speculative=False, fallback=False))
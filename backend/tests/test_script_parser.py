@@ -0,0 +1,39 @@
+import random
+
+from benchmarks.script_parser import synthetic_script
+from utils.script_parser import parse_script
+
+SCRIPT = """TITLE: Grocery Store Mayhem
+
+[SCENE 1 - SUPERMARKET - DAY - 0:00-0:05]
+Whiskers slips through the sliding doors.
+
+NARRATOR: "Meet Whiskers, a cat with expensive taste."
+And a shopping list.
+
+[SFX: Door chime]
+
+[SCENE 2 - CHECKOUT - 0:05-0:12]
+**WHISKERS:** "Purr-fect!"
+CASHIER: Is that a cat?
+
+The camera pans: the manager is coming.
+"""
+
+def test_parses_scenes_dialogue_narration_and_sfx():
+    parsed = parse_script(SCRIPT)
+    assert parsed.title == "Grocery Store Mayhem"
+    assert [(scene.number, scene.location, scene.duration) for scene in parsed.scenes] == [
+        (1, "SUPERMARKET - DAY", 5), (2, "CHECKOUT", 7)
+    ]
+    assert parsed.narration_lines == ["Meet Whiskers, a cat with expensive taste. And a shopping list."]
+    assert parsed.dialogue_by_speaker == {"WHISKERS": ["Purr-fect!"], "CASHIER": ["Is that a cat?"]}
+    assert parsed.scenes[0].sfx == ["Door chime"]
+    assert parsed.scenes[1].description == ["The camera pans: the manager is coming."]
+    assert parsed.total_duration == 12
+
+def test_every_synthetic_scene_is_found():
+    rng = random.Random(0)
+    for _ in range(50):
+        script = synthetic_script(rng)
+        assert len(parse_script(script).scenes) == script.count("[SCENE ")
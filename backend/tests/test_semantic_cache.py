@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from utils.semantic_cache import EMBEDDING_DIM, SemanticCache, _Namespace, plan_cache_fields
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+def _near(vectors: np.ndarray, cosine: float, rng) -> np.ndarray:
+    """Vectors at exactly the given cosine similarity to each of vectors"""
+    noise = rng.standard_normal(vectors.shape)
+    noise -= (noise * vectors).sum(axis=1, keepdims=True) * vectors
+    noise = _unit(noise)
+    return _unit(cosine * vectors + np.sqrt(1 - cosine ** 2) * noise)
+
+def test_near_duplicates_are_found_past_two_thousand_entries():
+    rng = np.random.default_rng(1)
+    stored = _unit(rng.standard_normal((2500, EMBEDDING_DIM)))
+    namespace = _Namespace(max_entries=10000)
+    for index, vector in enumerate(stored):
+        namespace.add(vector, index)
+
+    queries = rng.choice(len(stored), 200, replace=False)
+    found = 0
+    for index, query in zip(queries, _near(stored[queries], 0.92, rng)):
+        best, score = namespace.search(query)
+        found += best == index and score >= 0.9
+    assert found == len(queries)
+
+def test_full_namespace_replaces_oldest_entry():
+    rng = np.random.default_rng(2)
+    vectors = _unit(rng.standard_normal((5, EMBEDDING_DIM)))
+    namespace = _Namespace(max_entries=3)
+    for index, vector in enumerate(vectors):
+        namespace.add(vector, index)
+
+    assert sorted(namespace.results) == [2, 3, 4]
+    for index in (2, 3, 4):
+        best, score = namespace.search(vectors[index])
+        assert namespace.results[best] == index and score > 0.99
+    best, score = namespace.search(vectors[0])
+    assert score < 0.5
+
+def test_filling_to_capacity_stays_linear():
+    rng = np.random.default_rng(3)
+    vectors = _unit(rng.standard_normal((12000, EMBEDDING_DIM)))
+    namespace = _Namespace(max_entries=10000)
+    started = time.perf_counter()
+    for index, vector in enumerate(vectors):
+        namespace.add(vector, index)
+    # Was about 36s for the first 10k before the ring buffer
+    assert time.perf_counter() - started < 2.0
+    assert len(namespace.results) == 10000
+
+def test_reworded_request_hits_and_different_exact_fields_miss():
+    cache = SemanticCache("test", threshold=0.9)
+    config = {"num_episodes": 3, "content_style": "funny, kids", "theme": "a sneaky cat in the supermarket"}
+    cache.store(*plan_cache_fields(config), {"episodes": [1, 2, 3]})
+
+    reworded = dict(config, content_style="humorous, for children", theme="the naughty cat in a supermarket")
+    assert cache.lookup(*plan_cache_fields(reworded)) == {"episodes": [1, 2, 3]}
+    assert cache.lookup(*plan_cache_fields(dict(config, num_episodes=4))) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_namespace_is_dropped():
+    cache = SemanticCache("test", threshold=0.9, max_namespaces=2)
+    config = {"content_style": "funny, kids"}
+    for title in ("First", "Second"):
+        cache.store(*plan_cache_fields(dict(config, series_title=title)), title)
+    # Using the first namespace again makes the second the least recently used
+    assert cache.lookup(*plan_cache_fields(dict(config, series_title="First"))) == "First"
+
+    cache.store(*plan_cache_fields(dict(config, series_title="Third")), "Third")
+    assert cache.lookup(*plan_cache_fields(dict(config, series_title="Second"))) is None
+    assert cache.lookup(*plan_cache_fields(dict(config, series_title="First"))) == "First"
+    assert cache.lookup(*plan_cache_fields(dict(config, series_title="Third"))) == "Third"
@@ -0,0 +1,34 @@
+import asyncio
+import json
+
+from agents.social_media_agent import social_media_agent
+from agents.social_media_agent.social_media_agent import generate_social_media_plans
+
+PLATFORMS = ["TikTok", "Instagram"]
+
+def response_for(episode_count: int) -> str:
+    post = {"post_text": "Whiskers strikes again", "hashtags": ["cats"], "best_time_to_post": "18:00", "engagement_prompt": "Would your cat?"}
+    return json.dumps({"episodes": [
+        {
+            "episode_index": index,
+            "platforms": [dict(post, name=platform) for platform in PLATFORMS],
+            "content_variations": [{"type": "teaser", "description": "Five seconds", "purpose": "hook"}]
+        }
+        for index in range(episode_count)
+    ]})
+
+def test_failed_batch_leaves_other_batches_intact(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(social_media_agent, "SOCIAL_BATCH_SIZE", 1)
+
+    async def fake_generate_text(prompt, **kwargs):
+        if "The Bakery Job" in prompt:
+            raise RuntimeError("provider returned 503")
+        return response_for(1)
+
+    monkeypatch.setattr(social_media_agent, "generate_text", fake_generate_text)
+    episodes = [{"title": "The Tuna Heist"}, {"title": "The Bakery Job"}, {"title": "Checkout Chaos"}]
+    plans = asyncio.run(generate_social_media_plans(episodes, platforms=PLATFORMS))
+
+    assert [len(plan["platforms"]) for plan in plans] == [2, 0, 2]
+    assert list(tmp_path.glob("outputs/social_media/cache/*.tmp")) == []
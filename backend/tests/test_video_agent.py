@@ -0,0 +1,34 @@
+from agents.video_agent.video_agent import DEFAULT_SCENE_SECONDS, plan_segments
+
+SCRIPT = """[SCENE 1 - SUPERMARKET - 0:00-0:08]
+Whiskers enters.
+
+[SCENE 2 - CHECKOUT - 0:20-0:12]
+The clerk looks up.
+
+[SCENE 3 - PARKING LOT - 0:30-0:30]
+The cart rolls away.
+
+[SCENE 4 - HOME]
+Whiskers naps.
+"""
+
+def test_scene_durations_fall_back_when_not_positive():
+    images = {"scenes": [{"path": f"scene_{index}.png"} for index in range(4)]}
+    segments = plan_segments(SCRIPT, images, None)
+    assert [segment["duration"] for segment in segments] == [8] + [DEFAULT_SCENE_SECONDS] * 3
+    assert all(segment["audio_paths"] == [] for segment in segments)
+
+def test_narration_before_the_first_scene_is_skipped():
+    script = 'NARRATOR: "Previously, on Whiskers."\n\n' + SCRIPT.replace(
+        "Whiskers enters.", 'NARRATOR: "Whiskers enters."'
+    ).replace("Whiskers naps.", 'NARRATOR: "Whiskers naps."')
+    images = {"scenes": [{"path": f"scene_{index}.png"} for index in range(4)]}
+    audio = {"lines": [
+        {"text": text, "path": f"line_{number}.wav"}
+        for number, text in enumerate(["Previously, on Whiskers.", "Whiskers enters.", "Whiskers naps."], start=1)
+    ]}
+
+    segments = plan_segments(script, images, audio)
+    assert [segment["scene"] for segment in segments] == [1, 2, 3, 4]
+    assert [segment["audio_paths"] for segment in segments] == [["line_2.wav"], [], [], ["line_3.wav"]]
@@ -0,0 +1,29 @@
+import asyncio
+
+from agents.voiceover_agent import voiceover_agent
+from agents.voiceover_agent.voiceover_agent import generate_voiceover
+
+SCRIPT = """[SCENE 1 - SUPERMARKET - 0:00-0:05]
+NARRATOR: "Whiskers is hungry."
+
+[SCENE 2 - CHECKOUT - 0:05-0:10]
+NARRATOR: "Whiskers is hungry."
+
+[SCENE 3 - HOME - 0:10-0:15]
+NARRATOR: "Whiskers naps."
+"""
+
+def test_repeated_lines_share_one_synthesis(store, monkeypatch):
+    synthesized = []
+    synthesize_offline = voiceover_agent.synthesize_offline
+
+    def counting_synthesize(text, voice_id, settings):
+        synthesized.append(text)
+        return synthesize_offline(text, voice_id, settings)
+
+    monkeypatch.setattr(voiceover_agent, "synthesize_offline", counting_synthesize)
+
+    manifest = asyncio.run(generate_voiceover(SCRIPT, "episode_1", provider="offline"))
+    assert sorted(synthesized) == ["Whiskers is hungry.", "Whiskers naps."]
+    assert [line["cached"] for line in manifest["lines"]] == [False, True, False]
+    assert manifest["cached_lines"] == 1
@@ -0,0 +1,77 @@
+import time
+import asyncio
+
+import pytest
+
+from agents import api_client, warm_pool as warm_pool_module
+from agents.warm_pool import WarmPool
+
+CONFIG = {"series_title": "Cat Shopper", "num_episodes": 2, "cat_name": "Whiskers", "api_provider": "openai"}
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(warm_pool_module, "WARM_POOL_SIZE", 1)
+    monkeypatch.setattr(warm_pool_module, "WARM_POOL_CONCURRENCY", 1)
+    monkeypatch.setattr(warm_pool_module, "WARM_POOL_SCRIPTS", True)
+    monkeypatch.setattr(api_client, "OPENAI_API_KEY", "server-key")
+    scripts = []
+    pool = WarmPool()
+
+    async def fake_plan(config, use_cache=True):
+        return {
+            "cat_personality": {"catchphrases": ["Meow or never!"]},
+            "episodes": [{"title": "The Tuna Heist"}, {"title": "Checkout Chaos"}]
+        }
+
+    async def fake_script(episode, catchphrases=None, **kwargs):
+        # The plan is pooled before its scripts start, and each script takes a slot of its own
+        assert pool._semaphore.locked()
+        assert len(pool.pools[signature]) == 1
+        scripts.append((episode["title"], catchphrases))
+        return "script"
+
+    monkeypatch.setattr(warm_pool_module, "generate_content_ideas", fake_plan)
+    monkeypatch.setattr(warm_pool_module, "generate_script", fake_script)
+    signature = pool.observe(CONFIG)
+    pool.observe(CONFIG)
+    return pool, signature, scripts
+
+def test_scripts_are_prewarmed_into_the_cache(pool, monkeypatch):
+    pool, signature, scripts = pool
+    monkeypatch.setattr(warm_pool_module, "SEMANTIC_CACHE_ENABLED", True)
+    asyncio.run(pool._refill(signature))
+    assert len(pool.pools[signature]) == 1
+    assert scripts == [("The Tuna Heist", ["Meow or never!"]), ("Checkout Chaos", ["Meow or never!"])]
+
+def test_scripts_need_the_script_cache(pool, monkeypatch):
+    pool, signature, scripts = pool
+    monkeypatch.setattr(warm_pool_module, "SEMANTIC_CACHE_ENABLED", False)
+    asyncio.run(pool._refill(signature))
+    assert len(pool.pools[signature]) == 1
+    assert scripts == []
+
+def test_providers_without_server_credentials_are_not_warmed(monkeypatch):
+    monkeypatch.setattr(api_client, "OPENAI_API_KEY", "server-key")
+    monkeypatch.setattr(api_client, "HUGGINGFACE_API_TOKEN", "")
+    pool = WarmPool()
+    huggingface = dict(CONFIG, api_provider="huggingface")
+    for config in (CONFIG, CONFIG, huggingface, huggingface, huggingface):
+        pool.observe(config)
+
+    assert pool.top_signatures() == [warm_pool_module.request_signature(CONFIG)]
+
+def test_faded_signatures_are_forgotten(monkeypatch):
+    monkeypatch.setattr(warm_pool_module, "WARM_POOL_INTERVAL", 3600)
+    pool = WarmPool()
+    faded = pool.observe(dict(CONFIG, series_title="Once"))
+    recent = pool.observe(CONFIG)
+    # Five half-lives ago
+    pool.popularity[faded]["updated"] = time.monotonic() - 5 * warm_pool_module.POPULARITY_HALF_LIFE
+
+    async def run():
+        task = asyncio.create_task(pool.maintain())
+        await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(run())
+    assert list(pool.popularity) == [recent]
@@ -0,0 +1,274 @@
+import os
+import json
+import math
+import time
+import heapq
+import asyncio
+import hashlib
+import logging
+import itertools
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Callable, List, Optional
+
+from fastapi import Depends, HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+# Admission control configuration
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "false").lower() == "true"
+ADMISSION_CAPACITY = float(os.getenv("ADMISSION_CAPACITY", "16"))
+ADMISSION_TENANT_CONCURRENCY = int(os.getenv("ADMISSION_TENANT_CONCURRENCY", "4"))
+ADMISSION_TENANT_QUEUE = int(os.getenv("ADMISSION_TENANT_QUEUE", "8"))
+ADMISSION_MAX_QUEUE = float(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "30"))
+ADMISSION_EPISODES_PER_UNIT = int(os.getenv("ADMISSION_EPISODES_PER_UNIT", "10"))
+# Header naming the tenant, set by a trusted gateway; clients can't choose their tenant otherwise
+ADMISSION_TENANT_HEADER = os.getenv("ADMISSION_TENANT_HEADER", "")
+# Optional JSON object of tenant weights, e.g. {"team-a": 2}; unlisted tenants weigh 1
+ADMISSION_TENANT_WEIGHTS = json.loads(os.getenv("ADMISSION_TENANT_WEIGHTS", "{}"))
+
+# Weight of each finished request in the seconds-per-unit average
+SERVICE_ALPHA = 0.2
+MAX_RETRY_AFTER = 300
+
+def request_cost(episodes: int = 1) -> float:
+    """Capacity units a generation request uses: 1, plus 1 per ADMISSION_EPISODES_PER_UNIT episodes"""
+    return 1.0 + max(episodes, 0) / ADMISSION_EPISODES_PER_UNIT
+
+def tenant_for(request: Request, api_key: Optional[str] = None) -> str:
+    """
+    Who a request counts against: the ADMISSION_TENANT_HEADER header when
+    one is configured, else the API key it carries, else the client address
+
+    The header is only read when configured, because a client that picks its
+    own tenant can rotate it to get around the per-tenant caps.
+    """
+    tenant = request.headers.get(ADMISSION_TENANT_HEADER) if ADMISSION_TENANT_HEADER else None
+    if tenant:
+        return f"tenant:{tenant}"
+    if api_key:
+        # Keys never show up in stats or logs
+        return f"key:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+class AdmissionRejected(Exception):
+    """The request was shed; the client should retry after retry_after seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ("tenant", "cost", "start", "finish", "seq", "future")
+
+    def __init__(self, tenant: str, cost: float, start: float, finish: float, seq: int, future: asyncio.Future):
+        self.tenant = tenant
+        self.cost = cost
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.finish, self.seq) < (other.finish, other.seq)
+
+class AdmissionController:
+    """
+    Weighted fair queuing in front of the generation routes
+
+    Up to `capacity` cost units run at once, and no tenant has more than
+    `tenant_concurrency` requests running. Requests that have to wait are
+    ordered by virtual finish time: each tenant's requests are tagged
+    cost / weight after its previous one, so a tenant sending many or large
+    requests only delays itself. When the queue is full, or a request has
+    waited max_wait seconds, it is shed with an estimate of when to retry.
+    """
+
+    def __init__(
+        self,
+        capacity: float = ADMISSION_CAPACITY,
+        tenant_concurrency: int = ADMISSION_TENANT_CONCURRENCY,
+        tenant_queue: int = ADMISSION_TENANT_QUEUE,
+        max_queue: float = ADMISSION_MAX_QUEUE,
+        max_wait: float = ADMISSION_MAX_WAIT,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.capacity = capacity
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_queue = tenant_queue
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.weights = weights if weights is not None else ADMISSION_TENANT_WEIGHTS
+        self.in_use = 0.0
+        self.running: Counter = Counter()
+        self.queued: Counter = Counter()
+        self.queued_cost = 0.0
+        self.virtual_time = 0.0
+        # Seconds a request takes per cost unit, until measured
+        self.seconds_per_unit = 5.0
+        self.stats: Dict[str, Counter] = {}
+        self._queue: List[_Waiter] = []
+        self._finish_tags: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+    def _weight(self, tenant: str) -> float:
+        return float(self.weights.get(tenant.split(":", 1)[-1], 1.0))
+
+    def _count(self, tenant: str, event: str):
+        self.stats.setdefault(tenant, Counter())[event] += 1
+
+    def _fits(self, tenant: str, cost: float) -> bool:
+        if self.running[tenant] >= self.tenant_concurrency:
+            return False
+        # A request larger than the whole capacity still runs, alone
+        return self.in_use + cost <= self.capacity or self.in_use == 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = self.queued_cost + self.in_use
+        seconds = backlog * self.seconds_per_unit / self.capacity
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(seconds)))
+
+    def _tag(self, tenant: str, cost: float) -> _Waiter:
+        if not self._queue:
+            # Nobody is waiting, so earlier usage no longer has to be paid back
+            self._finish_tags.clear()
+        start = max(self.virtual_time, self._finish_tags.get(tenant, 0.0))
+        finish = start + cost / self._weight(tenant)
+        self._finish_tags[tenant] = finish
+        return _Waiter(tenant, cost, start, finish, next(self._seq), asyncio.get_running_loop().create_future())
+
+    def _grant(self, waiter: _Waiter):
+        self.in_use += waiter.cost
+        self.running[waiter.tenant] += 1
+        self.virtual_time = max(self.virtual_time, waiter.start)
+        self._count(waiter.tenant, "admitted")
+
+    def _dequeue(self, waiter: _Waiter):
+        self.queued_cost -= waiter.cost
+        self.queued[waiter.tenant] -= 1
+        if not self.queued[waiter.tenant]:
+            del self.queued[waiter.tenant]
+
+    def _dispatch(self):
+        """Admit waiting requests in finish-time order while capacity lasts"""
+        skipped = []
+        while self._queue:
+            waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                # Timed out or disconnected; already taken off the books
+                continue
+            if self.running[waiter.tenant] >= self.tenant_concurrency:
+                # The tenant is at its cap, so the next tenant in line goes first
+                skipped.append(waiter)
+                continue
+            if not self._fits(waiter.tenant, waiter.cost):
+                # Wait for capacity rather than letting smaller requests starve this one
+                heapq.heappush(self._queue, waiter)
+                break
+            self._dequeue(waiter)
+            self._grant(waiter)
+            waiter.future.set_result(True)
+        for waiter in skipped:
+            heapq.heappush(self._queue, waiter)
+
+    def _release(self, tenant: str, cost: float, seconds: Optional[float] = None):
+        self.in_use -= cost
+        self.running[tenant] -= 1
+        if not self.running[tenant]:
+            del self.running[tenant]
+        if seconds is not None:
+            self.seconds_per_unit += SERVICE_ALPHA * (seconds / cost - self.seconds_per_unit)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, cost: float = 1.0):
+        """Hold capacity for one request, waiting for a fair turn or raising AdmissionRejected"""
+        waiter = self._tag(tenant, cost)
+        if not self._queue and self._fits(tenant, cost):
+            self._grant(waiter)
+        else:
+            if self.queued[tenant] >= self.tenant_queue or self.queued_cost + cost > self.max_queue:
+                self._count(tenant, "shed")
+                raise AdmissionRejected("Too many generation requests queued", self.retry_after())
+
+            self.queued_cost += cost
+            self.queued[tenant] += 1
+            heapq.heappush(self._queue, waiter)
+            self._dispatch()
+            try:
+                await asyncio.wait_for(waiter.future, self.max_wait)
+            except asyncio.TimeoutError:
+                self._dequeue(waiter)
+                self._count(tenant, "timed_out")
+                raise AdmissionRejected("Timed out waiting for generation capacity", self.retry_after())
+            except asyncio.CancelledError:
+                if waiter.future.cancelled():
+                    self._dequeue(waiter)
+                else:
+                    # Admitted just as the client went away
+                    self._release(tenant, cost)
+                raise
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(tenant, cost, time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "capacity": self.capacity,
+            "in_use": round(self.in_use, 2),
+            "queued_cost": round(self.queued_cost, 2),
+            "seconds_per_unit": round(self.seconds_per_unit, 3),
+            "retry_after": self.retry_after(),
+            "tenants": {
+                tenant: {
+                    "running": self.running.get(tenant, 0),
+                    "queued": self.queued.get(tenant, 0),
+                    **counts
+                }
+                for tenant, counts in self.stats.items()
+            }
+        }
+
+# Shared controller for all generation routes
+admission_controller = AdmissionController()
+
+def admission(episodes: Callable[[Dict[str, Any]], int] = lambda body: 0):
+    """
+    Route dependency that holds an admission slot for the whole request
+
+    episodes reads the episode count from the JSON body, which sets the
+    request's cost. Shed requests get a 429 with a Retry-After header.
+    """
+    async def admit(request: Request):
+        if not ADMISSION_ENABLED:
+            yield
+            return
+
+        try:
+            body = await request.json()
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            body = {}
+
+        tenant = tenant_for(request, body.get("api_key"))
+        try:
+            count = int(episodes(body) or 0)
+        except (TypeError, ValueError):
+            count = 0
+
+        try:
+            async with admission_controller.slot(tenant, request_cost(count)):
+                yield
+        except AdmissionRejected as e:
+            logger.warning(f"Shed request from {tenant}: {e.reason}")
+            raise HTTPException(status_code=429, detail=e.reason, headers={"Retry-After": str(e.retry_after)})
+
+    return Depends(admit)
@@ -0,0 +1,473 @@
+import os
+import re
+import hmac
+import mmap
+import uuid
+import hashlib
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, AsyncIterator, Iterable, Optional, Tuple, Union
+from urllib.parse import quote
+
+import httpx
+import orjson
+
+from utils.compression import SIDECAR_EXTENSIONS, compress
+
+logger = logging.getLogger(__name__)
+
+# Artifact store configuration
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local")  # local or s3
+ARTIFACT_ROOT = "./outputs"
+ARTIFACT_IO_THREADS = int(os.getenv("ARTIFACT_IO_THREADS", "4"))
+# Local files at least this large are memory-mapped for reads instead of copied in
+ARTIFACT_MMAP_MIN_SIZE = int(os.getenv("ARTIFACT_MMAP_MIN_SIZE", str(1024 * 1024)))
+ARTIFACT_CHUNK_SIZE = 256 * 1024
+
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT", "")
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "")
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "")
+ARTIFACT_S3_REGION = os.getenv("ARTIFACT_S3_REGION", "us-east-1")
+ARTIFACT_S3_ACCESS_KEY = os.getenv("ARTIFACT_S3_ACCESS_KEY", "")
+ARTIFACT_S3_SECRET_KEY = os.getenv("ARTIFACT_S3_SECRET_KEY", "")
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+# Shared pool for blocking file I/O, created on first use, so large reads and
+# writes never run on the event loop or queue behind other executor work
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=ARTIFACT_IO_THREADS, thread_name_prefix="artifact-io")
+    return _io_executor
+
+async def run_io(func, *args):
+    """Run a blocking I/O call on the artifact I/O pool"""
+    return await asyncio.get_running_loop().run_in_executor(_get_io_executor(), func, *args)
+
+def artifact_key(path: str) -> str:
+    """Store key of a path under the outputs directory, e.g. ./outputs/images/ep1/manifest.json -> images/ep1/manifest.json"""
+    key = os.path.relpath(os.path.normpath(path), os.path.normpath(ARTIFACT_ROOT)).replace(os.sep, "/")
+    if key == "." or key.startswith("../") or key == ".." or os.path.isabs(key):
+        raise ValueError(f"Path is outside the outputs directory: {path}")
+    return key
+
+def _json_bytes(data: Any) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+class ArtifactStat:
+    """
+    Size and modification time of an artifact
+
+    version is the store's own identifier of the contents when it has one
+    (an S3 ETag). For a sidecar, source is the etag of the artifact it was
+    compressed from, when the store can keep it.
+    """
+
+    __slots__ = ("size", "mtime_ns", "version", "source")
+
+    def __init__(self, size: int, mtime_ns: int, version: Optional[str] = None, source: Optional[str] = None):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.version = version
+        self.source = source
+
+    @property
+    def etag(self) -> str:
+        """Strong validator for the artifact's current contents: its version, else its size and modification time"""
+        if self.version:
+            return f'"{self.version}"'
+        return f'"{self.size:x}-{self.mtime_ns:x}"'
+
+class ArtifactStore:
+    """
+    Where generated JSON and text artifacts are kept, addressed by keys
+    relative to the outputs directory
+
+    All methods are coroutines and never block the event loop. Writes are
+    atomic: readers see the previous version or the complete new one.
+    """
+
+    async def read(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def write(self, key: str, data: Union[bytes, Iterable[bytes]]):
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> Optional[ArtifactStat]:
+        raise NotImplementedError
+
+    async def open_chunks(self, key: str, chunk_size: int = ARTIFACT_CHUNK_SIZE) -> Tuple[int, AsyncIterator[bytes]]:
+        """
+        Open an artifact for streaming: its size and its chunks
+
+        The size is that of the version opened, so it matches the chunks even
+        if the artifact is replaced in the meantime.
+        """
+        data = await self.read(key)
+        if data is None:
+            raise FileNotFoundError(key)
+
+        async def chunks():
+            for start in range(0, len(data), chunk_size):
+                yield data[start:start + chunk_size]
+
+        return len(data), chunks()
+
+    async def iter_chunks(self, key: str, chunk_size: int = ARTIFACT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Stream an artifact a chunk at a time instead of holding it in memory"""
+        _, chunks = await self.open_chunks(key, chunk_size)
+        async for chunk in chunks:
+            yield chunk
+
+    async def read_json(self, key: str) -> Optional[Any]:
+        """Parsed artifact, or None when it doesn't exist"""
+        data = await self.read(key)
+        return orjson.loads(data) if data is not None else None
+
+    async def write_json(self, key: str, data: Any):
+        await self.write(key, await run_io(_json_bytes, data))
+
+    async def read_text(self, key: str) -> Optional[str]:
+        data = await self.read(key)
+        return data.decode("utf-8") if data is not None else None
+
+    async def write_text(self, key: str, text: str):
+        await self.write(key, text.encode("utf-8"))
+
+    async def sidecar(self, key: str, encoding: str) -> str:
+        """
+        Key of a precompressed copy of an artifact, written next to it on first use
+
+        The sidecar is rewritten when the artifact changes, so each version is
+        compressed once however often it is served. It records the version it
+        was compressed from and is only reused while that version is current.
+        """
+        sidecar_key = key + SIDECAR_EXTENSIONS[encoding]
+        source, cached = await asyncio.gather(self.stat(key), self.stat(sidecar_key))
+        if cached is not None and source is not None and self._sidecar_is_fresh(source, cached):
+            return sidecar_key
+
+        data = await self.read(key)
+        if data is None:
+            raise FileNotFoundError(key)
+        # Labelled with the version stat()ed before the read, so a newer read only costs a recompression later
+        await self._write_sidecar(sidecar_key, await run_io(compress, data, encoding, True), source)
+        return sidecar_key
+
+    def _sidecar_is_fresh(self, source: ArtifactStat, cached: ArtifactStat) -> bool:
+        # Modification times can't tell: a sidecar of an older version written late is newer than its source
+        return cached.source is not None and cached.source == source.etag
+
+    async def _write_sidecar(self, key: str, data: bytes, source: Optional[ArtifactStat]):
+        await self.write(key, data)
+
+    async def close(self):
+        pass
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifacts as files under a local directory, written by temp file and rename
+
+    A sidecar's name carries the size and modification time of the version it
+    was compressed from, e.g. plan.json.1f3a-17d2c0e1b4a8e000.gz, so it is
+    only served while that version is current.
+    """
+
+    def __init__(self, root: str = ARTIFACT_ROOT):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, key))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Artifact key escapes the store: {key}")
+        return path
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _read_json(self, path: str) -> Optional[Any]:
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < ARTIFACT_MMAP_MIN_SIZE:
+                    return orjson.loads(f.read())
+                # Parse straight from the page cache, without a copy of the file on the heap
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        return orjson.loads(view)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data: Union[bytes, Iterable[bytes]]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    f.write(data)
+                else:
+                    for chunk in data:
+                        f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _sidecar_suffix(source: ArtifactStat, encoding: str) -> str:
+        return f".{source.size:x}-{source.mtime_ns:x}{SIDECAR_EXTENSIONS[encoding]}"
+
+    def _write_sidecar_file(self, path: str, encoding: str) -> str:
+        """Compress the current version of an artifact into its sidecar; returns the sidecar's suffix"""
+        with open(path, "rb") as f:
+            # Files are replaced by rename, so the open file is exactly the version fstat describes
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        suffix = self._sidecar_suffix(ArtifactStat(stat.st_size, stat.st_mtime_ns), encoding)
+        if not os.path.exists(path + suffix):
+            self._write(path + suffix, compress(data, encoding, True))
+        self._remove_other_sidecars(path, encoding, suffix)
+        return suffix
+
+    def _remove_other_sidecars(self, path: str, encoding: str, keep: str):
+        directory, name = os.path.split(path)
+        pattern = re.compile(re.escape(name) + r"(\.[0-9a-f]+-[0-9a-f]+)?" + re.escape(SIDECAR_EXTENSIONS[encoding]))
+        for entry in os.listdir(directory):
+            if entry != name + keep and pattern.fullmatch(entry):
+                try:
+                    os.remove(os.path.join(directory, entry))
+                except FileNotFoundError:
+                    pass
+
+    def _stat(self, path: str) -> Optional[ArtifactStat]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return ArtifactStat(stat.st_size, stat.st_mtime_ns)
+
+    async def read(self, key: str) -> Optional[bytes]:
+        return await run_io(self._read, self.path(key))
+
+    async def read_json(self, key: str) -> Optional[Any]:
+        return await run_io(self._read_json, self.path(key))
+
+    async def write(self, key: str, data: Union[bytes, Iterable[bytes]]):
+        await run_io(self._write, self.path(key), data)
+
+    async def stat(self, key: str) -> Optional[ArtifactStat]:
+        return await run_io(self._stat, self.path(key))
+
+    async def sidecar(self, key: str, encoding: str) -> str:
+        path = self.path(key)
+        source = await self.stat(key)
+        if source is not None:
+            suffix = self._sidecar_suffix(source, encoding)
+            if await run_io(os.path.exists, path + suffix):
+                return key + suffix
+        try:
+            return key + await run_io(self._write_sidecar_file, path, encoding)
+        except FileNotFoundError:
+            raise FileNotFoundError(key)
+
+    async def open_chunks(self, key: str, chunk_size: int = ARTIFACT_CHUNK_SIZE) -> Tuple[int, AsyncIterator[bytes]]:
+        f = await run_io(open, self.path(key), "rb")
+        try:
+            # The open file keeps this version even if the path is replaced
+            size = os.fstat(f.fileno()).st_size
+        except BaseException:
+            f.close()
+            raise
+        return size, self._file_chunks(f, size, chunk_size)
+
+    async def _file_chunks(self, f, size: int, chunk_size: int) -> AsyncIterator[bytes]:
+        try:
+            if size < ARTIFACT_MMAP_MIN_SIZE:
+                yield await run_io(f.read)
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for start in range(0, size, chunk_size):
+                    # Slicing may fault pages in from disk, so it runs on the I/O pool
+                    yield await run_io(mapped.__getitem__, slice(start, start + chunk_size))
+            finally:
+                mapped.close()
+        finally:
+            f.close()
+
+class S3ArtifactStore(ArtifactStore):
+    """
+    Artifacts as objects in an S3-compatible bucket, with path-style URLs and
+    SigV4-signed requests
+
+    A PUT only becomes visible once the whole object is stored, so writes need
+    no rename. Objects are identified by their ETag rather than Last-Modified,
+    which only has whole seconds, and sidecars record the ETag of the object
+    they were compressed from in their metadata.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = ARTIFACT_S3_ENDPOINT,
+        bucket: str = ARTIFACT_S3_BUCKET,
+        prefix: str = ARTIFACT_S3_PREFIX,
+        region: str = ARTIFACT_S3_REGION,
+        access_key: str = ARTIFACT_S3_ACCESS_KEY,
+        secret_key: str = ARTIFACT_S3_SECRET_KEY
+    ):
+        if not endpoint or not bucket:
+            raise ValueError("ARTIFACT_S3_ENDPOINT and ARTIFACT_S3_BUCKET are required for the s3 artifact backend")
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _client_for(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=60.0)
+        return self._client
+
+    def _object_path(self, key: str) -> str:
+        if key.startswith("/") or ".." in key.split("/"):
+            raise ValueError(f"Invalid artifact key: {key}")
+        name = f"{self.prefix}/{key}" if self.prefix else key
+        return quote(f"/{self.bucket}/{name}", safe="/-_.~")
+
+    def _signed_headers(
+        self,
+        method: str,
+        path: str,
+        payload_hash: str,
+        headers: Optional[Dict[str, str]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, str]:
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = now.strftime("%Y%m%d")
+        headers = {
+            **{name.lower(): value for name, value in (headers or {}).items()},
+            "host": httpx.URL(self.endpoint).netloc.decode("ascii"),
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash
+        }
+        signed = sorted(headers)
+        canonical_request = "\n".join([
+            method,
+            path,
+            "",
+            "".join(f"{name}:{str(headers[name]).strip()}\n" for name in signed),
+            ";".join(signed),
+            payload_hash
+        ])
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        ])
+
+        key = ("AWS4" + self.secret_key).encode("utf-8")
+        for part in (date, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={';'.join(signed)}, Signature={signature}"
+        )
+        return headers
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        content: Optional[bytes] = None,
+        payload_hash: str = EMPTY_SHA256,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Request:
+        path = self._object_path(key)
+        return self._client_for().build_request(
+            method, f"{self.endpoint}{path}", headers=self._signed_headers(method, path, payload_hash, headers), content=content
+        )
+
+    async def read(self, key: str) -> Optional[bytes]:
+        response = await self._client_for().send(self._request("GET", key))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    async def write(self, key: str, data: Union[bytes, Iterable[bytes]], metadata: Optional[Dict[str, str]] = None):
+        if not isinstance(data, bytes):
+            data = await run_io(b"".join, data)
+        payload_hash = await run_io(lambda: hashlib.sha256(data).hexdigest())
+        headers = {f"x-amz-meta-{name}": value for name, value in (metadata or {}).items()}
+        response = await self._client_for().send(self._request("PUT", key, data, payload_hash, headers))
+        response.raise_for_status()
+
+    async def stat(self, key: str) -> Optional[ArtifactStat]:
+        response = await self._client_for().send(self._request("HEAD", key))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        modified = parsedate_to_datetime(response.headers["last-modified"])
+        return ArtifactStat(
+            int(response.headers.get("content-length", 0)),
+            int(modified.timestamp()) * 1_000_000_000,
+            version=response.headers.get("etag", "").strip('"') or None,
+            source=response.headers.get("x-amz-meta-source-etag")
+        )
+
+    async def _write_sidecar(self, key: str, data: bytes, source: Optional[ArtifactStat]):
+        await self.write(key, data, metadata={"source-etag": source.etag} if source is not None else None)
+
+    async def open_chunks(self, key: str, chunk_size: int = ARTIFACT_CHUNK_SIZE) -> Tuple[int, AsyncIterator[bytes]]:
+        response = await self._client_for().send(self._request("GET", key), stream=True)
+        try:
+            if response.status_code == 404:
+                raise FileNotFoundError(key)
+            response.raise_for_status()
+            size = int(response.headers["content-length"])
+        except BaseException:
+            await response.aclose()
+            raise
+
+        async def chunks():
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    yield chunk
+            finally:
+                await response.aclose()
+
+        return size, chunks()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def create_artifact_store(backend: str = ARTIFACT_BACKEND) -> ArtifactStore:
+    if backend == "s3":
+        logger.info(f"Artifacts are stored in s3 bucket {ARTIFACT_S3_BUCKET} at {ARTIFACT_S3_ENDPOINT}")
+        return S3ArtifactStore()
+    if backend != "local":
+        raise ValueError(f"Unsupported artifact backend: {backend}")
+    return LocalArtifactStore()
+
+# Shared store for the agents and routes
+artifact_store = create_artifact_store()
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from utils.artifact_store import artifact_key, artifact_store
+from utils.helpers import update_job_checkpoint
+
+logger = logging.getLogger(__name__)
+
+# Seconds between manifest saves while units complete; units finishing in between share one save
+CHECKPOINT_SAVE_INTERVAL = float(os.getenv("CHECKPOINT_SAVE_INTERVAL", "1.0"))
+
+def inputs_fingerprint(*parts: Any) -> str:
+    """Stable id of a job's inputs, so a checkpoint is only resumed by the same work"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class Checkpoint:
+    """
+    A job's manifest, rewritten atomically in the artifact store as units of
+    work complete
+
+    The manifest keeps its usual layout, with the completed units listed
+    under units_field in index order, plus status ("partial" or "complete"),
+    completed and total counts and a fingerprint of the job's inputs. A job
+    started again with the same inputs, after a crash or as a retry, picks up
+    the completed units and only does the rest. The job record references the
+    manifest from the start, so result_path always points at a coherent,
+    partially filled output. Call load() before using it.
+
+    The manifest is saved at most every CHECKPOINT_SAVE_INTERVAL seconds, so
+    a job with many short units doesn't rewrite the whole manifest for each
+    one. Units that complete in between are written by one deferred save; a
+    crash loses at most that interval's units, which are redone on resume.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        units_field: str,
+        index_field: str,
+        fingerprint: str,
+        total: int,
+        header: Optional[Dict[str, Any]] = None,
+        job_id: Optional[str] = None
+    ):
+        self.path = path
+        self.units_field = units_field
+        self.index_field = index_field
+        self.fingerprint = fingerprint
+        self.total = total
+        self.header = dict(header or {})
+        self.job_id = job_id
+        self.units: Dict[int, Dict[str, Any]] = {}
+        self.status = "partial"
+        self.key = artifact_key(path)
+        # Saves are serialized so an older manifest never lands after a newer one
+        self._lock = asyncio.Lock()
+        self._saved_at = 0.0
+        self._pending: Optional[asyncio.Task] = None
+
+    async def load(self) -> "Checkpoint":
+        """Pick up the units of an earlier run with the same inputs"""
+        try:
+            manifest = await artifact_store.read_json(self.key)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return self
+        if manifest is None or manifest.get("fingerprint") != self.fingerprint:
+            # Nothing to resume, or different inputs; the old manifest is replaced as units complete
+            return self
+
+        for unit in manifest.get(self.units_field, []):
+            self.units[unit[self.index_field]] = unit
+        if self.units:
+            logger.info(f"Resuming from {self.path}: {len(self.units)}/{self.total} units done")
+        return self
+
+    def completed(self, index: int) -> Optional[Dict[str, Any]]:
+        """The recorded unit at index, if it completed in this or an earlier run"""
+        return self.units.get(index)
+
+    def manifest(self) -> Dict[str, Any]:
+        return {
+            **self.header,
+            "status": self.status,
+            "fingerprint": self.fingerprint,
+            "completed": len(self.units),
+            "total": self.total,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            self.units_field: [self.units[index] for index in sorted(self.units)]
+        }
+
+    async def save(self) -> Dict[str, Any]:
+        async with self._lock:
+            manifest = self.manifest()
+            await artifact_store.write_json(self.key, manifest)
+            self._saved_at = time.monotonic()
+        if self.job_id:
+            update_job_checkpoint(self.job_id, self.path, manifest["completed"], self.total)
+        return manifest
+
+    async def _save_later(self, delay: float):
+        await asyncio.sleep(delay)
+        # Units recorded from here on need a save of their own
+        self._pending = None
+        try:
+            await self.save()
+        except Exception as e:
+            logger.error(f"Failed to save checkpoint {self.path}: {str(e)}")
+
+    def _cancel_pending(self) -> bool:
+        if self._pending is None or self._pending.done():
+            return False
+        self._pending.cancel()
+        self._pending = None
+        return True
+
+    async def record(self, index: int, unit: Dict[str, Any]):
+        """Store a completed unit, saving the manifest now or in the next deferred save"""
+        self.units[index] = {self.index_field: index, **unit}
+        if self._pending is not None and not self._pending.done():
+            return
+        delay = self._saved_at + CHECKPOINT_SAVE_INTERVAL - time.monotonic()
+        if delay <= 0:
+            await self.save()
+        else:
+            self._pending = asyncio.create_task(self._save_later(delay))
+
+    async def flush(self):
+        """Save now if units are waiting for a deferred save"""
+        if self._cancel_pending():
+            await self.save()
+
+    async def finish(self, **fields: Any) -> Dict[str, Any]:
+        """Mark the manifest complete, adding any final fields"""
+        self._cancel_pending()
+        self.header.update(fields)
+        self.status = "complete"
+        return await self.save()
+
+class CheckpointLog:
+    """
+    Append-only checkpoint for runs with thousands of units
+
+    Each completed unit is one JSON line, flushed as soon as it is written, so
+    recording stays cheap however long the run gets. A line cut short by a
+    crash is ignored on the next load, and the first line appended after it
+    starts on a new line.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.units: Dict[int, Dict[str, Any]] = {}
+        self._file = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        unit = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.units[unit["index"]] = unit
+        except FileNotFoundError:
+            return
+        if self.units:
+            logger.info(f"Resuming from {self.path}: {len(self.units)} units recorded")
+
+    def completed(self, index: int) -> Optional[Dict[str, Any]]:
+        return self.units.get(index)
+
+    def record(self, index: int, unit: Dict[str, Any]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a+")
+            # A line cut short by a crash has no newline; end it so the next line isn't glued onto it
+            if self._file.tell():
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        self.units[index] = {"index": index, **unit}
+        self._file.write(json.dumps(self.units[index]) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
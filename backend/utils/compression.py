@@ -0,0 +1,167 @@
+import os
+import gzip
+import zlib
+import logging
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Compression configuration
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Sidecar files are compressed once, so they use the slowest, smallest settings
+SIDECAR_GZIP_LEVEL = 9
+SIDECAR_BROTLI_QUALITY = 11
+SIDECAR_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding the client accepts, preferring brotli over gzip"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(data: bytes, encoding: str, sidecar: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=SIDECAR_BROTLI_QUALITY if sidecar else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=SIDECAR_GZIP_LEVEL if sidecar else GZIP_LEVEL, mtime=0)
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Weak If-None-Match comparison against etag and its per-encoding variants
+
+    Returns the validator that matched, as the server sends it, so a 304 can
+    repeat it: etag itself or its "-br"/"-gzip" variant. None if nothing matched.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == opaque:
+            return etag
+        base, _, encoding = candidate.rpartition("-")
+        if base == opaque and encoding in SIDECAR_EXTENSIONS:
+            return encoded_etag(etag, encoding)
+    return None
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    # Different bytes need a different strong validator
+    return f'"{etag.strip(chr(34))}-{encoding}"'
+
+class CompressionMiddleware:
+    """
+    Compress complete responses with brotli or gzip
+
+    Only single-message bodies of at least minimum_size bytes with a text-like
+    content type are compressed. Streaming responses such as server-sent
+    events go out untouched, since buffering them would hold events back, and
+    so do responses that already carry a Content-Encoding, such as sidecars.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            message["body"] = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(message["body"]))
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+class StreamCompressor:
+    """Incremental brotli or gzip compression, for bodies written in chunks"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
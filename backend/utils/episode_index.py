@@ -0,0 +1,227 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.semantic_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Episode de-duplication configuration
+EPISODE_DEDUP_ENABLED = os.getenv("EPISODE_DEDUP_ENABLED", "false").lower() == "true"
+EPISODE_DEDUP_THRESHOLD = float(os.getenv("EPISODE_DEDUP_THRESHOLD", "0.5"))
+EPISODE_DEDUP_MAX_RETRIES = int(os.getenv("EPISODE_DEDUP_MAX_RETRIES", "1"))
+EPISODE_INDEX_PATH = os.getenv("EPISODE_INDEX_PATH", "./outputs/episode_index.jsonl")
+# Recently added episodes scanned directly before being merged into the sorted band keys
+EPISODE_INDEX_TAIL_SIZE = int(os.getenv("EPISODE_INDEX_TAIL_SIZE", "4096"))
+
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard almost always share a bucket
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_MERSENNE_PRIME = np.int64((1 << 31) - 1)
+_rng = np.random.default_rng(42)
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+_BAND_KEY_MULTIPLIER = np.uint64(0x100000001B3)
+
+EPISODE_FIELDS = ("title", "setting", "items", "conflict")
+
+def episode_shingles(episode: Dict[str, Any]) -> set:
+    """Word unigrams and bigrams of the fields that make an episode distinct"""
+    shingles = set()
+    for field in EPISODE_FIELDS:
+        value = episode.get(field) or ""
+        if isinstance(value, (list, tuple)):
+            value = " ".join(str(v) for v in value)
+        tokens = normalize_text(value)
+        shingles.update(tokens)
+        shingles.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return shingles
+
+def minhash_signature(shingles: set) -> np.ndarray:
+    """Compute a MinHash signature with NUM_PERM universal hash functions"""
+    if not shingles:
+        return np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.int64)
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.int64,
+        count=len(shingles)
+    )
+    # (a * h + b) mod p for every permutation and shingle, then the minimum per permutation
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, np.newaxis]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """One 64-bit key per LSH band for each signature, shape (n, LSH_BANDS)"""
+    rows = signatures.reshape(len(signatures), LSH_BANDS, LSH_ROWS).astype(np.uint64)
+    keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+    for row in range(LSH_ROWS):
+        # Wraps around in uint64; colliding keys only add candidates that fail the similarity check
+        keys = keys * _BAND_KEY_MULTIPLIER + rows[:, :, row]
+    return keys
+
+class EpisodeIndex:
+    """
+    MinHash/LSH index over every episode idea ever generated
+
+    Signatures are rows of one int32 matrix. For each band, the band keys of
+    all indexed episodes are kept sorted, so finding the episodes that share a
+    band with a query is a binary search. Recent episodes sit in a short
+    unsorted tail that is scanned directly and merged in once it reaches
+    EPISODE_INDEX_TAIL_SIZE. Episodes are appended to a JSONL file so the
+    index survives restarts; file I/O and scoring run on a worker thread.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = EPISODE_DEDUP_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.titles: List[str] = []
+        self._signatures = np.zeros((0, NUM_PERM), dtype=np.int32)
+        # Band keys of the episodes not merged into the sorted arrays yet
+        self._tail_keys = np.zeros((0, LSH_BANDS), dtype=np.uint64)
+        # Per band: keys of the first _sorted_count episodes in order, and their episode ids
+        self._sorted_keys = [np.zeros(0, dtype=np.uint64) for _ in range(LSH_BANDS)]
+        self._sorted_ids = [np.zeros(0, dtype=np.int64) for _ in range(LSH_BANDS)]
+        self._sorted_count = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        titles, signatures = [], []
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    titles.append(record["title"])
+                    signatures.append(record["signature"])
+        if titles:
+            self._insert(titles, np.array(signatures, dtype=np.int64))
+        logger.info(f"Loaded {len(self.titles)} episodes into the episode index")
+
+    def _insert(self, titles: List[str], signatures: np.ndarray):
+        count = len(self.titles)
+        needed = count + len(titles)
+        if needed > len(self._signatures):
+            # Grow geometrically so appends stay amortized O(1)
+            capacity = max(needed, 2 * len(self._signatures), 1024)
+            grown_signatures = np.zeros((capacity, NUM_PERM), dtype=np.int32)
+            grown_signatures[:count] = self._signatures[:count]
+            self._signatures = grown_signatures
+
+        self._signatures[count:needed] = signatures
+        self._tail_keys = np.concatenate([self._tail_keys, band_keys(signatures)])
+        self.titles.extend(titles)
+        if needed - self._sorted_count >= EPISODE_INDEX_TAIL_SIZE:
+            self._merge_tail()
+
+    def _merge_tail(self):
+        count = len(self.titles)
+        tail_ids = np.arange(self._sorted_count, count, dtype=np.int64)
+        for band in range(LSH_BANDS):
+            tail_keys = self._tail_keys[:, band]
+            order = np.argsort(tail_keys, kind="stable")
+            positions = np.searchsorted(self._sorted_keys[band], tail_keys[order], side="right")
+            self._sorted_keys[band] = np.insert(self._sorted_keys[band], positions, tail_keys[order])
+            self._sorted_ids[band] = np.insert(self._sorted_ids[band], positions, tail_ids[order])
+        self._sorted_count = count
+        self._tail_keys = np.zeros((0, LSH_BANDS), dtype=np.uint64)
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        found = []
+        for band in range(LSH_BANDS):
+            sorted_keys = self._sorted_keys[band]
+            start = np.searchsorted(sorted_keys, keys[band], side="left")
+            end = np.searchsorted(sorted_keys, keys[band], side="right")
+            if end > start:
+                found.append(self._sorted_ids[band][start:end])
+
+        if len(self._tail_keys):
+            found.append(np.flatnonzero((self._tail_keys == keys).any(axis=1)) + self._sorted_count)
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def _best_match(self, signature: np.ndarray, extra: List[Tuple[str, np.ndarray]] = ()) -> Optional[Dict[str, Any]]:
+        best = None
+        candidates = self._candidates(band_keys(signature[np.newaxis, :])[0])
+        if len(candidates):
+            similarities = (self._signatures[candidates] == signature).mean(axis=1)
+            top = int(np.argmax(similarities))
+            if similarities[top] >= self.threshold:
+                best = {"title": self.titles[candidates[top]], "similarity": float(similarities[top])}
+
+        # Episodes earlier in the same batch are not indexed yet
+        for title, other in extra:
+            similarity = float(np.mean(other == signature))
+            if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                best = {"title": title, "similarity": similarity}
+
+        return best
+
+    def _find_duplicates(self, episodes: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        signatures = [minhash_signature(episode_shingles(episode)) for episode in episodes]
+        matches = []
+        accepted: List[Tuple[str, np.ndarray]] = []
+
+        with self._lock:
+            self._load()
+            for episode, signature in zip(episodes, signatures):
+                match = self._best_match(signature, accepted)
+                matches.append(match)
+                if match is None:
+                    accepted.append((episode.get("title", ""), signature))
+        return matches
+
+    def _add(self, episodes: List[Dict[str, Any]]):
+        if not episodes:
+            return
+        titles = [episode.get("title", "") for episode in episodes]
+        signatures = np.array([minhash_signature(episode_shingles(episode)) for episode in episodes])
+        with self._lock:
+            self._load()
+            self._insert(titles, signatures)
+
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    for title, signature in zip(titles, signatures):
+                        f.write(json.dumps({"title": title, "signature": signature.tolist()}) + "\n")
+
+    def _load_now(self):
+        with self._lock:
+            self._load()
+
+    async def load(self):
+        """Read the persisted index now, on a worker thread, instead of on first use"""
+        await asyncio.get_running_loop().run_in_executor(None, self._load_now)
+
+    async def find_duplicates(self, episodes: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Check a batch of episodes against the index and against each other
+
+        Returns, for each episode, None if it is novel or the closest earlier
+        episode ({"title", "similarity"}) if it is a near-duplicate.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self._find_duplicates, episodes)
+
+    async def add(self, episodes: List[Dict[str, Any]]):
+        """Add episodes to the index and persist them"""
+        await asyncio.get_running_loop().run_in_executor(None, self._add, episodes)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+# Shared index of all generated episodes
+episode_index = EpisodeIndex(EPISODE_INDEX_PATH)
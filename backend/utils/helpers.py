@@ -1,38 +1,79 @@
-import re
-from typing import List, Dict, Any
+import uuid
+import logging
+from typing import List, Dict, Any, Optional, Awaitable
+
+from utils.script_parser import parse_script
+from utils.job_events import job_events
+
+logger = logging.getLogger(__name__)
 
 # Global jobs store
 jobs = {}
 
+def create_job(job_type: str) -> str:
+    """Register a new background job and return its id"""
+    job_id = str(uuid.uuid4())
+    jobs[job_id] = {
+        "type": job_type,
+        "status": "pending",
+        "progress": 0,
+        "result_path": None,
+        "checkpoint": None,
+        "completed_units": None,
+        "total_units": None
+    }
+    return job_id
+
+def job_snapshot(job_id: str) -> Dict[str, Any]:
+    """Public view of a job, as returned by the jobs API"""
+    job = jobs[job_id]
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "progress": job["progress"],
+        "result_path": job["result_path"],
+        "completed_units": job["completed_units"],
+        "total_units": job["total_units"]
+    }
+
 def update_job_progress(job_id: str, progress: int):
     """Update the progress of a job"""
     if job_id in jobs:
         jobs[job_id]["progress"] = progress
+        job_events.publish(job_id, job_snapshot(job_id))
 
-def extract_narration_lines(script: str) -> List[str]:
-    """Extract narration lines from the script"""
-    lines = script.split('\n')
-    narration_lines = []
-
-    in_narration_block = False
-
-    for line in lines:
-        trimmed_line = line.strip()
+def update_job_status(job_id: str, status: str, result_path: Optional[str] = None):
+    """Update the status (and optionally the result path) of a job"""
+    if job_id in jobs:
+        jobs[job_id]["status"] = status
+        if result_path is not None:
+            jobs[job_id]["result_path"] = result_path
+        job_events.publish(job_id, job_snapshot(job_id))
 
-        # Look for narration/voiceover sections
-        if re.search(r'narration:', trimmed_line, re.IGNORECASE) or re.search(r'voiceover:', trimmed_line, re.IGNORECASE):
-            in_narration_block = True
-            # Extract the actual narration text if it's on the same line
-            match = re.search(r'(?:narration|voiceover):(.*)', trimmed_line, re.IGNORECASE)
-            if match and match.group(1).strip():
-                narration_lines.append(match.group(1).strip())
+def update_job_checkpoint(job_id: str, checkpoint_path: str, completed: int, total: int):
+    """
+    Point a job at its checkpointed manifest and record how many units are done
 
-        # If we're in a narration block and the line isn't a new section header
-        elif in_narration_block and not trimmed_line.endswith(':') and not trimmed_line.startswith('[') and trimmed_line:
-            narration_lines.append(trimmed_line)
+    The manifest doubles as the job's result, so result_path is set as soon as
+    the first checkpoint is written. Subscribers see the counts with the next
+    progress or status update.
+    """
+    if job_id in jobs:
+        jobs[job_id].update({
+            "checkpoint": checkpoint_path,
+            "result_path": checkpoint_path,
+            "completed_units": completed,
+            "total_units": total
+        })
 
-        # Check if we're exiting a narration block
-        elif in_narration_block and (trimmed_line.endswith(':') or trimmed_line.startswith('[') or not trimmed_line):
-            in_narration_block = False
+async def run_job(job_id: str, work: Awaitable[Any]):
+    """Await a job's work in the background, marking the job failed if it raises"""
+    try:
+        await work
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {str(e)}")
+        update_job_status(job_id, "failed")
 
-    return narration_lines
+def extract_narration_lines(script: str) -> List[str]:
+    """Extract narration lines from the script"""
+    return parse_script(script).narration_lines
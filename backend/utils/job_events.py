@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Dict, Any, List, Set
+
+logger = logging.getLogger(__name__)
+
+# Job states after which no more events are sent
+FINAL_JOB_STATES = {"completed", "failed"}
+
+class Subscription:
+    """
+    Latest state of every job a subscriber follows
+
+    Updates coalesce: if a job changes several times before the subscriber
+    reads, only the newest snapshot is delivered. Publishing is therefore a
+    dict write plus an event set per subscriber, however slow the client.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.job_ids: Set[str] = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._event = asyncio.Event()
+
+    def _deliver(self, job_id: str, snapshot: Dict[str, Any]):
+        self._pending[job_id] = snapshot
+        self._event.set()
+
+    async def next_updates(self, timeout: float = None) -> List[Dict[str, Any]]:
+        """Wait for updates and return the latest snapshot of each changed job"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._event.clear()
+        updates, self._pending = list(self._pending.values()), {}
+        return updates
+
+class JobEventBroker:
+    """Fans job updates out to SSE and WebSocket subscribers"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, subscription: Subscription, job_id: str):
+        subscription.job_ids.add(job_id)
+        self._subscribers.setdefault(job_id, set()).add(subscription)
+
+    def unsubscribe(self, subscription: Subscription, job_id: str):
+        subscription.job_ids.discard(job_id)
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def close(self, subscription: Subscription):
+        for job_id in list(subscription.job_ids):
+            self.unsubscribe(subscription, job_id)
+
+    def publish(self, job_id: str, snapshot: Dict[str, Any]):
+        """Send a job snapshot to everyone following the job"""
+        subscribers = self._subscribers.get(job_id)
+        if not subscribers:
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        for subscription in list(subscribers):
+            if subscription.loop is running_loop:
+                subscription._deliver(job_id, snapshot)
+            else:
+                # Job updated from a worker thread
+                subscription.loop.call_soon_threadsafe(subscription._deliver, job_id, snapshot)
+
+    def subscriber_count(self, job_id: str) -> int:
+        return len(self._subscribers.get(job_id, ()))
+
+# Shared broker for all job updates
+job_events = JobEventBroker()
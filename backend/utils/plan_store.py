@@ -0,0 +1,389 @@
+import os
+import re
+import json
+import uuid
+import asyncio
+import logging
+import threading
+from datetime import datetime, date, timezone
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Analytics export configuration
+ANALYTICS_EXPORT_ENABLED = os.getenv("ANALYTICS_EXPORT_ENABLED", "false").lower() == "true"
+ANALYTICS_FORMAT = os.getenv("ANALYTICS_FORMAT", "parquet")  # parquet or arrow
+ANALYTICS_DIR = "./outputs/analytics"
+# Buffered rows are written once this many are waiting, or every ANALYTICS_FLUSH_SECONDS
+ANALYTICS_FLUSH_ROWS = int(os.getenv("ANALYTICS_FLUSH_ROWS", "1000"))
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "60"))
+# Partitions with this many part files are merged into one
+ANALYTICS_COMPACT_FILES = int(os.getenv("ANALYTICS_COMPACT_FILES", "16"))
+
+TABLES = ("plans", "episodes", "social_posts")
+
+_schemas: Dict[str, Any] = {}
+
+def _require_pyarrow():
+    if pa is None:
+        raise ValueError("Analytics export requires pyarrow to be installed")
+
+def table_schema(table: str) -> "pa.Schema":
+    """Arrow schema of one analytics table, without the date/series partition columns"""
+    _require_pyarrow()
+    if not _schemas:
+        generated_at = pa.field("generated_at", pa.timestamp("us", tz="UTC"))
+        _schemas["plans"] = pa.schema([
+            pa.field("plan_id", pa.string()),
+            generated_at,
+            pa.field("series_title", pa.string()),
+            pa.field("cat_name", pa.string()),
+            pa.field("content_style", pa.string()),
+            pa.field("api_provider", pa.string()),
+            pa.field("series_concept", pa.string()),
+            pa.field("num_episodes", pa.int32()),
+            pa.field("cat_personality", pa.string()),  # JSON, its keys vary between plans
+        ])
+        _schemas["episodes"] = pa.schema([
+            pa.field("plan_id", pa.string()),
+            generated_at,
+            pa.field("episode_number", pa.int32()),
+            pa.field("title", pa.string()),
+            pa.field("premise", pa.string()),
+            pa.field("setting", pa.string()),
+            pa.field("items", pa.list_(pa.string())),
+            pa.field("conflict", pa.string()),
+            pa.field("resolution", pa.string()),
+        ])
+        _schemas["social_posts"] = pa.schema([
+            pa.field("plan_id", pa.string()),
+            generated_at,
+            pa.field("episode_number", pa.int32()),
+            pa.field("episode_title", pa.string()),
+            pa.field("platform", pa.string()),
+            pa.field("post_text", pa.string()),
+            pa.field("hashtags", pa.list_(pa.string())),
+            pa.field("best_time_to_post", pa.string()),
+            pa.field("engagement_prompt", pa.string()),
+        ])
+    return _schemas[table]
+
+def series_slug(series_title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (series_title or "untitled").lower()).strip("-") or "untitled"
+
+def _file_format() -> str:
+    if ANALYTICS_FORMAT not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown analytics format: {ANALYTICS_FORMAT}")
+    return ANALYTICS_FORMAT
+
+def _partition_dir(table: str, day: str, slug: str) -> str:
+    return os.path.join(ANALYTICS_DIR, table, f"date={day}", f"series={slug}")
+
+def _part_files(partition_dir: str) -> List[str]:
+    suffix = f".{_file_format()}"
+    return sorted(
+        os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+        if name.startswith("part-") and name.endswith(suffix)
+    )
+
+def _write_part(arrow_table: "pa.Table", partition_dir: str) -> str:
+    file_format = _file_format()
+    os.makedirs(partition_dir, exist_ok=True)
+    file_name = f"part-{uuid.uuid4().hex}.{file_format}"
+    path = os.path.join(partition_dir, file_name)
+    # Dot-prefixed names are skipped by dataset scans
+    tmp_path = os.path.join(partition_dir, f".{file_name}.tmp")
+
+    if file_format == "parquet":
+        pq.write_table(arrow_table, tmp_path, compression="zstd")
+    else:
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    os.replace(tmp_path, path)
+    return path
+
+def _read_part(path: str) -> "pa.Table":
+    if _file_format() == "parquet":
+        return pq.read_table(path)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+def append_records(table: str, rows: List[Dict[str, Any]], series_title: str, generated_at: datetime) -> Optional[str]:
+    """
+    Append rows to a table as a new part file
+
+    Files are only ever added or merged: each call adds one file under
+    <table>/date=<YYYY-MM-DD>/series=<slug>/, written to a temporary name and
+    renamed so readers never see a partial file.
+    """
+    if not rows:
+        return None
+    arrow_table = pa.Table.from_pylist(rows, schema=table_schema(table))
+    return _write_part(arrow_table, _partition_dir(table, generated_at.date().isoformat(), series_slug(series_title)))
+
+def compact_partition(table: str, partition_dir: str) -> Optional[str]:
+    """
+    Merge a partition's part files into one
+
+    The merged file is renamed into place before the parts are removed, so a
+    scan running at that moment may count the partition's rows twice, but
+    never loses them.
+    """
+    parts = _part_files(partition_dir)
+    if len(parts) < 2:
+        return None
+    merged = pa.concat_tables([_read_part(path).cast(table_schema(table)) for path in parts])
+    path = _write_part(merged, partition_dir)
+    for part in parts:
+        os.remove(part)
+    logger.info(f"Compacted {len(parts)} files in {partition_dir}")
+    return path
+
+class AnalyticsBuffer:
+    """
+    Rows waiting to be written, grouped by table and partition
+
+    Exports only add rows to memory. Each flush writes one part file per
+    partition, off the event loop when there is one, and merges partitions
+    that have collected ANALYTICS_COMPACT_FILES files. A flush happens once
+    ANALYTICS_FLUSH_ROWS rows are waiting, every ANALYTICS_FLUSH_SECONDS while a
+    loop is running, and on close().
+    """
+
+    def __init__(self):
+        self._rows: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        # One flush at a time, so compaction never races a write to the same partition
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._count
+
+    def add(self, table: str, rows: List[Dict[str, Any]], series_title: str, generated_at: datetime):
+        """Buffer rows, flushing in the background once enough are waiting"""
+        if not rows:
+            return
+        key = (table, generated_at.date().isoformat(), series_slug(series_title))
+        with self._lock:
+            self._rows.setdefault(key, []).extend(rows)
+            self._count += len(rows)
+            full = self._count >= ANALYTICS_FLUSH_ROWS
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            if full:
+                self.flush()
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._flush_periodically())
+        if full:
+            loop.run_in_executor(None, self.flush)
+
+    def flush(self) -> List[str]:
+        """Write every buffered row and return the new files; blocks, so call it off the event loop"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._rows, self._count = self._rows, {}, 0
+
+            paths = []
+            for (table, day, slug), rows in pending.items():
+                partition_dir = _partition_dir(table, day, slug)
+                try:
+                    paths.append(_write_part(pa.Table.from_pylist(rows, schema=table_schema(table)), partition_dir))
+                    if len(_part_files(partition_dir)) >= ANALYTICS_COMPACT_FILES:
+                        compact_partition(table, partition_dir)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(rows)} {table} rows to {partition_dir}: {str(e)}")
+            return paths
+
+    async def _flush_periodically(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(ANALYTICS_FLUSH_SECONDS)
+            if self._count:
+                await loop.run_in_executor(None, self.flush)
+
+    async def close(self):
+        """Stop the periodic flush and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._count:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+analytics_buffer = AnalyticsBuffer()
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+def content_plan_records(
+    plan: Dict[str, Any],
+    config: Dict[str, Any],
+    plan_id: str,
+    generated_at: datetime
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Flatten a ContentPlan into one plans row and one episodes row per episode"""
+    episodes = plan.get("episodes", [])
+    plan_row = {
+        "plan_id": plan_id,
+        "generated_at": generated_at,
+        "series_title": _text(config.get("series_title")),
+        "cat_name": _text(config.get("cat_name")),
+        "content_style": _text(config.get("content_style")),
+        "api_provider": _text(config.get("api_provider")),
+        "series_concept": _text(plan.get("series_concept")),
+        "num_episodes": len(episodes),
+        "cat_personality": json.dumps(plan.get("cat_personality", {})),
+    }
+    episode_rows = [
+        {
+            "plan_id": plan_id,
+            "generated_at": generated_at,
+            "episode_number": number,
+            "title": _text(episode.get("title")),
+            "premise": _text(episode.get("premise")),
+            "setting": _text(episode.get("setting")),
+            "items": [_text(item) for item in episode.get("items", [])],
+            "conflict": _text(episode.get("conflict")),
+            "resolution": _text(episode.get("resolution")),
+        }
+        for number, episode in enumerate(episodes, start=1)
+    ]
+    return {"plans": [plan_row], "episodes": episode_rows}
+
+def social_media_records(
+    plans: List[Dict[str, Any]],
+    plan_id: str,
+    generated_at: datetime,
+    titles: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Flatten SocialMediaPlans into one row per platform post"""
+    rows = []
+    for number, plan in enumerate(plans, start=1):
+        title = titles[number - 1] if titles and number <= len(titles) else None
+        for post in plan.get("platforms", []):
+            rows.append({
+                "plan_id": plan_id,
+                "generated_at": generated_at,
+                "episode_number": number,
+                "episode_title": _text(title),
+                "platform": _text(post.get("name")),
+                "post_text": _text(post.get("post_text")),
+                "hashtags": [_text(tag) for tag in post.get("hashtags", [])],
+                "best_time_to_post": _text(post.get("best_time_to_post")),
+                "engagement_prompt": _text(post.get("engagement_prompt")),
+            })
+    return rows
+
+def export_content_plan(plan: Dict[str, Any], config: Dict[str, Any], generated_at: Optional[datetime] = None) -> str:
+    """Buffer a generated content plan for the plans and episodes tables, returning its plan_id"""
+    _require_pyarrow()
+    generated_at = generated_at or datetime.now(timezone.utc)
+    plan_id = uuid.uuid4().hex
+    series_title = config.get("series_title", "")
+    for table, rows in content_plan_records(plan, config, plan_id, generated_at).items():
+        analytics_buffer.add(table, rows, series_title, generated_at)
+    return plan_id
+
+def export_social_media_plans(
+    plans: List[Dict[str, Any]],
+    plan_id: str,
+    series_title: str,
+    titles: Optional[List[str]] = None,
+    generated_at: Optional[datetime] = None
+):
+    """Buffer a season of social media plans for the social_posts table"""
+    _require_pyarrow()
+    generated_at = generated_at or datetime.now(timezone.utc)
+    analytics_buffer.add("social_posts", social_media_records(plans, plan_id, generated_at, titles), series_title, generated_at)
+
+def ingest_json_files(paths: Iterable[str], series_title: str = "Mischievous Cat Shopper") -> Dict[str, int]:
+    """
+    Backfill the analytics tables from existing plan JSON files
+
+    Content plans and single-episode social media plans are recognised by
+    their keys; anything else is skipped. The file's modification time is used
+    as its generation time. Rows are written in large part files as they
+    add up, and the rest before returning.
+    """
+    counts = {"content_plans": 0, "social_media_plans": 0, "skipped": 0}
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            counts["skipped"] += 1
+            continue
+
+        generated_at = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+        if isinstance(data, dict) and "episodes" in data and "series_concept" in data:
+            export_content_plan(data, {"series_title": series_title}, generated_at)
+            counts["content_plans"] += 1
+        elif isinstance(data, dict) and "platforms" in data and "content_variations" in data:
+            plan_id = os.path.splitext(os.path.basename(path))[0]
+            export_social_media_plans([data], plan_id, series_title, generated_at=generated_at)
+            counts["social_media_plans"] += 1
+        else:
+            counts["skipped"] += 1
+    analytics_buffer.flush()
+    logger.info(f"Ingested {counts['content_plans']} content plans and {counts['social_media_plans']} social media plans")
+    return counts
+
+def query(
+    table: str,
+    columns: Optional[List[str]] = None,
+    series_title: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    filter: Optional["ds.Expression"] = None
+) -> "pa.Table":
+    """
+    Scan an analytics table into an Arrow table
+
+    The date and series arguments prune whole partition directories, only the
+    requested columns are read, and any extra pyarrow filter expression is
+    pushed down into the scan.
+    """
+    _require_pyarrow()
+    if table not in TABLES:
+        raise ValueError(f"Unknown analytics table: {table}")
+
+    table_dir = os.path.join(ANALYTICS_DIR, table)
+    schema = table_schema(table).append(pa.field("date", pa.string())).append(pa.field("series", pa.string()))
+    if not os.path.isdir(table_dir):
+        return schema.empty_table().select(columns) if columns else schema.empty_table()
+
+    dataset = ds.dataset(
+        table_dir,
+        format="ipc" if _file_format() == "arrow" else "parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.string()), ("series", pa.string())]), flavor="hive"),
+        schema=schema
+    )
+
+    expression = filter
+    conditions = []
+    if series_title:
+        conditions.append(ds.field("series") == series_slug(series_title))
+    # ISO dates compare correctly as strings
+    if date_from:
+        conditions.append(ds.field("date") >= date_from.isoformat())
+    if date_to:
+        conditions.append(ds.field("date") <= date_to.isoformat())
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    return dataset.to_table(columns=columns, filter=expression)
@@ -0,0 +1,382 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import threading
+import tracemalloc
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Profiler configuration
+PROFILER_ALWAYS_ON = os.getenv("PROFILER_ALWAYS_ON", "false").lower() == "true"
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.01"))
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "20000"))
+PROFILER_ALLOCATION_FRAMES = int(os.getenv("PROFILER_ALLOCATION_FRAMES", "32"))
+PROFILER_MAX_DEPTH = 128
+
+# Per-thread CPU clocks tell running threads from waiting ones (Linux and most Unixes)
+THREAD_CPU_CLOCKS = hasattr(time, "pthread_getcpuclockid")
+# Share of the interval a thread must have spent on CPU to count as running,
+# so threads that only wake up briefly from a wait are left out
+RUNNING_CPU_FRACTION = 0.1
+
+# Functions a thread sits in while it waits rather than runs, keyed by file
+# name. Samples whose innermost frame is one of these are left out, which is
+# the only idle filter where per-thread CPU clocks are missing
+IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# Request being handled by the current task, for labelling profiled sections
+_current_scope: contextvars.ContextVar[Optional[Scope]] = contextvars.ContextVar("profiler_scope", default=None)
+
+def endpoint_label(scope: Scope) -> str:
+    """Route a request was dispatched to, e.g. 'POST content.generate_content_plan'"""
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        module = getattr(endpoint, "__module__", "").rsplit(".", 1)[-1]
+        return f"{scope.get('method', '')} {module}.{getattr(endpoint, '__name__', endpoint)}"
+    return f"{scope.get('method', '')} {scope.get('path', '')}"
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a live worker
+
+    A daemon thread reads every thread's stack with sys._current_frames() each
+    interval and counts them as collapsed stacks, which flamegraph.pl and
+    speedscope read directly. Samples from the event loop thread are rooted at
+    the endpoint whose task was running, so one worker's CPU can be split by
+    route. Allocation tracking with tracemalloc is optional because it slows
+    every allocation down.
+
+    With per-thread CPU clocks, a stack is weighted by the CPU microseconds its
+    thread used since the previous sample, and threads that used less than
+    RUNNING_CPU_FRACTION of the interval are skipped, so threads blocked
+    anywhere (in a socket read, time.sleep or a lock) drop out and figures are
+    CPU time.
+    Without them only a known idle innermost frame is filtered, and figures are
+    wall-clock samples.
+    """
+
+    def __init__(self):
+        self.running = False
+        self.interval = PROFILER_INTERVAL
+        self.allocations = False
+        self.stacks: Counter = Counter()
+        self.endpoints: Counter = Counter()
+        self.endpoint_cpu: Counter = Counter()
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        self.samples = 0
+        self.idle_samples = 0
+        self.sampling_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._tasks: Dict[asyncio.Task, Scope] = {}
+        self._frame_names: Dict[Any, str] = {}
+        self._thread_cpu: Dict[int, float] = {}
+        self._started_tracemalloc = False
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._allocation_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._stop_handle: Optional[asyncio.TimerHandle] = None
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.endpoints.clear()
+            self.endpoint_cpu.clear()
+            self._thread_cpu.clear()
+            self.sections.clear()
+            self.samples = 0
+            self.idle_samples = 0
+            self.sampling_seconds = 0.0
+        self._allocation_snapshot = None
+
+    def start(self, interval: Optional[float] = None, allocations: bool = False, duration: Optional[float] = None):
+        """Start sampling; must be called from the event loop that serves requests"""
+        if self.running:
+            raise ValueError("Profiler is already running")
+
+        self.reset()
+        self.interval = interval or PROFILER_INTERVAL
+        self.allocations = allocations
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILER_ALLOCATION_FRAMES)
+                self._started_tracemalloc = True
+            self._baseline = tracemalloc.take_snapshot()
+
+        self._stop.clear()
+        self.running = True
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        if duration:
+            self._stop_handle = self._loop.call_later(duration, self.stop)
+        logger.info(f"Profiler started: interval {self.interval}s, allocations {allocations}")
+
+    def stop(self):
+        if not self.running:
+            return
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+
+        self._stop.set()
+        self._thread.join()
+        self.running = False
+        self.stopped_at = time.time()
+        if self.allocations:
+            self._allocation_snapshot = self._take_allocation_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        logger.info(f"Profiler stopped after {self.samples} samples")
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            try:
+                self._sample(own_id)
+            except Exception as e:
+                logger.warning(f"Profiler sample failed: {str(e)}")
+            self.sampling_seconds += time.perf_counter() - started
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = self._frame_names[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return name
+
+    def _root(self, thread_id: int, names: Dict[int, str]) -> str:
+        if thread_id != self._loop_thread_id:
+            return f"[thread {names.get(thread_id, thread_id)}]"
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return "[event loop]"
+        scope = self._tasks.get(task)
+        if scope is not None:
+            return endpoint_label(scope)
+        coro = task.get_coro()
+        return f"[task {getattr(coro, '__qualname__', task.get_name())}]"
+
+    def _cpu_used(self, thread_id: int) -> Optional[float]:
+        """CPU seconds a thread used since its last sample, or None without a CPU clock"""
+        if not THREAD_CPU_CLOCKS:
+            return None
+        try:
+            cpu = time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+        except (OSError, OverflowError):
+            # The thread exited after its frame was read
+            return 0.0
+        previous = self._thread_cpu.get(thread_id)
+        self._thread_cpu[thread_id] = cpu
+        # A thread's first sample has nothing to compare with
+        return 0.0 if previous is None else cpu - previous
+
+    def _sample(self, own_id: int):
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        collapsed = []
+        idle = 0
+        for thread_id, frame in frames.items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            cpu = self._cpu_used(thread_id)
+            if (cpu is not None and cpu < self.interval * RUNNING_CPU_FRACTION) or (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS:
+                idle += 1
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < PROFILER_MAX_DEPTH:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            root = self._root(thread_id, names)
+            stack.append(root)
+            collapsed.append((root, ";".join(reversed(stack)), cpu))
+        if len(self._thread_cpu) > len(frames):
+            # Forget threads that have exited
+            self._thread_cpu = {thread_id: cpu for thread_id, cpu in self._thread_cpu.items() if thread_id in frames}
+        del frames
+
+        with self._lock:
+            self.samples += 1
+            self.idle_samples += idle
+            for root, key, cpu in collapsed:
+                self.endpoints[root] += 1
+                self.endpoint_cpu[root] += cpu if cpu is not None else self.interval
+                if key not in self.stacks and len(self.stacks) >= PROFILER_MAX_STACKS:
+                    key = f"{root};[truncated]"
+                # Flamegraph weights: CPU microseconds, or one per sample without CPU clocks
+                self.stacks[key] += max(1, round(cpu * 1e6)) if cpu is not None else 1
+
+    def track_request(self, scope: Scope) -> Optional[asyncio.Task]:
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks[task] = scope
+        return task
+
+    def untrack_request(self, task: Optional[asyncio.Task]):
+        if task is not None:
+            self._tasks.pop(task, None)
+
+    @contextmanager
+    def section(self, name: str):
+        """Time a synchronous block, such as JSON parsing, per endpoint"""
+        if not self.running:
+            yield
+            return
+
+        scope = _current_scope.get()
+        key = f"{endpoint_label(scope) if scope is not None else '[background]'} {name}"
+        cpu_started = time.thread_time()
+        wall_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            cpu = time.thread_time() - cpu_started
+            wall = time.perf_counter() - wall_started
+            with self._lock:
+                entry = self.sections.setdefault(key, {"calls": 0, "cpu_seconds": 0.0, "wall_seconds": 0.0})
+                entry["calls"] += 1
+                entry["cpu_seconds"] += cpu
+                entry["wall_seconds"] += wall
+
+    def collapsed(self, endpoint: Optional[str] = None) -> str:
+        """
+        Samples as collapsed stacks, one 'frame;frame;frame weight' line each
+
+        Weights are CPU microseconds, or sample counts without per-thread CPU clocks.
+        """
+        with self._lock:
+            items = list(self.stacks.items())
+        lines = [
+            f"{stack} {count}"
+            for stack, count in sorted(items)
+            if endpoint is None or endpoint in stack.split(";", 1)[0]
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _take_allocation_snapshot(self) -> Optional[tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    def allocation_collapsed(self, endpoint: Optional[str] = None) -> str:
+        """
+        Memory allocated since profiling started and still held, as collapsed
+        stacks weighted by bytes
+
+        endpoint keeps only stacks passing through a frame whose function or
+        file name contains it.
+        """
+        snapshot = self._allocation_snapshot
+        if snapshot is None and self.running and self.allocations:
+            snapshot = self._take_allocation_snapshot()
+        if snapshot is None:
+            raise ValueError("No allocation profile; start the profiler with allocations enabled")
+
+        lines = []
+        for stat in snapshot.compare_to(self._baseline, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            # tracemalloc frames carry no function names, so they are file:line
+            stack = ";".join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in stat.traceback)
+            if endpoint is not None and endpoint not in stack:
+                continue
+            lines.append(f"{stack} {stat.size_diff}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def status(self) -> Dict[str, Any]:
+        end = time.time() if self.running else (self.stopped_at or time.time())
+        elapsed = end - self.started_at if self.started_at else 0.0
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda item: self.endpoint_cpu[item[0]], reverse=True)
+            sections = {
+                key: {**entry, "cpu_seconds": round(entry["cpu_seconds"], 4), "wall_seconds": round(entry["wall_seconds"], 4)}
+                for key, entry in self.sections.items()
+            }
+            endpoint_cpu = dict(self.endpoint_cpu)
+            samples = self.samples
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "allocations": self.allocations,
+            # "cpu": measured per-thread CPU time; "wall": samples of threads not in a known wait
+            "mode": "cpu" if THREAD_CPU_CLOCKS else "wall",
+            "elapsed_seconds": round(elapsed, 2),
+            "samples": samples,
+            "idle_samples": self.idle_samples,
+            "unique_stacks": len(self.stacks),
+            # Share of wall time the sampler held the interpreter
+            "overhead_percent": round(100 * self.sampling_seconds / elapsed, 3) if elapsed else 0.0,
+            "endpoints": [
+                {
+                    "endpoint": label,
+                    "samples": count,
+                    ("cpu_seconds" if THREAD_CPU_CLOCKS else "wall_seconds"): round(endpoint_cpu.get(label, 0.0), 3)
+                }
+                for label, count in endpoints
+            ],
+            "sections": sections
+        }
+
+# Shared profiler for the worker
+profiler = SamplingProfiler()
+
+def profiled(name: str):
+    """Decorator recording a synchronous function as a named profiler section"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.running:
+                return func(*args, **kwargs)
+            with profiler.section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class ProfilerMiddleware:
+    """Remember which request each task serves, so samples can be split by endpoint"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not profiler.running:
+            await self.app(scope, receive, send)
+            return
+
+        # Routing fills in scope["endpoint"] later, on the same dict
+        token = _current_scope.set(scope)
+        task = profiler.track_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.untrack_request(task)
+            _current_scope.reset(token)
@@ -0,0 +1,47 @@
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Optional, Iterator
+
+@dataclass(frozen=True)
+class RequestContext:
+    """Provider settings of the request being handled"""
+    api_provider: Optional[str] = None
+    api_key: Optional[str] = None
+    model: Optional[str] = None
+    use_gpt4: bool = False
+
+    def key_for(self, api_provider: str) -> Optional[str]:
+        """The request's API key, if it was given for this provider"""
+        if self.api_provider in (None, api_provider):
+            return self.api_key
+        return None
+
+    def model_for(self, api_provider: str) -> Optional[str]:
+        if self.api_provider in (None, api_provider):
+            return self.model
+        return None
+
+_current_context: contextvars.ContextVar[RequestContext] = contextvars.ContextVar(
+    "request_context", default=RequestContext()
+)
+
+def current_context() -> RequestContext:
+    """Settings of the current request, or defaults outside of one"""
+    return _current_context.get()
+
+@contextmanager
+def request_context(**values) -> Iterator[RequestContext]:
+    """
+    Use the given provider settings for everything awaited inside the block
+
+    The settings live in a context variable, so concurrent requests never see
+    each other's keys. Tasks started inside the block inherit them. Values left
+    as None keep the settings of any enclosing context.
+    """
+    values = {name: value for name, value in values.items() if value is not None}
+    token = _current_context.set(replace(_current_context.get(), **values))
+    try:
+        yield _current_context.get()
+    finally:
+        _current_context.reset(token)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from typing import Any, Iterable
+
+import orjson
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from utils.compression import StreamCompressor, choose_encoding
+
+# Bytes of a spooled response kept in memory before it spills to a temporary file
+RESPONSE_SPOOL_SIZE = int(os.getenv("RESPONSE_SPOOL_SIZE", str(16 * 1024)))
+# Each streamed response holds one read in flight while the client catches up
+SPOOL_READ_SIZE = 8 * 1024
+
+class ValidatedJSONResponse(ORJSONResponse):
+    """
+    JSON response for content that was already validated
+
+    FastAPI returns Response objects as they are, so a route can declare a
+    response_model for its schema and docs without the response being
+    validated a second time. Pydantic models are serialized by pydantic's own
+    JSON encoder, anything else (including record dataclasses) by orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def spooled_json_response(chunks: Iterable[bytes], accept_encoding: str = "") -> Response:
+    """
+    Send JSON produced in chunks without holding the whole body in memory
+
+    Chunks go through a spool that keeps RESPONSE_SPOOL_SIZE bytes in memory
+    and spills the rest to a temporary file, and the spool is streamed back.
+    The body is compressed while spooling when the client accepts it, since
+    the compression middleware leaves streamed responses alone. A body that
+    never spilled is sent as a plain response: streaming it would hold a read
+    chunk, a thread pool iteration and the spool per response, about as much
+    memory as the body itself.
+    """
+    encoding = choose_encoding(accept_encoding)
+    compressor = StreamCompressor(encoding) if encoding else None
+    spool = tempfile.SpooledTemporaryFile(max_size=RESPONSE_SPOOL_SIZE)
+    try:
+        for chunk in chunks:
+            spool.write(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            spool.write(compressor.flush())
+    except Exception:
+        spool.close()
+        raise
+
+    size = spool.tell()
+    headers = {"Content-Length": str(size)}
+    if encoding:
+        headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+    spool.seek(0)
+    if size <= RESPONSE_SPOOL_SIZE:
+        # Still in memory (the spool spills once it grows past its size)
+        content = spool.read()
+        spool.close()
+        return Response(content, media_type="application/json", headers=headers)
+
+    def body():
+        # A plain generator, so Starlette reads the spool in its thread pool
+        try:
+            while True:
+                data = spool.read(SPOOL_READ_SIZE)
+                if not data:
+                    break
+                yield data
+        finally:
+            spool.close()
+
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
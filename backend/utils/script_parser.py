@@ -0,0 +1,171 @@
+import re
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional
+
+# Speakers whose lines are voiceover rather than on-screen dialogue
+NARRATION_SPEAKERS = {"NARRATOR", "NARRATION", "VOICEOVER", "VOICE-OVER", "VOICE OVER", "VO", "V.O."}
+
+# One pattern for every kind of line we care about, tried in a single match per line:
+#   [SCENE 1 - SUPERMARKET - DAY - 0:00-0:05]
+#   [SFX: Door chime]   (also MUSIC / SOUND cues)
+#   TITLE: Grocery Store Mayhem
+#   NARRATOR: "Meet Whiskers..."   /   **WHISKERS:** "Purr-fect!"
+_LINE_PATTERN = re.compile(
+    r"""
+    ^\[\s*SCENE\s+(?P<scene>\d+)\s*[-–:]?\s*(?P<location>.*?)
+        (?:\s*[-–]\s*\(?(?P<start>\d{1,2}:\d{2})\s*[-–]\s*(?P<end>\d{1,2}:\d{2})\)?)?\s*\]$
+    | ^\[\s*(?:SFX|SOUND|MUSIC)\s*:\s*(?P<sfx>.*?)\s*\]$
+    | ^TITLE\s*:\s*(?P<title>.+)$
+    | ^\**(?P<speaker>[^\s:*\[][^:*\[]{0,40}?)\**\s*:\**\s*(?P<text>.*)$
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+def _to_seconds(timestamp: Optional[str]) -> Optional[int]:
+    if not timestamp:
+        return None
+    minutes, seconds = timestamp.split(":")
+    return int(minutes) * 60 + int(seconds)
+
+def _strip_quotes(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] in "\"“" and text[-1] in "\"”":
+        return text[1:-1].strip()
+    return text
+
+@dataclass
+class ScriptLine:
+    speaker: str
+    text: str
+    is_narration: bool
+
+@dataclass
+class Scene:
+    number: int
+    location: str = ""
+    start: Optional[int] = None
+    end: Optional[int] = None
+    description: List[str] = field(default_factory=list)
+    lines: List[ScriptLine] = field(default_factory=list)
+    sfx: List[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> Optional[int]:
+        """Scene length in seconds, if the header had timestamps"""
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    @property
+    def narration(self) -> List[str]:
+        return [line.text for line in self.lines if line.is_narration]
+
+@dataclass
+class ParsedScript:
+    title: Optional[str] = None
+    scenes: List[Scene] = field(default_factory=list)
+
+    @property
+    def narration_lines(self) -> List[str]:
+        """All narration/voiceover lines in script order"""
+        return [text for scene in self.scenes for text in scene.narration]
+
+    @property
+    def dialogue_by_speaker(self) -> Dict[str, List[str]]:
+        """On-screen dialogue grouped by speaker"""
+        dialogue: Dict[str, List[str]] = {}
+        for scene in self.scenes:
+            for line in scene.lines:
+                if not line.is_narration:
+                    dialogue.setdefault(line.speaker, []).append(line.text)
+        return dialogue
+
+    @property
+    def total_duration(self) -> Optional[int]:
+        """Runtime in seconds according to the scene timestamps"""
+        durations = [scene.duration for scene in self.scenes]
+        if not durations or any(d is None for d in durations):
+            return None
+        return sum(durations)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def parse_script(script: str) -> ParsedScript:
+    """
+    Parse a generated script into scenes, dialogue, narration and SFX cues
+
+    The script is scanned once, line by line, with a single compiled pattern.
+    Lines before the first scene header go into an unnumbered scene 0. Plain
+    lines directly after a dialogue or narration line (no blank line between)
+    continue that line; other plain lines are scene description.
+    """
+    parsed = ParsedScript()
+    scene: Optional[Scene] = None
+    current_line: Optional[ScriptLine] = None
+
+    for raw_line in script.splitlines():
+        line = raw_line.strip()
+        if not line:
+            current_line = None
+            continue
+
+        if scene is None:
+            scene = Scene(number=0)
+            parsed.scenes.append(scene)
+
+        match = _LINE_PATTERN.match(line)
+        if match:
+            # A tuple is much cheaper to build per line than groupdict()
+            number, location, start, end, sfx, title, speaker, text = match.groups()
+
+            if number is not None:
+                scene = Scene(
+                    number=int(number),
+                    location=location.strip(" -–"),
+                    start=_to_seconds(start),
+                    end=_to_seconds(end)
+                )
+                # Drop the implicit scene 0 if nothing was written before the first header
+                if len(parsed.scenes) == 1 and parsed.scenes[0].number == 0 and not (
+                    parsed.scenes[0].description or parsed.scenes[0].lines or parsed.scenes[0].sfx
+                ):
+                    parsed.scenes.pop()
+                parsed.scenes.append(scene)
+                current_line = None
+                continue
+
+            if sfx is not None:
+                scene.sfx.append(sfx)
+                current_line = None
+                continue
+
+            if title is not None:
+                parsed.title = title.strip()
+                current_line = None
+                continue
+
+            speaker = speaker.strip()
+            normalized = speaker.upper()
+            is_narration = normalized in NARRATION_SPEAKERS
+            # Only all-caps names are speakers; "The camera pans: ..." is description
+            if is_narration or speaker == normalized:
+                current_line = ScriptLine(
+                    speaker="NARRATOR" if is_narration else normalized,
+                    text=_strip_quotes(text),
+                    is_narration=is_narration
+                )
+                scene.lines.append(current_line)
+                continue
+
+        if current_line is not None and not line.startswith("["):
+            current_line.text = f"{current_line.text} {_strip_quotes(line)}".strip()
+        else:
+            scene.description.append(line)
+            current_line = None
+
+    # Speaker lines with no text at all (e.g. a bare "NARRATION:") carry nothing
+    for scene in parsed.scenes:
+        scene.lines = [line for line in scene.lines if line.text]
+
+    return parsed
@@ -0,0 +1,222 @@
+import os
+import re
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Semantic cache configuration
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+# Namespaces kept per cache; the least recently used one is dropped after that
+SEMANTIC_CACHE_MAX_NAMESPACES = int(os.getenv("SEMANTIC_CACHE_MAX_NAMESPACES", "256"))
+
+EMBEDDING_DIM = 512
+# Rows allocated for a new namespace; the buffer doubles up to SEMANTIC_CACHE_MAX_ENTRIES
+INITIAL_CAPACITY = 64
+
+# Words that mean the same thing for our prompts
+SYNONYMS = {
+    "funny": "humorous",
+    "hilarious": "humorous",
+    "comedic": "humorous",
+    "comedy": "humorous",
+    "humor": "humorous",
+    "kid": "family",
+    "kids": "family",
+    "children": "family",
+    "childrens": "family",
+    "mischievous": "tricky",
+    "naughty": "tricky",
+    "sneaky": "tricky",
+    "store": "shop",
+    "supermarket": "grocery",
+}
+
+STOPWORDS = {"a", "an", "and", "the", "of", "for", "with", "in", "on", "to", "very", "friendly"}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def normalize_text(text: Optional[str]) -> List[str]:
+    """Lowercase, tokenize, map synonyms and drop stopwords"""
+    if not text:
+        return []
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(str(text).lower()):
+        token = SYNONYMS.get(token, token)
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+def _hash_feature(feature: str) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % EMBEDDING_DIM, 1.0 if (value >> 63) & 1 else -1.0
+
+def embed_fields(fields: Dict[str, Any]) -> np.ndarray:
+    """
+    Embed free-text fields with the hashing trick
+
+    Each field contributes its tokens (order-insensitive) and character
+    trigrams, prefixed with the field name so words in different fields do not
+    collide. The result is L2-normalized so a dot product is cosine similarity.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for name, value in fields.items():
+        if isinstance(value, (list, tuple)):
+            value = " ".join(str(v) for v in value)
+        tokens = normalize_text(value)
+        for token in set(tokens):
+            index, sign = _hash_feature(f"{name}:w:{token}")
+            vector[index] += sign
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                index, sign = _hash_feature(f"{name}:c:{padded[i:i + 3]}")
+                vector[index] += 0.5 * sign
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+class _Namespace:
+    """
+    Vectors and results for requests that share the same exact-match fields
+
+    Vectors live in one preallocated matrix that doubles as it fills and then
+    becomes a ring buffer, the oldest entry overwritten by the newest, so an
+    insert never copies or re-indexes the others. Search scores every vector
+    in a single matrix product, which stays around a millisecond at 10k
+    entries and never misses a match.
+    """
+
+    def __init__(self, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self.vectors = np.zeros((min(INITIAL_CAPACITY, self.max_entries), EMBEDDING_DIM), dtype=np.float32)
+        self.results: List[Any] = []
+        # Slot the next entry overwrites once the buffer is full
+        self.oldest = 0
+
+    def search(self, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        if not self.results:
+            return None, 0.0
+
+        scores = self.vectors[:len(self.results)] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def add(self, vector: np.ndarray, result: Any):
+        size = len(self.results)
+        if size < self.max_entries:
+            if size == len(self.vectors):
+                grown = np.zeros((min(size * 2, self.max_entries), EMBEDDING_DIM), dtype=np.float32)
+                grown[:size] = self.vectors
+                self.vectors = grown
+            self.vectors[size] = vector
+            self.results.append(result)
+            return
+
+        self.vectors[self.oldest] = vector
+        self.results[self.oldest] = result
+        self.oldest = (self.oldest + 1) % self.max_entries
+
+class SemanticCache:
+    """
+    Reuses results for requests whose free-text fields are near-identical
+
+    Fields that must match exactly (episode count, cat name, provider...) select
+    a namespace; the remaining free-text fields are embedded and compared by
+    cosine similarity against previous requests in that namespace. Namespace
+    keys include free text such as the series title, so only the most recently
+    used max_namespaces are kept.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_namespaces: int = SEMANTIC_CACHE_MAX_NAMESPACES
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.max_namespaces = max(1, max_namespaces)
+        self._namespaces: "OrderedDict[str, _Namespace]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _namespace_key(exact_fields: Dict[str, Any]) -> str:
+        return repr(sorted((k, str(v).strip().lower()) for k, v in exact_fields.items()))
+
+    def lookup(self, exact_fields: Dict[str, Any], fuzzy_fields: Dict[str, Any]) -> Optional[Any]:
+        """Return a copy of a cached result for a near-identical request, if any"""
+        vector = embed_fields(fuzzy_fields)
+        key = self._namespace_key(exact_fields)
+        with self._lock:
+            namespace = self._namespaces.get(key)
+            if namespace:
+                self._namespaces.move_to_end(key)
+            index, score = namespace.search(vector) if namespace else (None, 0.0)
+            if index is None or score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            result = namespace.results[index]
+
+        logger.info(f"Semantic cache hit in {self.name} (similarity {score:.3f})")
+        return copy.deepcopy(result)
+
+    def store(self, exact_fields: Dict[str, Any], fuzzy_fields: Dict[str, Any], result: Any):
+        """Remember a result for later near-identical requests"""
+        vector = embed_fields(fuzzy_fields)
+        key = self._namespace_key(exact_fields)
+        with self._lock:
+            if key in self._namespaces:
+                self._namespaces.move_to_end(key)
+            else:
+                self._namespaces[key] = _Namespace()
+                if len(self._namespaces) > self.max_namespaces:
+                    self._namespaces.popitem(last=False)
+            self._namespaces[key].add(vector, copy.deepcopy(result))
+
+def plan_cache_fields(config: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split a content plan config into exact-match and free-text fields"""
+    exact = {
+        "series_title": config.get("series_title", "Mischievous Cat Shopper"),
+        "num_episodes": config.get("num_episodes", 5),
+        "cat_name": config.get("cat_name", "Whiskers"),
+        "api_provider": config.get("api_provider", "openai"),
+        "use_gpt4": bool(config.get("use_gpt4", False)),
+    }
+    fuzzy = {
+        key: config.get(key)
+        for key in ("content_style", "theme", "setting", "target_audience", "additional_characters")
+    }
+    return exact, fuzzy
+
+def script_cache_fields(
+    episode_idea: Dict[str, Any],
+    cat_name: str,
+    content_style: str,
+    api_provider: str
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split script generation inputs into exact-match and free-text fields"""
+    exact = {"cat_name": cat_name, "api_provider": api_provider}
+    fuzzy = {
+        key: episode_idea.get(key)
+        for key in ("title", "premise", "setting", "items", "conflict", "resolution")
+    }
+    fuzzy["content_style"] = content_style
+    return exact, fuzzy
+
+# Shared caches for content plans and scripts
+plan_cache = SemanticCache("content_plans")
+script_cache = SemanticCache("scripts")